@@ -0,0 +1,112 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+class Overloaded(Exception):
+    """
+    Raised when a request can't even be queued. Carries a Retry-After hint in seconds.
+    """
+    def __init__(self, retry_after: int):
+        super().__init__("Server is overloaded, please retry later")
+        self.retry_after = retry_after
+
+class DeadlineExceeded(Exception):
+    """
+    Raised when a request can no longer finish within its caller's deadline.
+    """
+    def __init__(self, stage: str):
+        super().__init__(f"Request deadline exceeded before {stage}")
+        self.stage = stage
+
+def check_deadline(deadline, stage: str):
+    """
+    Raises DeadlineExceeded if the (time.monotonic based) deadline has passed.
+    """
+    if deadline is not None and time.monotonic() >= deadline:
+        raise DeadlineExceeded(stage)
+
+class AdmissionController:
+    """
+    Limits how many requests run the expensive pipeline at once.
+
+    Up to `max_concurrency` requests are admitted; up to `max_queue` more wait
+    in FIFO order. Anything beyond that is rejected immediately with
+    Overloaded, so clients get a fast answer instead of timing out behind a
+    backlog. A waiting request whose deadline passes leaves the queue with
+    DeadlineExceeded.
+    """
+    def __init__(self, max_concurrency: int, max_queue: int, retry_after: int = 1):
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_queue = max(0, int(max_queue))
+        self.retry_after = max(1, int(retry_after))
+        self.active = 0
+        self._waiters = deque()
+        self.rejected = 0
+        self.expired = 0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    @asynccontextmanager
+    async def admit(self, deadline=None):
+        await self._acquire(deadline)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, deadline):
+        check_deadline(deadline, "admission")
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise Overloaded(self.retry_after)
+
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), timeout)
+        except asyncio.TimeoutError:
+            self._abandon(fut)
+            self.expired += 1
+            raise DeadlineExceeded("admission")
+        except asyncio.CancelledError:
+            self._abandon(fut)
+            raise
+
+    def _abandon(self, fut):
+        """
+        Leaves the queue. If the slot was handed over in the meantime, pass it on.
+        """
+        if fut.done() and not fut.cancelled():
+            self._release()
+        else:
+            fut.cancel()
+            try:
+                self._waiters.remove(fut)
+            except ValueError:
+                pass
+
+    def _release(self):
+        # Hand the slot straight to the next waiter, keeping `active` unchanged
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+            "expired_in_queue": self.expired
+        }
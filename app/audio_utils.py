@@ -1,8 +1,12 @@
-import librosa
 import numpy as np
 import io
+import logging
 import soundfile as sf
+import soxr
 import torch
+from .metrics import stage_timer
+
+logger = logging.getLogger(__name__)
 
 # Constants
 SAMPLE_RATE = 16000
@@ -11,46 +15,190 @@ N_MELS = 128
 N_FFT = 1024
 HOP_LENGTH = 512
 
+# Native-rate audio decoded beyond the kept segment, so the resampler's
+# filter sees real signal (not a hard cut) around the last kept samples
+RESAMPLE_MARGIN_SECONDS = 0.05
+
+def decode_audio(audio_bytes: bytes, max_seconds: float = None):
+    """
+    Decodes audio bytes to mono float32 at the file's native sample rate.
+    If max_seconds is given, only that much audio (plus resampler margin) is
+    decoded, so cost and memory don't grow with the length of the upload.
+    libsndfile (WAV/FLAC/OGG/MP3) decodes incrementally, so only the needed
+    prefix is read; other formats fall back to librosa/audioread.
+    Returns (y, sr).
+    """
+    with io.BytesIO(audio_bytes) as f:
+        try:
+            with sf.SoundFile(f) as snd:
+                sr = snd.samplerate
+                frames = -1
+                if max_seconds is not None:
+                    frames = int(np.ceil((max_seconds + RESAMPLE_MARGIN_SECONDS) * sr))
+                y = snd.read(frames, dtype="float32", always_2d=True)
+            return y.mean(axis=1), sr
+        except sf.SoundFileRuntimeError:
+            # Imported here: librosa takes over a second to import and most uploads never need it
+            import librosa
+            f.seek(0)
+            duration = None if max_seconds is None else max_seconds + RESAMPLE_MARGIN_SECONDS
+            y, sr = librosa.load(f, sr=None, mono=True, duration=duration)
+            return y, sr
+
+def resample(y: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+    """
+    Same output as librosa.resample(res_type="soxr_hq"), calling soxr directly:
+    librosa's audio module takes over a second to import on the first request.
+    """
+    n_samples = int(np.ceil(len(y) * float(target_sr) / orig_sr))
+    y_hat = soxr.resample(y, orig_sr, target_sr, quality="soxr_hq")
+    if len(y_hat) < n_samples:
+        y_hat = np.pad(y_hat, (0, n_samples - len(y_hat)))
+    return np.asarray(y_hat[:n_samples], dtype=y.dtype)
+
+def load_waveform(audio_bytes: bytes, max_seconds: float) -> np.ndarray:
+    """
+    Decodes at most max_seconds of audio and resamples it to SAMPLE_RATE mono.
+    """
+    # Decode at the native rate, then resample as its own (timed) stage
+    with stage_timer("decode"):
+        y, sr = decode_audio(audio_bytes, max_seconds=max_seconds)
+    with stage_timer("resample"):
+        if sr != SAMPLE_RATE:
+            y = resample(y, sr, SAMPLE_RATE)
+    return y[:int(max_seconds * SAMPLE_RATE)]
+
 def preprocess_audio(audio_bytes: bytes) -> np.ndarray:
     """
-    Decodes audio bytes, resamples to 16kHz, converts to mono,
-    normalizes, and pads/trims to fixed duration.
+    Decodes the first DURATION seconds of the audio bytes, resamples to 16kHz,
+    converts to mono, normalizes, and pads/trims to fixed duration.
     """
     try:
-        # Load audio from bytes
-        # librosa.load supports file-like objects
-        with io.BytesIO(audio_bytes) as f:
-            y, sr = librosa.load(f, sr=SAMPLE_RATE, mono=True)
-        
-        # Normalize
-        if np.max(np.abs(y)) > 0:
-            y = y / np.max(np.abs(y))
-            
+        y = load_waveform(audio_bytes, DURATION)
+
         # Fix length
         target_len = SAMPLE_RATE * DURATION
-        if len(y) > target_len:
-            y = y[:target_len]
-        else:
+        if len(y) < target_len:
             padding = target_len - len(y)
             y = np.pad(y, (0, padding), 'constant')
-            
+
+        # Normalize (on the kept segment)
+        peak = np.max(np.abs(y))
+        if peak > 0:
+            y = y / peak
+
         return y
     except Exception as e:
-        raise ValueError(f"Error processing audio: {e}")
+        # The decoder's message can include internals (buffer addresses, paths); keep it in the log
+        logger.warning(f"Could not decode audio: {e!r}")
+        raise ValueError("Unsupported or corrupt audio") from e
+
+def _hz_to_mel(freqs: np.ndarray) -> np.ndarray:
+    # Slaney scale: linear below 1 kHz, logarithmic above
+    freqs = np.asarray(freqs, dtype=np.float64)
+    mels = freqs / (200.0 / 3)
+    log_region = freqs >= 1000.0
+    mels[log_region] = 15.0 + np.log(freqs[log_region] / 1000.0) / (np.log(6.4) / 27.0)
+    return mels
+
+def _mel_to_hz(mels: np.ndarray) -> np.ndarray:
+    mels = np.asarray(mels, dtype=np.float64)
+    freqs = mels * (200.0 / 3)
+    log_region = mels >= 15.0
+    freqs[log_region] = 1000.0 * np.exp((np.log(6.4) / 27.0) * (mels[log_region] - 15.0))
+    return freqs
+
+def mel_filterbank(sr: int, n_fft: int, n_mels: int) -> np.ndarray:
+    """
+    Slaney-style, area-normalized triangular mel filterbank (n_mels, 1 + n_fft // 2),
+    identical to librosa.filters.mel defaults without importing librosa's filters
+    module (and numba behind it) at serving time.
+    """
+    fft_freqs = np.fft.rfftfreq(n_fft, 1.0 / sr)
+    mel_min, mel_max = _hz_to_mel(np.array([0.0, sr / 2.0]))
+    mel_f = _mel_to_hz(np.linspace(mel_min, mel_max, n_mels + 2))
+    fdiff = np.diff(mel_f)
+    ramps = np.subtract.outer(mel_f, fft_freqs)
+    lower = -ramps[:-2] / fdiff[:-1, None]
+    upper = ramps[2:] / fdiff[1:, None]
+    weights = np.maximum(0.0, np.minimum(lower, upper))
+    weights *= (2.0 / (mel_f[2:] - mel_f[:-2]))[:, None]
+    return weights.astype(np.float32)
+
+class MelFrontEnd:
+    """
+    Batched log-mel front end: STFT -> mel -> dB in float32.
+
+    The N_MELS/N_FFT/HOP_LENGTH mel filterbank and the Hann window are built
+    once, and a whole (N, samples) batch is transformed in one vectorized
+    torch call. Matches librosa.feature.melspectrogram + power_to_db(ref=np.max)
+    (center=True, constant padding, per-clip max reference, top_db=80) to
+    within ~1e-3 dB.
+    """
+    def __init__(self, amin: float = 1e-10, top_db: float = 80.0):
+        self.amin = amin
+        self.top_db = top_db
+        self.window = torch.hann_window(N_FFT, periodic=True)
+        self.mel_basis = torch.from_numpy(mel_filterbank(SAMPLE_RATE, N_FFT, N_MELS))
+
+    def mel_power(self, y: torch.Tensor) -> torch.Tensor:
+        """
+        (N, samples) waveforms -> (N, N_MELS, frames) mel power.
+        """
+        spec = torch.stft(
+            y, N_FFT, HOP_LENGTH,
+            window=self.window, center=True, pad_mode="constant", return_complex=True
+        )
+        power = spec.real ** 2 + spec.imag ** 2
+        return torch.matmul(self.mel_basis, power)
+
+    def power_to_db(self, mel: torch.Tensor) -> torch.Tensor:
+        """
+        Per-clip power_to_db(ref=max, top_db) over the last two dims.
+        """
+        log_spec = 10.0 * torch.log10(torch.clamp(mel, min=self.amin))
+        ref = torch.amax(mel, dim=(-2, -1), keepdim=True)
+        log_spec = log_spec - 10.0 * torch.log10(torch.clamp(ref, min=self.amin))
+        floor = torch.amax(log_spec, dim=(-2, -1), keepdim=True) - self.top_db
+        return torch.maximum(log_spec, floor)
+
+    def __call__(self, ys) -> torch.Tensor:
+        """
+        Accepts a (samples,) or (N, samples) array/tensor; returns (N, N_MELS, frames) float32.
+        """
+        y = torch.as_tensor(ys, dtype=torch.float32)
+        if y.dim() == 1:
+            y = y.unsqueeze(0)
+        with torch.no_grad():
+            return self.power_to_db(self.mel_power(y))
+
+_front_end = None
+
+def get_front_end() -> MelFrontEnd:
+    """
+    Shared MelFrontEnd, built on first use.
+    """
+    global _front_end
+    if _front_end is None:
+        _front_end = MelFrontEnd()
+    return _front_end
 
 def extract_features(y: np.ndarray) -> np.ndarray:
     """
     Extracts Mel Spectrogram features from the waveform.
     Returns a numpy array of shape (N_MELS, TimeFrames).
     """
-    mel_spec = librosa.feature.melspectrogram(
-        y=y, 
-        sr=SAMPLE_RATE, 
-        n_mels=N_MELS, 
-        n_fft=N_FFT, 
-        hop_length=HOP_LENGTH
-    )
-    mel_spec_db = librosa.power_to_db(mel_spec, ref=np.max)
+    with stage_timer("features"):
+        mel_spec_db = get_front_end()(y)[0].numpy()
+    return mel_spec_db
+
+def extract_features_batch(ys: np.ndarray) -> np.ndarray:
+    """
+    Batched extract_features for equal-length waveforms.
+    (N, samples) -> (N, N_MELS, TimeFrames)
+    """
+    with stage_timer("features"):
+        mel_spec_db = get_front_end()(ys).numpy()
     return mel_spec_db
 
 def feature_to_tensor(feature: np.ndarray) -> torch.Tensor:
@@ -58,5 +206,45 @@ def feature_to_tensor(feature: np.ndarray) -> torch.Tensor:
     Converts numpy feature array to PyTorch tensor with channel dimension.
     Shape: (1, N_MELS, TimeFrames)
     """
-    tensor = torch.tensor(feature, dtype=torch.float32)
+    with stage_timer("to_tensor"):
+        tensor = torch.tensor(feature, dtype=torch.float32)
     return tensor.unsqueeze(0) # Add channel dim
+
+def window_features(y: np.ndarray, hop_samples: int, max_windows: int):
+    """
+    Features for overlapping DURATION-second windows of a whole clip.
+
+    Windows start every hop_samples; if that grid leaves the end of the clip
+    uncovered, one last window is aligned to the end. If that would take more
+    than max_windows windows, the hop is widened instead so the capped windows
+    still span the whole clip (first at the start, last aligned to the end).
+    The windows are strided views into y (no per-window copies) and go
+    through the front end as one batch. Peak normalization is applied per window on the mel power, which is
+    equivalent to normalizing each window's waveform first.
+    Returns ((N, N_MELS, TimeFrames) features, list of window start times in seconds).
+    """
+    window_len = SAMPLE_RATE * DURATION
+    if len(y) < window_len:
+        y = np.pad(y, (0, window_len - len(y)), 'constant')
+    y = np.ascontiguousarray(y, dtype=np.float32)
+    max_windows = max(1, int(max_windows))
+    hop_samples = max(1, int(hop_samples))
+
+    views = np.lib.stride_tricks.sliding_window_view(y, window_len, writeable=True)
+    last = len(views) - 1
+    needed = len(range(0, last, hop_samples)) + 1  # Hop grid plus the end-aligned window
+    if needed > max_windows and max_windows > 1:
+        hop_samples = -(-last // (max_windows - 1))
+    starts = list(range(0, len(views), hop_samples))[:max_windows]
+    blocks = [views[::hop_samples][:len(starts)]]
+    if starts[-1] < last and len(starts) < max_windows:
+        blocks.append(views[last:last + 1])
+        starts.append(last)
+
+    front_end = get_front_end()
+    with stage_timer("features"), torch.no_grad():
+        mel = torch.cat([front_end.mel_power(torch.from_numpy(block)) for block in blocks])
+        peaks = torch.tensor([float(np.max(np.abs(y[s:s + window_len]))) for s in starts])
+        scale = torch.where(peaks > 0, peaks ** 2, torch.ones_like(peaks))
+        features = front_end.power_to_db(mel / scale[:, None, None]).numpy()
+    return features, [s / SAMPLE_RATE for s in starts]
@@ -0,0 +1,85 @@
+import logging
+import warnings
+import numpy as np
+import torch
+from .audio_utils import N_MELS, SAMPLE_RATE, DURATION, HOP_LENGTH
+
+logger = logging.getLogger(__name__)
+
+MODEL_BACKENDS = ("eager", "torchscript", "compile", "onnx")
+# Model input for one clip: (batch, channel, mels, frames)
+TIME_FRAMES = 1 + (SAMPLE_RATE * DURATION) // HOP_LENGTH
+INPUT_SHAPE = (1, 1, N_MELS, TIME_FRAMES)
+
+def example_input(batch_size: int = 1) -> torch.Tensor:
+    return torch.zeros((batch_size,) + INPUT_SHAPE[1:], dtype=torch.float32)
+
+class OnnxRunner:
+    """
+    Runs an exported ONNX graph with ONNX Runtime behind the same
+    tensor-in / logits-out interface as a torch module.
+    """
+    def __init__(self, path: str, num_threads: int = None):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = num_threads or torch.get_num_threads()
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        features = np.ascontiguousarray(x.numpy(), dtype=np.float32)
+        logits = self.session.run(None, {self.input_name: features})[0]
+        return torch.from_numpy(logits)
+
+def trace_torchscript(model: torch.nn.Module, optimize: bool = True) -> torch.jit.ScriptModule:
+    """
+    Traces the model on a dummy batch, then freezes it (weights become
+    constants, conv+bn folded) for inference. optimize=False keeps the
+    module serializable (optimize_for_inference output can't be reloaded).
+    """
+    with torch.no_grad(), warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        frozen = torch.jit.freeze(torch.jit.trace(model.eval(), example_input()))
+        return torch.jit.optimize_for_inference(frozen) if optimize else frozen
+
+def export_onnx(model: torch.nn.Module, path: str, opset: int = 17):
+    """
+    Exports the model to ONNX with a dynamic batch dimension.
+    """
+    torch.onnx.export(
+        model.eval(), (example_input(),), path,
+        input_names=["features"], output_names=["logits"],
+        dynamic_axes={"features": {0: "batch"}, "logits": {0: "batch"}},
+        opset_version=opset,
+        dynamo=False
+    )
+
+def build_runner(model: torch.nn.Module, backend: str, onnx_path: str = None):
+    """
+    Wraps the loaded model in the requested execution backend. Returns a
+    callable mapping an (N, 1, F, T) tensor to (N, 1) logits.
+    """
+    if backend not in MODEL_BACKENDS:
+        raise ValueError(f"Unknown model backend '{backend}'. Expected one of {MODEL_BACKENDS}")
+    if backend == "torchscript":
+        return trace_torchscript(model)
+    if backend == "compile":
+        # Compilation itself happens lazily on the first calls, i.e. during warmup
+        return torch.compile(model.eval())
+    if backend == "onnx":
+        if not onnx_path:
+            raise ValueError("The onnx backend needs an exported model (ONNX_MODEL_PATH)")
+        return OnnxRunner(onnx_path)
+    return model
+
+def warmup(runner, batch_sizes=(1,), iterations: int = 3):
+    """
+    Runs dummy batches through the runner so lazy initialization (allocator
+    growth, kernel selection, tracing/compilation) happens before real traffic.
+    """
+    with torch.no_grad():
+        for batch_size in batch_sizes:
+            x = example_input(batch_size)
+            for _ in range(iterations):
+                runner(x)
@@ -0,0 +1,188 @@
+import asyncio
+import functools
+import time
+from collections import deque
+from .metrics import BATCH_SIZE, BATCH_QUEUE_WAIT
+from .admission import DeadlineExceeded
+
+class BatchStats:
+    """
+    Running statistics about the batches formed by MicroBatcher.
+    Keeps totals plus a window of recent samples for percentiles.
+    """
+    def __init__(self, window: int = 1024):
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        self.size_histogram = {}
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.recent_waits = deque(maxlen=window)
+        self.recent_sizes = deque(maxlen=window)
+
+    def record(self, size: int, waits: list):
+        BATCH_SIZE.observe(size)
+        for w in waits:
+            BATCH_QUEUE_WAIT.observe(w)
+        self.batches += 1
+        self.items += size
+        self.size_histogram[size] = self.size_histogram.get(size, 0) + 1
+        self.recent_sizes.append(size)
+        for w in waits:
+            self.total_wait += w
+            self.max_wait = max(self.max_wait, w)
+            self.recent_waits.append(w)
+
+    def snapshot(self) -> dict:
+        waits = sorted(self.recent_waits)
+
+        def pct(p):
+            if not waits:
+                return 0.0
+            return waits[min(len(waits) - 1, int(p * len(waits)))]
+
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "errors": self.errors,
+            "avg_batch_size": round(self.items / self.batches, 3) if self.batches else 0.0,
+            "batch_size_histogram": dict(sorted(self.size_histogram.items())),
+            "queue_wait_ms": {
+                "avg": round(1000 * self.total_wait / self.items, 3) if self.items else 0.0,
+                "p50": round(1000 * pct(0.50), 3),
+                "p95": round(1000 * pct(0.95), 3),
+                "p99": round(1000 * pct(0.99), 3),
+                "max": round(1000 * self.max_wait, 3)
+            }
+        }
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching scheduler.
+
+    Requests submit their prepared features and await a probability. A single
+    background task drains the queue, grouping up to `max_batch_size` items
+    (waiting at most `max_wait_ms` after the first one arrives) and runs them
+    through `run_batch` as one forward pass. While a batch is running, new
+    requests keep queueing, so batches grow naturally under load.
+
+    Each item carries the model it must run on (see ServedModel); a batch
+    only ever holds items for one model, so a request that started before a
+    hot reload is still scored by the model it started on.
+    """
+    def __init__(self, run_batch, max_batch_size: int = 8, max_wait_ms: float = 5.0, dispatch=None):
+        """
+        Args:
+            run_batch: Sync callable taking a list of features (and a `model` keyword),
+                       returning a list of probabilities
+            max_batch_size: Upper bound on N in the (N, 1, F, T) forward pass
+            max_wait_ms: How long the first item of a batch may wait for company
+            dispatch: Optional coroutine function (fn, *args, model=...) used to run
+                      run_batch off the event loop. Defaults to the loop's default executor.
+        """
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.dispatch = dispatch or self._default_dispatch
+        self.stats = BatchStats()
+        self._queue = None
+        self._task = None
+        self._carry = None  # Item for another model that ended the previous batch
+
+    async def _default_dispatch(self, fn, *args, model=None):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(fn, model=model), *args)
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Fail anything still queued so callers don't hang
+        leftover = [self._carry] if self._carry is not None else []
+        self._carry = None
+        while self._queue is not None and not self._queue.empty():
+            leftover.append(self._queue.get_nowait())
+        for _, fut, _, _, _ in leftover:
+            if not fut.done():
+                fut.set_exception(RuntimeError("Batcher stopped"))
+
+    async def submit(self, features, deadline: float = None, model=None) -> float:
+        """
+        Queues one clip's features and waits for its probability from model
+        (a ServedModel; None means whichever model is current when the batch runs).
+        A clip whose deadline (time.monotonic) passes while queued is dropped
+        before the forward pass with DeadlineExceeded.
+        """
+        if self._task is None:
+            raise RuntimeError("Batcher not started")
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((features, fut, time.perf_counter(), deadline, model))
+        return await fut
+
+    async def _collect(self) -> list:
+        if self._carry is not None:
+            batch, self._carry = [self._carry], None
+        else:
+            batch = [await self._queue.get()]
+        model = batch[0][4]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued without waiting
+            if not self._queue.empty():
+                item = self._queue.get_nowait()
+            else:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if item[4] is not model:
+                # Queued for another model version (a reload happened): it starts the next batch
+                self._carry = item
+                break
+            batch.append(item)
+        return batch
+
+    async def _loop(self):
+        while True:
+            batch = await self._collect()
+            # Callers that went away (cancelled) or ran out of time don't need a forward pass
+            now = time.monotonic()
+            live = []
+            for item in batch:
+                fut, deadline = item[1], item[3]
+                if fut.done():
+                    continue
+                if deadline is not None and now >= deadline:
+                    fut.set_exception(DeadlineExceeded("model"))
+                    continue
+                live.append(item)
+            batch = live
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            self.stats.record(len(batch), [started - enqueued for _, _, enqueued, _, _ in batch])
+            try:
+                probs = await self.dispatch(self.run_batch, [features for features, _, _, _, _ in batch],
+                                            model=batch[0][4])
+            except Exception as e:
+                self.stats.errors += 1
+                for _, fut, _, _, _ in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+
+            for (_, fut, _, _, _), prob in zip(batch, probs):
+                if not fut.done():
+                    fut.set_result(prob)
@@ -0,0 +1,200 @@
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+def audio_digest(audio_bytes: bytes) -> str:
+    """
+    Fast content hash of the decoded audio bytes.
+    SHA-256 runs on the CPU's SHA extensions where available, which beats BLAKE2 on large inputs.
+    """
+    return hashlib.sha256(audio_bytes).hexdigest()[:32]
+
+class ResultCache:
+    """
+    Content-addressed cache of prediction results.
+
+    Tier 1 is an in-process LRU bounded by `max_entries` with a per-entry TTL.
+    Tier 2 (optional) is a SQLite file at `path`, which outlives restarts and
+    is shared by every worker process on the host. A tier-2 hit is promoted
+    into tier 1. Callers include the model version in the key, so a new model
+    never serves stale results.
+
+    Tier 1 and tier 2 have separate locks, so a slow SQLite call (up to the
+    5 s busy timeout under contention) never holds up tier-1 lookups; async
+    callers use aget and put(..., background=True) to keep SQLite off the
+    event loop entirely.
+    """
+    def __init__(self, max_entries: int = 4096, ttl_seconds: float = 3600.0, path: str = None):
+        self.max_entries = max(0, int(max_entries))
+        self.ttl = float(ttl_seconds)
+        self.path = path
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db = None
+        self._writer = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._disk_writes = 0
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache-writer")
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 or self._db is not None
+
+    def _get_memory(self, key: str):
+        """
+        Tier-1 lookup; never touches the disk. Counts a miss only when there is no tier 2 to ask next.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+            if self._db is None:
+                self.misses += 1
+            return None
+
+    def _get_disk(self, key: str):
+        """
+        Tier-2 lookup (blocking SQLite read); a hit is promoted into tier 1.
+        """
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+        with self._lock:
+            if row is not None and row[1] > time.time():
+                value = json.loads(row[0])
+                self._store(key, value, row[1])
+                self.disk_hits += 1
+                return value
+            self.misses += 1
+            return None
+
+    def get(self, key: str):
+        """
+        Returns the cached value or None. Blocks on the disk tier; async code uses aget.
+        """
+        if not self.enabled:
+            return None
+        value = self._get_memory(key)
+        if value is not None or self._db is None:
+            return value
+        return self._get_disk(key)
+
+    async def aget(self, key: str):
+        """
+        Like get, but the disk tier is read in a worker thread so the event loop never waits on SQLite.
+        """
+        if not self.enabled:
+            return None
+        value = self._get_memory(key)
+        if value is not None or self._db is None:
+            return value
+        return await asyncio.to_thread(self._get_disk, key)
+
+    def put(self, key: str, value: dict, background: bool = False):
+        """
+        Stores value in both tiers. With background, the disk write is queued
+        to a single writer thread (write-behind) instead of done inline.
+        """
+        if not self.enabled:
+            return
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store(key, value, expires_at)
+        if self._db is None:
+            return
+        if background:
+            self._writer.submit(self._write_disk, key, json.dumps(value), expires_at)
+        else:
+            self._write_disk(key, json.dumps(value), expires_at)
+
+    def _write_disk(self, key: str, payload: str, expires_at: float):
+        try:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, payload, expires_at)
+                )
+                self._disk_writes += 1
+                # Prune expired rows now and then rather than on every write
+                if self._disk_writes % 256 == 0:
+                    self._db.execute("DELETE FROM results WHERE expires_at <= ?", (time.time(),))
+                self._db.commit()
+        except sqlite3.Error as e:
+            # A lost cache write only costs a recomputation later
+            logger.warning(f"Result cache write failed: {e}")
+
+    def _store(self, key: str, value: dict, expires_at: float):
+        if self.max_entries == 0:
+            return
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def evict_version(self, version: str, background: bool = False):
+        """
+        Drops every entry of a model version (keys start with "<version>:"),
+        e.g. after a hot reload: they can't be served any more, only take up
+        capacity. With background, the disk tier is pruned by the writer thread.
+        """
+        prefix = f"{version}:"
+        with self._lock:
+            stale = [key for key in self._entries if key.startswith(prefix)]
+            for key in stale:
+                del self._entries[key]
+        if self._db is None:
+            return
+        if background:
+            self._writer.submit(self._evict_disk, prefix)
+        else:
+            self._evict_disk(prefix)
+
+    def _evict_disk(self, prefix: str):
+        try:
+            with self._db_lock:
+                # substr, not LIKE: exact and case-sensitive, no wildcards to escape
+                self._db.execute("DELETE FROM results WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+                self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Result cache eviction failed: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "disk_tier": self.path,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+        }
@@ -0,0 +1,92 @@
+import hashlib
+import numpy as np
+from .metrics import CASCADE_DECISIONS
+
+# Band for stage-1 files saved without one
+DEFAULT_BAND = (0.05, 0.95)
+
+def summary_features(features: np.ndarray) -> np.ndarray:
+    """
+    Cheap fixed-size summary of (F, T) or (N, F, T) dB mel features:
+    per-band mean, std and mean absolute frame-to-frame change, plus global
+    level and dynamic range. Returns (D,) or (N, D).
+    """
+    x = np.asarray(features, dtype=np.float32)
+    single = x.ndim == 2
+    if single:
+        x = x[None]
+    delta = np.abs(np.diff(x, axis=2))
+    summary = np.concatenate([
+        x.mean(axis=2),
+        x.std(axis=2),
+        delta.mean(axis=2),
+        x.mean(axis=(1, 2))[:, None],
+        (x.max(axis=(1, 2)) - np.percentile(x, 10, axis=(1, 2)))[:, None]
+    ], axis=1)
+    return summary[0] if single else summary
+
+class Stage1Classifier:
+    """
+    First stage of the cascade: a scikit-learn model over summary_features.
+    Clips it scores outside the (low, high) uncertainty band are decided
+    here; the rest are escalated to the CNN.
+    """
+    def __init__(self, estimator, low: float = DEFAULT_BAND[0], high: float = DEFAULT_BAND[1], version: str = ""):
+        if not 0.0 <= low <= high <= 1.0:
+            raise ValueError(f"Invalid cascade band ({low}, {high})")
+        self.estimator = estimator
+        self.low = low
+        self.high = high
+        self.version = version
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        """
+        AI probability for (F, T) or (N, F, T) features; always returns an (N,) array.
+        """
+        summary = summary_features(features)
+        if summary.ndim == 1:
+            summary = summary[None]
+        return self.estimator.predict_proba(summary)[:, 1]
+
+    def is_confident(self, prob: float) -> bool:
+        return prob <= self.low or prob >= self.high
+
+    @classmethod
+    def load(cls, path: str, low: float = None, high: float = None) -> "Stage1Classifier":
+        """
+        low/high default to the band the classifier was trained and evaluated
+        with (saved by train_stage1.py), so its escalation rate matches the report.
+        """
+        import joblib
+        with open(path, "rb") as f:
+            version = hashlib.blake2b(f.read(), digest_size=4).hexdigest()
+        saved = joblib.load(path)
+        saved_low, saved_high = saved.get("band") or DEFAULT_BAND
+        return cls(saved["estimator"], saved_low if low is None else low, saved_high if high is None else high, version)
+
+def save_stage1(estimator, path: str, **extra):
+    import joblib
+    joblib.dump({"estimator": estimator, **extra}, path)
+
+class CascadeStats:
+    """
+    Counts which stage decided each clip, for the escalation rate in /stats.
+    """
+    def __init__(self):
+        self.stage1 = 0
+        self.escalated = 0
+
+    def record(self, escalated: bool, count: int = 1):
+        if escalated:
+            self.escalated += count
+        else:
+            self.stage1 += count
+        CASCADE_DECISIONS.inc(count, stage="cnn" if escalated else "stage1")
+
+    def snapshot(self) -> dict:
+        total = self.stage1 + self.escalated
+        return {
+            "decided_by_stage1": self.stage1,
+            "escalated": self.escalated,
+            "escalation_rate": round(self.escalated / total, 4) if total else 0.0
+        }
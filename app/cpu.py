@@ -0,0 +1,122 @@
+import os
+import hashlib
+import logging
+import tempfile
+import multiprocessing
+
+logger = logging.getLogger(__name__)
+
+def _supervisor_workers():
+    """
+    The --workers value of the uvicorn supervisor that spawned this process:
+    1 if it was started without the option, None if its command line can't
+    be read (no /proc) or this process wasn't spawned by one.
+    """
+    if multiprocessing.parent_process() is None:
+        return 1  # Single-process server: nothing else shares the cores
+    try:
+        with open(f"/proc/{os.getppid()}/cmdline", "rb") as f:
+            args = f.read().decode(errors="replace").split("\0")
+    except OSError:
+        return None
+    return workers_option(args)
+
+def workers_option(args: list) -> int:
+    """
+    The value of --workers N / --workers=N in a command line (1 without it).
+    """
+    for i, arg in enumerate(args):
+        if arg == "--workers" and i + 1 < len(args) and args[i + 1].isdigit():
+            return int(args[i + 1])
+        if arg.startswith("--workers=") and arg[len("--workers="):].isdigit():
+            return int(arg[len("--workers="):])
+    return 1
+
+# Number of API worker processes sharing this machine (uvicorn reads the same variable for --workers).
+# Unset, it is taken from the supervisor's --workers option; None means it couldn't be (see configure_worker_cpu).
+_DETECTED_WORKERS = None if os.getenv("WEB_CONCURRENCY") else _supervisor_workers()
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY") or _DETECTED_WORKERS or 1)
+# Intra-op threads per API worker; defaults to this worker's share of the cores
+TORCH_THREADS = int(os.getenv("TORCH_THREADS", "0"))
+# Pin each API worker to its own slice of cores
+PIN_WORKER_CORES = os.getenv("PIN_WORKER_CORES", "0") == "1"
+SLOT_LOCK_DIR = os.getenv("WORKER_SLOT_DIR", tempfile.gettempdir())
+# Distinguishes this deployment's slot files from other services on the host; defaults to a
+# hash of the model directory and the supervisor's pid (shared by sibling workers only)
+_MODEL_DIR = os.path.dirname(os.path.abspath(os.getenv("MODEL_PATH", os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "model.pth"))))
+WORKER_INSTANCE_ID = os.getenv("WORKER_INSTANCE_ID") or \
+    hashlib.sha1(f"{_MODEL_DIR}:{os.getppid()}".encode()).hexdigest()[:12]
+
+_slot_file = None  # Held open (and locked) for the lifetime of the process
+_info = {}
+
+def available_cores() -> list:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def worker_core_share() -> int:
+    """
+    Cores available to each of the WEB_CONCURRENCY API workers (at least 1).
+    """
+    return max(1, len(available_cores()) // max(1, WEB_CONCURRENCY))
+
+def claim_worker_slot(slots: int):
+    """
+    Gives this process a stable index in [0, slots) among sibling API workers,
+    which uvicorn doesn't provide. Each worker takes an exclusive lock on the
+    first free slot file; the lock is released by the OS when the process exits,
+    so a restarted worker takes over its predecessor's slot.
+    Returns None if no slot is free or locking isn't supported.
+    """
+    global _slot_file
+    try:
+        import fcntl
+    except ImportError:
+        return None
+    for slot in range(slots):
+        path = os.path.join(SLOT_LOCK_DIR, f"voice-detector-{WORKER_INSTANCE_ID}-worker-{slot}.lock")
+        f = open(path, "a")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            continue
+        _slot_file = f
+        return slot
+    return None
+
+def configure_worker_cpu() -> dict:
+    """
+    Splits the cores between WEB_CONCURRENCY API workers so they don't
+    oversubscribe the machine: sets torch's intra-op threads to this worker's
+    share and, with PIN_WORKER_CORES=1, pins the process (and any pool
+    processes it spawns later) to its own slice of cores.
+    """
+    import torch
+    global _info
+    if not os.getenv("WEB_CONCURRENCY") and _DETECTED_WORKERS is None:
+        logger.warning("WEB_CONCURRENCY is not set and the number of uvicorn workers couldn't be detected; "
+                       "assuming 1, so every worker uses all cores. Set WEB_CONCURRENCY to the --workers value.")
+    cores = available_cores()
+    workers = max(1, WEB_CONCURRENCY)
+    slot = claim_worker_slot(workers) if workers > 1 else 0
+    share = worker_core_share()
+
+    pinned = None
+    if PIN_WORKER_CORES and slot is not None and hasattr(os, "sched_setaffinity"):
+        # Trailing cores go to the last worker rather than being left idle
+        start = (slot * share) % len(cores)
+        end = len(cores) if slot == workers - 1 else start + share
+        pinned = cores[start:end] or cores
+        os.sched_setaffinity(0, pinned)
+
+    threads = TORCH_THREADS or (len(pinned) if pinned else share)
+    torch.set_num_threads(threads)
+    _info = {"slot": slot, "workers": workers, "torch_threads": threads, "pinned_cores": pinned}
+    logger.info("CPU configured.", extra={"fields": _info})
+    return _info
+
+def cpu_info() -> dict:
+    return dict(_info)
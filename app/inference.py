@@ -1,32 +1,428 @@
 import torch
 import numpy as np
 import base64
-from .model import VoiceDetectorCNN
-from .audio_utils import preprocess_audio, extract_features, feature_to_tensor
+import hashlib
+import os
+import logging
+from .model import VoiceDetectorCNN, load_checkpoint
+from .audio_utils import preprocess_audio, extract_features, feature_to_tensor, load_waveform, window_features, SAMPLE_RATE, DURATION
+from .pitch import prosody_metrics
+from .quantization import quantize_model, QUANTIZE_MODES, DEFAULT_DATA_DIR
+from .backends import build_runner, warmup, MODEL_BACKENDS, INPUT_SHAPE
+from .cascade import Stage1Classifier, CascadeStats
+from .cache import ResultCache, audio_digest
+from .metrics import stage_timer
+
+logger = logging.getLogger(__name__)
 
 # Load model
-MODEL_PATH = r"c:\Users\Alex\Desktop\Antigravity\AIVoiceDetection\model.pth"
+MODEL_PATH = os.getenv("MODEL_PATH", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "model.pth"))
 device = torch.device("cpu") # CPU inference requirement
-model = VoiceDetectorCNN().to(device)
+# Memory-map the weights file: workers serving the same file share its pages instead of holding private copies
+MODEL_MMAP = os.getenv("MODEL_MMAP", "1") == "1"
+
+# Optional INT8 inference: "none", "dynamic" (Linear layers only) or "static" (calibrated on samples from data/)
+QUANTIZE_MODE = os.getenv("QUANTIZE_MODE", "none").lower()
+QUANTIZE_CALIBRATION_DIR = os.getenv("QUANTIZE_CALIBRATION_DIR", DEFAULT_DATA_DIR)
+QUANTIZE_CALIBRATION_SAMPLES = int(os.getenv("QUANTIZE_CALIBRATION_SAMPLES", "32"))
+
+# Execution backend for the forward pass: "eager", "torchscript", "compile" or "onnx" (needs onnxruntime)
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "eager").lower()
+ONNX_MODEL_PATH = os.getenv("ONNX_MODEL_PATH", os.path.splitext(MODEL_PATH)[0] + ".onnx")
+WARMUP_ITERATIONS = int(os.getenv("WARMUP_ITERATIONS", "3"))
+
+# Optional cascade: a cheap stage-1 classifier decides clips it scores outside
+# its band; only the clips in between reach the CNN. The band saved with the
+# classifier is used unless CASCADE_LOW / CASCADE_HIGH override it.
+CASCADE_MODEL_PATH = os.getenv("CASCADE_MODEL_PATH") or None
+CASCADE_LOW = float(os.getenv("CASCADE_LOW")) if os.getenv("CASCADE_LOW") else None
+CASCADE_HIGH = float(os.getenv("CASCADE_HIGH")) if os.getenv("CASCADE_HIGH") else None
+cascade_stats = CascadeStats()
+
+# Whole-clip analysis: window hop and caps on windows and decoded audio so cost stays predictable
+ANALYSIS_HOP_SECONDS = float(os.getenv("ANALYSIS_HOP_SECONDS", "2.0"))
+ANALYSIS_MAX_WINDOWS = int(os.getenv("ANALYSIS_MAX_WINDOWS", "16"))
+ANALYSIS_MAX_SECONDS = float(os.getenv("ANALYSIS_MAX_SECONDS", "600"))
+ANALYSIS_MODES = ("first", "full")
+
+# Result cache for repeated submissions (RESULT_CACHE_SIZE=0 disables the in-process tier)
+result_cache = ResultCache(
+    max_entries=int(os.getenv("RESULT_CACHE_SIZE", "4096")),
+    ttl_seconds=float(os.getenv("RESULT_CACHE_TTL", "3600")),
+    path=os.getenv("RESULT_CACHE_PATH") or None
+)
+
+class ServedModel:
+    """
+    One loaded model version and everything derived from it: the (possibly
+    quantized) network, the backend runner wrapping it, the stage-1 classifier
+    and the version string used in cache keys and responses.
+
+    The `served` global holds the current one and a reload replaces it in a
+    single assignment. Requests take a snapshot when they start and pass it
+    (as `model=`) to every pipeline stage, so they finish on the version they
+    started on and report that version.
+    """
+    def __init__(self, model, runner, backend: str, arch: str, version: str, stage1=None, path: str = None):
+        self.model = model
+        self.runner = runner
+        self.backend = backend
+        self.arch = arch
+        self.version = version
+        self.stage1 = stage1
+        self.path = path
+
+    def info(self) -> dict:
+        return {"model_arch": self.arch, "model_backend": self.backend, "quantization": QUANTIZE_MODE,
+                "model_version": self.version}
+
+served = None  # Built by load_model, so importing this module doesn't allocate a throwaway ResNet
 
-def load_model():
+def build_served_model(path: str = None, strict: bool = False) -> ServedModel:
+    """
+    Loads a checkpoint and applies QUANTIZE_MODE, MODEL_BACKEND and the cascade.
+    Without strict, a missing or unreadable file falls back to random weights
+    (startup keeps serving); with strict the error is raised (a reload keeps
+    the current model).
+    """
+    path = path or MODEL_PATH
+    model, version, arch = None, "untrained", "resnet18"
+    try:
+        if os.path.exists(path):
+            version = file_digest(path)
+            # The checkpoint records its architecture (plain state_dicts are ResNet18)
+            model, arch = load_checkpoint(path, map_location=device, mmap=MODEL_MMAP)
+            logger.info("Model loaded successfully.",
+                        extra={"fields": {"model_version": version, "arch": arch, "mmap": MODEL_MMAP, "path": path}})
+        elif strict:
+            raise FileNotFoundError(f"Model file not found at {path}")
+        else:
+            logger.warning(f"Model file not found at {path}. Using random weights.")
+    except Exception as e:
+        if strict:
+            raise
+        logger.error(f"Error loading model: {e}")
+    if model is None:
+        model = VoiceDetectorCNN().to(device).eval()
+    model, version = quantize_loaded_model(model, version)
+    runner, backend = select_backend(model)
+    stage1, version = load_cascade(version)
+    return ServedModel(model, runner, backend, arch, version, stage1, path)
+
+def load_model(path: str = None):
     """
     Loads the model weights. Should be called on startup.
     """
-    global model
+    global served
+    served = build_served_model(path)
+
+def prepare_model(path: str = None, batch_sizes=(1,)) -> ServedModel:
+    """
+    First half of a hot reload: loads a checkpoint next to the one being
+    served and warms it up (skipped if batch_sizes is empty), without serving
+    it yet. Raises if the checkpoint can't be loaded. Blocking; run it off
+    the event loop.
+    """
+    candidate = build_served_model(path, strict=True)
+    if batch_sizes:
+        warmup_model(batch_sizes, target=candidate)
+    return candidate
+
+def publish_model(candidate: ServedModel) -> ServedModel:
+    """
+    Second half of a hot reload: swaps candidate in with one assignment.
+    Returns the model it replaced, which in-flight calls may still be using.
+    """
+    global served
+    previous, served = served, candidate
+    logger.info("Model swapped.", extra={"fields": {
+        "previous_version": previous.version if previous else None, "model_version": candidate.version}})
+    return previous
+
+def file_digest(path: str) -> str:
+    """
+    Short content hash of a file, read in chunks (the weights can be large).
+    """
+    digest = hashlib.blake2b(digest_size=6)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_cascade(version: str):
+    """
+    Loads the stage-1 classifier if CASCADE_MODEL_PATH is set. Its hash joins
+    the model version since cascaded results differ from CNN-only ones.
+    Returns (stage1 or None, version).
+    """
+    if not CASCADE_MODEL_PATH:
+        return None, version
+    if not os.path.exists(CASCADE_MODEL_PATH):
+        logger.warning(f"Cascade model not found at {CASCADE_MODEL_PATH}. Every clip goes to the CNN.")
+        return None, version
+    try:
+        stage1 = Stage1Classifier.load(CASCADE_MODEL_PATH, CASCADE_LOW, CASCADE_HIGH)
+        logger.info("Cascade stage 1 loaded.", extra={"fields": {"band": [stage1.low, stage1.high]}})
+        # The band decides which clips skip the CNN, so it is part of the version too
+        return stage1, f"{version}+c{stage1.version}-{stage1.low}-{stage1.high}"
+    except Exception as e:
+        logger.error(f"Error loading cascade model, every clip goes to the CNN: {e}")
+        return None, version
+
+def quantize_loaded_model(model, version: str):
+    """
+    Swaps in the INT8 model when QUANTIZE_MODE asks for it. Falls back to
+    float32 (with an error log) if quantization or calibration fails.
+    Returns (model, version).
+    """
+    if QUANTIZE_MODE == "none":
+        return model, version
+    if QUANTIZE_MODE not in QUANTIZE_MODES:
+        logger.error(f"Unknown QUANTIZE_MODE '{QUANTIZE_MODE}'. Expected one of {QUANTIZE_MODES}; serving float32.")
+        return model, version
+    try:
+        model = quantize_model(model, QUANTIZE_MODE, QUANTIZE_CALIBRATION_DIR, QUANTIZE_CALIBRATION_SAMPLES)
+        # Quantized scores differ slightly, so they get their own cache namespace
+        version = f"{version}-int8-{QUANTIZE_MODE}"
+        logger.info("Model quantized.", extra={"fields": {"mode": QUANTIZE_MODE, "model_version": version}})
+    except Exception as e:
+        logger.error(f"Quantization failed, serving float32: {e}")
+    return model, version
+
+def select_backend(model):
+    """
+    Wraps the model in MODEL_BACKEND. Falls back to eager (with an error
+    log) if the backend can't be built, e.g. onnxruntime is missing.
+    Returns (runner, backend name).
+    """
+    if MODEL_BACKEND == "eager":
+        return model, "eager"
+    if MODEL_BACKEND not in MODEL_BACKENDS:
+        logger.error(f"Unknown MODEL_BACKEND '{MODEL_BACKEND}'. Expected one of {MODEL_BACKENDS}; using eager.")
+        return model, "eager"
+    if MODEL_BACKEND == "onnx" and QUANTIZE_MODE != "none":
+        logger.warning("QUANTIZE_MODE does not apply to the onnx backend; running the exported float graph.")
     try:
-        if hasattr(torch, 'load'):
-            # simple check if path exists
-            import os
-            if os.path.exists(MODEL_PATH):
-                model.load_state_dict(torch.load(MODEL_PATH, map_location=device))
-                model.eval()
-                print("Model loaded successfully.")
-            else:
-                print(f"Warning: Model file not found at {MODEL_PATH}. Using random weights.")
-                model.eval()
+        runner = build_runner(model, MODEL_BACKEND, ONNX_MODEL_PATH)
+        logger.info("Model backend ready.", extra={"fields": {"backend": MODEL_BACKEND}})
+        return runner, MODEL_BACKEND
     except Exception as e:
-        print(f"Error loading model: {e}")
+        logger.error(f"Could not build the {MODEL_BACKEND} backend, using eager: {e}")
+        return model, "eager"
+
+def warmup_model(batch_sizes=(1,), iterations: int = None, target: ServedModel = None):
+    """
+    Pushes dummy (N, 1, 128, 126) batches through the active backend (or
+    target's, before it is swapped in) so the first real requests don't pay
+    for lazy initialization or compilation.
+    """
+    target = target or served
+    iterations = WARMUP_ITERATIONS if iterations is None else iterations
+    if iterations <= 0:
+        return
+    with stage_timer("warmup"):
+        warmup(target.runner, batch_sizes, iterations)
+        if target.stage1 is not None:
+            target.stage1.predict_proba(np.zeros((1,) + tuple(INPUT_SHAPE[2:]), dtype=np.float32))
+
+def warmup_pipeline():
+    """
+    Runs a synthetic clip through decode, resample, features, pitch and
+    stage 1, so lazy initialization there (FFT plans, filterbank, resampler)
+    also happens before the first request.
+    """
+    import io
+    import soundfile as sf
+    sr = 44100  # Not SAMPLE_RATE, so the resampler is exercised too
+    t = np.arange(int(sr * DURATION)) / sr
+    y = (0.5 * np.sin(2 * np.pi * 140 * t) + 0.01 * np.random.default_rng(0).standard_normal(len(t))).astype(np.float32)
+    buffer = io.BytesIO()
+    sf.write(buffer, y, sr, format="WAV")
+    with stage_timer("warmup"):
+        prepare_clip(buffer.getvalue())
+
+def decode_base64_audio(base64_audio: str) -> bytes:
+    """
+    Decodes a base64 string into raw audio bytes.
+    """
+    try:
+        with stage_timer("base64_decode"):
+            audio_bytes = base64.b64decode(base64_audio)
+    except Exception:
+        raise ValueError("Invalid Base64 string")
+
+    if not audio_bytes:
+        raise ValueError("Empty audio content")
+    return audio_bytes
+
+def prepare_clip(audio_bytes: bytes, model: ServedModel = None) -> dict:
+    """
+    CPU half of the pipeline: Bytes -> Preprocess -> Feature.
+    Returns a dict with the mel features and the explainability metrics,
+    ready to be handed to run_batch (possibly together with other clips).
+    Stage-1 scores come from model (default: the served model).
+    """
+    if not audio_bytes:
+        raise ValueError("Empty audio content")
+
+    y = preprocess_audio(audio_bytes)
+    features = extract_features(y)
+
+    # Explainability
+    # Spectral smoothness: std dev of mel bands
+    # Pitch variance / voiced ratio: from a YIN pitch track of the same waveform
+    spec_smoothness = float(np.std(features))
+    with stage_timer("pitch"):
+        prosody = prosody_metrics(y)
+    prepared = {
+        "features": features,
+        "explainability": {
+            "spectral_smoothness": round(spec_smoothness, 4),
+            **prosody
+        }
+    }
+    add_stage1_probs(prepared, model)
+    return prepared
+
+def prepare_windows(audio_bytes: bytes, hop_seconds: float = None, max_windows: int = None,
+                    model: ServedModel = None) -> dict:
+    """
+    CPU half of the whole-clip analysis: decodes up to ANALYSIS_MAX_SECONDS
+    of audio and featurizes DURATION-second windows hop_seconds apart (spread
+    further apart when the clip needs more than max_windows) in one batch.
+    Returns a dict with (N, F, T) features, the window start times and the
+    explainability metrics (over the audio the windows cover).
+    """
+    if not audio_bytes:
+        raise ValueError("Empty audio content")
+    hop_seconds = hop_seconds or ANALYSIS_HOP_SECONDS
+    max_windows = max_windows or ANALYSIS_MAX_WINDOWS
+
+    try:
+        y = load_waveform(audio_bytes, ANALYSIS_MAX_SECONDS)
+    except Exception as e:
+        logger.warning(f"Could not decode audio: {e!r}")
+        raise ValueError("Unsupported or corrupt audio") from e
+    features, starts = window_features(y, int(round(hop_seconds * SAMPLE_RATE)), max_windows)
+
+    spec_smoothness = float(np.mean(np.std(features, axis=(1, 2))))
+    # Pitch only over the windowed audio (each sample once), so its cost follows the window cap
+    covered, end = [], 0
+    for start in (int(round(t * SAMPLE_RATE)) for t in starts):
+        covered.append(y[max(start, end):start + SAMPLE_RATE * DURATION])
+        end = start + SAMPLE_RATE * DURATION
+    with stage_timer("pitch"):
+        prosody = prosody_metrics(np.concatenate(covered))
+    prepared = {
+        "features": features,
+        "starts": starts,
+        "explainability": {
+            "spectral_smoothness": round(spec_smoothness, 4),
+            **prosody
+        }
+    }
+    add_stage1_probs(prepared, model)
+    return prepared
+
+def add_stage1_probs(prepared: dict, model: ServedModel = None):
+    """
+    Scores the prepared clip (or windows) with model's (default: the served
+    model's) stage-1 classifier, if it has one.
+    """
+    model = model or served
+    stage1 = model.stage1 if model is not None else None
+    if stage1 is None:
+        return
+    with stage_timer("stage1"):
+        prepared["stage1_probs"] = stage1.predict_proba(prepared["features"]).tolist()
+
+def cascade_split(prepared: dict, model: ServedModel = None):
+    """
+    Applies the uncertainty band of model's (default: the served model's)
+    stage-1 classifier to the stage-1 scores. Returns (probs, escalate):
+    probs holds the stage-1 probability for decided items and None for the
+    indices listed in escalate, which still need the CNN.
+    """
+    model = model or served
+    stage1 = model.stage1 if model is not None else None
+    stage1_probs = prepared.get("stage1_probs")
+    if stage1_probs is None or stage1 is None:
+        n = 1 if np.ndim(prepared["features"]) == 2 else len(prepared["features"])
+        return [None] * n, list(range(n))
+    probs, escalate = [], []
+    for i, prob in enumerate(stage1_probs):
+        if stage1.is_confident(prob):
+            probs.append(prob)
+        else:
+            probs.append(None)
+            escalate.append(i)
+    if len(escalate) < len(probs):
+        cascade_stats.record(False, len(probs) - len(escalate))
+    if escalate:
+        cascade_stats.record(True, len(escalate))
+    return probs, escalate
+
+def run_batch(features_list, model: ServedModel = None) -> list:
+    """
+    Model half of the pipeline: stacks N feature arrays (a list, or an
+    (N, F, T) array) into a single (N, 1, F, T) tensor, runs one forward
+    pass on model (default: the served model) and returns N probabilities.
+    """
+    current = model or served
+    if current is None:
+        raise RuntimeError("Model not loaded, call load_model() first")
+    if isinstance(features_list, np.ndarray):
+        input_tensor = torch.from_numpy(features_list).float().unsqueeze(1).to(device)
+    else:
+        input_tensor = torch.stack([feature_to_tensor(f) for f in features_list]).to(device)
+    with stage_timer("forward"), torch.no_grad():
+        logits = current.runner(input_tensor)
+        probs = torch.sigmoid(logits).view(-1).tolist()
+    return probs
+
+def build_result(prob: float, explainability: dict) -> dict:
+    """
+    Turns the model probability into the classification response.
+    """
+    # Classification
+    label = "AI_GENERATED" if prob > 0.5 else "HUMAN"
+    # Confidence: if AI (prob > 0.5), conf = prob. If Human (prob <= 0.5), conf = 1 - prob.
+    confidence = prob if label == "AI_GENERATED" else 1.0 - prob
+
+    return {
+        "classification": label,
+        "confidence": round(confidence, 4),
+        "explainability": explainability
+    }
+
+def build_analysis(probs: list, starts: list, explainability: dict) -> dict:
+    """
+    Aggregates per-window probabilities. The clip is as synthetic as its most
+    synthetic window, so a human intro can't mask a generated body.
+    """
+    result = build_result(max(probs), explainability)
+    result["segments"] = [
+        {
+            "start": round(start, 3),
+            "end": round(start + DURATION, 3),
+            **{k: v for k, v in build_result(prob, None).items() if k != "explainability"}
+        }
+        for start, prob in zip(starts, probs)
+    ]
+    result["aggregate"] = {
+        "windows": len(probs),
+        "max_ai_probability": round(max(probs), 4),
+        "mean_ai_probability": round(float(np.mean(probs)), 4),
+        "ai_windows": sum(1 for p in probs if p > 0.5)
+    }
+    return result
+
+def cache_key(audio_bytes: bytes, mode: str = "first", version: str = None, hop_seconds: float = None,
+              max_windows: int = None) -> str:
+    if mode == "full":
+        # Whole-clip results depend on the window layout too
+        mode = f"full-{hop_seconds or ANALYSIS_HOP_SECONDS}-{max_windows or ANALYSIS_MAX_WINDOWS}-{ANALYSIS_MAX_SECONDS}"
+    return f"{version or served.version}:{mode}:{audio_digest(audio_bytes)}"
 
 def predict_voice(base64_audio: str):
     """
@@ -34,47 +430,48 @@ def predict_voice(base64_audio: str):
     Returns: classification (str), confidence (float), debug_metrics (dict)
     """
     try:
-        # Decode base64
-        try:
-            audio_bytes = base64.b64decode(base64_audio)
-        except Exception:
-            raise ValueError("Invalid Base64 string")
-
-        if not audio_bytes:
-            raise ValueError("Empty audio content")
-
-        # Preprocess
-        y = preprocess_audio(audio_bytes)
-        
-        # Features
-        features = extract_features(y)
-        input_tensor = feature_to_tensor(features).to(device).unsqueeze(0) # Add batch dim: (1, 1, F, T)
-        
-        # Inference
-        with torch.no_grad():
-            logits = model(input_tensor)
-            prob = torch.sigmoid(logits).item()
-            
-        # Classification
-        label = "AI_GENERATED" if prob > 0.5 else "HUMAN"
-        # Confidence: if AI (prob > 0.5), conf = prob. If Human (prob <= 0.5), conf = 1 - prob.
-        confidence = prob if label == "AI_GENERATED" else 1.0 - prob
-        
-        # Explainability (Simple metrics computed from features)
-        # Spectral smoothness: std dev of mel bands
-        # Pitch variance: approximate from simple spectral centroid variance (proxy)
-        spec_smoothness = float(np.std(features))
-        pitch_variance = 0.0 # Placeholder as pitch extraction requires more complex logic/libraries not in simplified utils
-        
-        return {
-            "classification": label,
-            "confidence": round(confidence, 4),
-            "explainability": {
-                "spectral_smoothness": round(spec_smoothness, 4),
-                "pitch_variance": 0.0
-            }
-        }
-        
+        audio_bytes = decode_base64_audio(base64_audio)
+        current = served
+        key = cache_key(audio_bytes, version=current.version)
+        cached = result_cache.get(key)
+        if cached is not None:
+            return cached
+
+        prepared = prepare_clip(audio_bytes, current)
+        probs, escalate = cascade_split(prepared, current)
+        prob = run_batch([prepared["features"]], current)[0] if escalate else probs[0]
+        result = build_result(prob, prepared["explainability"])
+        result["model_version"] = current.version
+        result_cache.put(key, result)
+        return result
+
+    except Exception as e:
+        logger.error(f"Inference error: {e}")
+        raise e
+
+def analyze_voice(base64_audio: str, hop_seconds: float = None, max_windows: int = None):
+    """
+    Whole-clip pipeline: Base64 -> Bytes -> Windows -> Batched Features -> One Model Call -> Aggregate
+    Returns the predict_voice result plus per-segment scores and aggregate stats.
+    """
+    try:
+        audio_bytes = decode_base64_audio(base64_audio)
+        current = served
+        key = cache_key(audio_bytes, "full", current.version, hop_seconds, max_windows)
+        cached = result_cache.get(key)
+        if cached is not None:
+            return cached
+
+        prepared = prepare_windows(audio_bytes, hop_seconds, max_windows, current)
+        probs, escalate = cascade_split(prepared, current)
+        if escalate:
+            for i, prob in zip(escalate, run_batch(prepared["features"][escalate], current)):
+                probs[i] = prob
+        result = build_analysis(probs, prepared["starts"], prepared["explainability"])
+        result["model_version"] = current.version
+        result_cache.put(key, result)
+        return result
+
     except Exception as e:
-        print(f"Inference error: {e}")
+        logger.error(f"Inference error: {e}")
         raise e
@@ -0,0 +1,50 @@
+import json
+import logging
+import os
+import random
+import time
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Fraction of per-request log events that are emitted (warnings/errors are never sampled)
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: timestamp, level, logger, message plus any
+    structured fields passed via extra={"fields": {...}}.
+    """
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        payload.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+def configure_logging():
+    """
+    Installs the JSON handler on the "app" logger tree. Safe to call more than once.
+    """
+    logger = logging.getLogger("app")
+    if not any(isinstance(h.formatter, JsonFormatter) for h in logger.handlers):
+        handler = logging.StreamHandler()
+        handler.setFormatter(JsonFormatter())
+        logger.addHandler(handler)
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+
+def log_event(logger: logging.Logger, level: int, message: str, sampled: bool = False, **fields):
+    """
+    Logs a structured event. Only the given fields are serialized, so callers
+    decide exactly what leaves the process (never the audio payload).
+    With sampled=True only LOG_SAMPLE_RATE of the events are emitted.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    if sampled and random.random() >= LOG_SAMPLE_RATE:
+        return
+    logger.log(level, message, extra={"fields": fields})
@@ -1,32 +1,110 @@
-from fastapi import FastAPI, HTTPException, Header, Security, Depends
+from fastapi import FastAPI, HTTPException, Header, Security, Depends, Request, WebSocket, WebSocketDisconnect
+from fastapi.exceptions import RequestValidationError
+from starlette.datastructures import UploadFile
 from fastapi.security.api_key import APIKeyHeader
-from pydantic import BaseModel
-from contextlib import asynccontextmanager
+from fastapi.responses import StreamingResponse, PlainTextResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, ValidationError
+from contextlib import asynccontextmanager, contextmanager
+import asyncio
+import json
+import logging
+import time
 import os
 import sys
+import numpy as np
 from dotenv import load_dotenv
 
 load_dotenv()
 
 # Ensure app can import modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from app.inference import load_model, predict_voice
+from app import inference
+from app.inference import (load_model, prepare_model, publish_model, warmup_model, warmup_pipeline, decode_base64_audio, prepare_clip, prepare_windows, run_batch,
+                           build_result, build_analysis, cascade_split, cache_key, result_cache, ANALYSIS_MODES)
+from app.batching import MicroBatcher
+from app.workers import InferencePool
+from app.streaming import StreamSession
+from app.reload import ModelWatcher
+from app.audio_utils import SAMPLE_RATE, DURATION
+from app.logs import configure_logging, log_event
+from app.cpu import configure_worker_cpu, cpu_info, worker_core_share
+from app.admission import AdmissionController, Overloaded, DeadlineExceeded, check_deadline
+from app import metrics
+
+configure_logging()
+logger = logging.getLogger("app.main")
 
 # Configuration
 API_KEY_NAME = "x-api-key"
 API_KEY = os.getenv("API_KEY", "secret-key-123") # Default for demo
+# Key for the /admin endpoints; unset disables them
+ADMIN_API_KEY = os.getenv("ADMIN_API_KEY") or None
+
+# Micro-batching: concurrent requests share one forward pass
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "5"))
+
+# Max clips accepted by one /detect-voice/batch call
+BATCH_MAX_CLIPS = int(os.getenv("BATCH_MAX_CLIPS", "500"))
+
+# Execution backend for decode / features / forward pass ("thread" or "process")
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "thread")
+# Default: this API worker's share of the cores, so WEB_CONCURRENCY workers' pools don't oversubscribe the machine
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(worker_core_share())))
+INFERENCE_QUEUE_SIZE = int(os.getenv("INFERENCE_QUEUE_SIZE", "64"))
+
+# Admission control: requests (and each clip of a batch) beyond the
+# concurrency limit wait in a bounded queue; beyond that they get a fast 503.
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", str(max(BATCH_MAX_SIZE, 2 * INFERENCE_WORKERS))))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+# Clips of one batch call admitted or waiting for admission at once, so a large
+# batch takes turns with single-clip traffic instead of filling the queue
+BATCH_CLIP_CONCURRENCY = int(os.getenv("BATCH_CLIP_CONCURRENCY", str(max(1, ADMISSION_MAX_CONCURRENCY // 2))))
+# Optional per-request time budget in milliseconds
+DEADLINE_HEADER = "X-Request-Deadline-Ms"
+
+# Hot reload: poll MODEL_PATH every MODEL_WATCH_INTERVAL seconds (0 disables the watcher).
+# Checkpoints given to /admin/reload-model must live next to MODEL_PATH.
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "0"))
+MODEL_DIR = os.path.dirname(os.path.realpath(inference.MODEL_PATH))
+
+admission = AdmissionController(ADMISSION_MAX_CONCURRENCY, ADMISSION_MAX_QUEUE, retry_after=ADMISSION_RETRY_AFTER)
+pool = InferencePool(INFERENCE_BACKEND, workers=INFERENCE_WORKERS, queue_size=INFERENCE_QUEUE_SIZE)
+batcher = MicroBatcher(run_batch, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS, dispatch=pool.run)
+# Batch sizes warmed up at startup and before a reloaded model is swapped in
+WARMUP_BATCH_SIZES = tuple(sorted({1, BATCH_MAX_SIZE}))
+reload_lock = asyncio.Lock()
 
 api_key_header = APIKeyHeader(name=API_KEY_NAME, auto_error=False)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Load model on startup
+    # Take this worker's share of the cores before torch spins up its thread pools
+    configure_worker_cpu()
+    # Load model on startup, then warm it up so the first requests run at steady-state speed
     load_model()
+    if pool.backend == "thread":
+        warmup_model(WARMUP_BATCH_SIZES)
+        warmup_pipeline()
+    pool.start(WARMUP_BATCH_SIZES, model=inference.served)
+    await pool.warmup()
+    await batcher.start()
+    watcher = None
+    if MODEL_WATCH_INTERVAL > 0:
+        watcher = ModelWatcher(inference.MODEL_PATH, MODEL_WATCH_INTERVAL, lambda path: swap_model(path, "watcher"))
+        await watcher.start()
     yield
+    # Graceful shutdown: stop batching, then let the workers drain
+    if watcher is not None:
+        await watcher.stop()
+    await batcher.stop()
+    await pool.shutdown()
 
 app = FastAPI(title="AI Voice Detector API", lifespan=lifespan)
 
-from typing import Optional
+from typing import Optional, List
 from pydantic import BaseModel, Field
 
 class AudioRequest(BaseModel):
@@ -45,84 +123,505 @@ class AudioRequest(BaseModel):
     audio_format: Optional[str] = Field(None, alias="Audio Format")
     audio_format_camel: Optional[str] = Field(None, alias="audioFormat")  # camelCase version
 
+    # "first" scores the first DURATION seconds, "full" scores sliding windows over the whole clip
+    analysis: Optional[str] = None
+    analysis_mode: Optional[str] = Field(None, alias="analysisMode")
+
     class Config:
         allow_population_by_field_name = True
 
-# Auth dependency
-async def get_api_key(
-    api_key_header_val: str = Security(api_key_header),
-    auth_header_val: str = Header(None, alias="Authorization")
-):
+class BatchClip(AudioRequest):
+    id: Optional[str] = None
+
+class BatchRequest(BaseModel):
+    clips: List[BatchClip]
+    language: Optional[str] = Field(None, alias="Language")  # Default for clips without one
+
+    class Config:
+        allow_population_by_field_name = True
+
+def get_base64_field(request: AudioRequest) -> Optional[str]:
+    # Support various keys (Robustness for the tester)
+    return (request.audio_base64_format or request.audio_base64 or
+            request.audio_base64_camel or request.audio_base64_exact or
+            request.audio or request.base64 or request.audio_data or
+            request.audioData or request.file)
+
+def clean_base64(b64_data: str) -> str:
+    # Clean Base64 (Remove dataURI prefix if present)
+    if "," in b64_data[:100]:
+        b64_data = b64_data.split(",", 1)[1]
+
+    # Remove newlines/spaces
+    return b64_data.replace("\n", "").replace("\r", "").replace(" ", "")
+
+def check_api_key(api_key_header_val: Optional[str], auth_header_val: Optional[str], expected: str = None) -> Optional[str]:
+    """
+    Returns the accepted key if either header carries the expected key (API_KEY by default), else None.
+    """
+    expected = expected or API_KEY
     # Check x-api-key
-    if api_key_header_val == API_KEY:
+    if api_key_header_val == expected:
         return api_key_header_val
-        
+
     # Check Bearer token
     if auth_header_val and auth_header_val.startswith("Bearer "):
         token = auth_header_val.split(" ")[1]
-        if token == API_KEY:
+        if token == expected:
             return token
-            
+    return None
+
+# Auth dependency
+async def get_api_key(
+    api_key_header_val: str = Security(api_key_header),
+    auth_header_val: str = Header(None, alias="Authorization")
+):
+    key = check_api_key(api_key_header_val, auth_header_val)
+    if key is not None:
+        return key
+
     raise HTTPException(
         status_code=401,
         detail="Invalid or missing API Key"
     )
 
-@app.post("/detect-voice")
-async def detect_voice(request: AudioRequest, api_key: str = Depends(get_api_key)):
+async def get_admin_key(
+    api_key_header_val: str = Security(api_key_header),
+    auth_header_val: str = Header(None, alias="Authorization")
+):
+    if ADMIN_API_KEY is None:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled. Set ADMIN_API_KEY to enable them")
+    key = check_api_key(api_key_header_val, auth_header_val, ADMIN_API_KEY)
+    if key is not None:
+        return key
+
+    raise HTTPException(
+        status_code=401,
+        detail="Invalid or missing admin API Key"
+    )
+
+@contextmanager
+def track_request(endpoint: str):
+    """
+    Records latency, in-flight count and outcome of one request.
+    """
+    metrics.INFLIGHT.inc(endpoint=endpoint)
+    start = time.perf_counter()
+    status = "500"
     try:
-        # Support various keys (Robustness for the tester)
-        b64_data = (request.audio_base64_format or request.audio_base64 or 
-                   request.audio_base64_camel or request.audio_base64_exact or 
-                   request.audio or request.base64 or request.audio_data or 
-                   request.audioData or request.file)
-        
-        print(f"DEBUG: Request Fields: {request.dict(exclude_none=True).keys()}")
-        if b64_data:
-            print(f"DEBUG: Found valid audio data (len={len(b64_data)})")
-        
-        if not b64_data:
-             print("DEBUG: Missing audio content")
-             print(f"DEBUG: Full request data: {request.dict()}")
-             raise HTTPException(status_code=400, detail="Missing audio content. Please provide audio data in one of these fields: audio_base64, audio, base64, audioData, or file")
-        
-        # Clean Base64 (Remove dataURI prefix if present)
-        if "," in b64_data[:100]:
-            print("DEBUG: Removing dataURI prefix")
-            b64_data = b64_data.split(",", 1)[1]
-            
-        # Remove newlines/spaces
-        b64_data = b64_data.replace("\n", "").replace("\r", "").replace(" ", "")
-        
-        print(f"DEBUG: Base64 Length: {len(b64_data)}")
-        print(f"DEBUG: Language field: {request.language}")
-        print(f"DEBUG: Full request dict: {request.dict(exclude_none=True)}")
-        
-        raw_result = predict_voice(b64_data)
-        
-        # Generate explanation based on classification
-        if raw_result["classification"] == "AI_GENERATED":
-            explanation = "Unnatural pitch consistency and robotic speech patterns detected"
+        yield
+        status = "200"
+    except HTTPException as e:
+        status = str(e.status_code)
+        raise
+    except ValueError:
+        # Bad input (base64, undecodable audio) that the caller reports itself, e.g. a batch clip's error line
+        status = "400"
+        raise
+    finally:
+        metrics.INFLIGHT.dec(endpoint=endpoint)
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
+        metrics.REQUESTS_TOTAL.inc(endpoint=endpoint, status=status)
+
+def internal_error(endpoint: str, e: Exception) -> HTTPException:
+    metrics.ERRORS_TOTAL.inc(endpoint=endpoint, kind="internal")
+    logger.exception("Internal error", extra={"fields": {"endpoint": endpoint}})
+    # Return actual error to user for debugging
+    return HTTPException(status_code=500, detail=f"Internal Error: {str(e)}")
+
+def bad_request(endpoint: str, detail: str, status_code: int = 400) -> HTTPException:
+    metrics.ERRORS_TOTAL.inc(endpoint=endpoint, kind="bad_request")
+    log_event(logger, logging.INFO, "Rejected request", sampled=True, endpoint=endpoint, status=status_code, detail=detail)
+    return HTTPException(status_code=status_code, detail=detail)
+
+def shed(endpoint: str, e: Exception) -> HTTPException:
+    """
+    Maps load-shedding exceptions to fast HTTP answers.
+    """
+    metrics.ERRORS_TOTAL.inc(endpoint=endpoint, kind="shed")
+    if isinstance(e, Overloaded):
+        metrics.SHED_TOTAL.inc(reason="queue_full", stage="admission")
+        return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    metrics.SHED_TOTAL.inc(reason="deadline", stage=e.stage)
+    return HTTPException(status_code=504, detail=str(e))
+
+def parse_deadline(endpoint: str, deadline_ms: Optional[str]) -> Optional[float]:
+    """
+    Turns the relative X-Request-Deadline-Ms budget into a time.monotonic deadline.
+    """
+    if deadline_ms is None:
+        return None
+    try:
+        budget = float(deadline_ms)
+    except ValueError:
+        raise bad_request(endpoint, f"{DEADLINE_HEADER} must be a number of milliseconds")
+    return time.monotonic() + max(0.0, budget) / 1000.0
+
+def parse_analysis_mode(endpoint: str, mode: Optional[str]) -> str:
+    mode = (mode or "first").lower()
+    if mode not in ANALYSIS_MODES:
+        raise bad_request(endpoint, f"Unknown analysis mode '{mode}'. Expected one of {ANALYSIS_MODES}")
+    return mode
+
+async def classify_audio(audio_bytes: bytes, endpoint: str, deadline: float = None, admit: bool = False,
+                         mode: str = "first") -> dict:
+    """
+    Shared pipeline for every endpoint: result cache, features on the pool, forward pass via the batcher.
+    With admit=True the expensive part goes through admission control; the deadline
+    (time.monotonic) is checked before decoding and again before the model stage.
+    mode="full" scores sliding windows over the whole clip instead of the first window.
+    The request is pinned to the model served when it starts: every stage
+    runs on that version, even if a hot reload swaps the model meanwhile.
+    """
+    metrics.REQUEST_BYTES.observe(len(audio_bytes), endpoint=endpoint)
+    current = inference.served
+    key = cache_key(audio_bytes, mode, current.version)
+    cached = await result_cache.aget(key)
+    if cached is not None:
+        return cached
+
+    pipeline = run_analysis if mode == "full" else run_pipeline
+    with pool.pinned(current):
+        if admit:
+            async with admission.admit(deadline):
+                result = await pipeline(audio_bytes, current, deadline)
         else:
-            explanation = "Natural prosody and emotional variation detected"
-
-        return {
-            "status": "success",
-            "language": request.language or "Unknown",
-            "classification": raw_result["classification"],
-            "confidenceScore": raw_result["confidence"],
-            "explanation": explanation
-        }
+            result = await pipeline(audio_bytes, current, deadline)
+    result["model_version"] = current.version
+    result_cache.put(key, result, background=True)
+    return result
 
+async def run_analysis(audio_bytes: bytes, model, deadline: float = None) -> dict:
+    """
+    Whole-clip mode: all windows of the clip go through the model as one batch.
+    """
+    check_deadline(deadline, "decode")
+    prepared = await pool.run(prepare_windows, audio_bytes, deadline=deadline, model=model)
+    # Windows the stage-1 classifier is sure about skip the CNN
+    probs, escalate = cascade_split(prepared, model)
+    if escalate:
+        cnn_probs = await pool.run(run_batch, prepared["features"][escalate], deadline=deadline, model=model)
+        for i, prob in zip(escalate, cnn_probs):
+            probs[i] = prob
+    return build_analysis(probs, prepared["starts"], prepared["explainability"])
+
+async def run_pipeline(audio_bytes: bytes, model, deadline: float = None) -> dict:
+    check_deadline(deadline, "decode")
+    prepared = await pool.run(prepare_clip, audio_bytes, deadline=deadline, model=model)
+    probs, escalate = cascade_split(prepared, model)
+    if not escalate:
+        return build_result(probs[0], prepared["explainability"])
+    prob = await batcher.submit(prepared["features"], deadline=deadline, model=model)
+    return build_result(prob, prepared["explainability"])
+
+def format_response(raw_result: dict, language: Optional[str]) -> dict:
+    # Generate explanation based on classification
+    if raw_result["classification"] == "AI_GENERATED":
+        explanation = "Unnatural pitch consistency and robotic speech patterns detected"
+    else:
+        explanation = "Natural prosody and emotional variation detected"
+
+    response = {
+        "status": "success",
+        "language": language or "Unknown",
+        "classification": raw_result["classification"],
+        "confidenceScore": raw_result["confidence"],
+        "explanation": explanation,
+        "modelVersion": raw_result.get("model_version")
+    }
+    if "segments" in raw_result:
+        response["segments"] = [
+            {
+                "start": seg["start"],
+                "end": seg["end"],
+                "classification": seg["classification"],
+                "confidenceScore": seg["confidence"]
+            }
+            for seg in raw_result["segments"]
+        ]
+        response["aggregate"] = raw_result["aggregate"]
+    return response
+
+@app.post("/detect-voice")
+async def detect_voice(
+    request: AudioRequest,
+    api_key: str = Depends(get_api_key),
+    deadline_ms: Optional[str] = Header(None, alias=DEADLINE_HEADER)
+):
+    endpoint = "detect_voice"
+    with track_request(endpoint):
+        try:
+            deadline = parse_deadline(endpoint, deadline_ms)
+            mode = parse_analysis_mode(endpoint, request.analysis or request.analysis_mode)
+            b64_data = get_base64_field(request)
+            # Field names only: the payload itself is never logged
+            fields = [name for name, value in request if value is not None]
+
+            if not b64_data:
+                log_event(logger, logging.WARNING, "Missing audio content", endpoint=endpoint, fields=fields)
+                raise bad_request(endpoint, "Missing audio content. Please provide audio data in one of these fields: audio_base64, audio, base64, audioData, or file")
+
+            b64_data = clean_base64(b64_data)
+            log_event(logger, logging.DEBUG, "Request received", sampled=True, endpoint=endpoint,
+                      fields=fields, base64_length=len(b64_data), language=request.language)
+
+            audio_bytes = decode_base64_audio(b64_data)
+            raw_result = await classify_audio(audio_bytes, endpoint, deadline=deadline, admit=True, mode=mode)
+            return format_response(raw_result, request.language)
+
+        except HTTPException:
+            raise
+        except (Overloaded, DeadlineExceeded) as e:
+            raise shed(endpoint, e)
+        except ValueError as ve:
+            raise bad_request(endpoint, str(ve))
+        except Exception as e:
+            raise internal_error(endpoint, e)
+
+@app.post("/detect-voice/upload")
+async def detect_voice_upload(
+    request: Request,
+    language: Optional[str] = None,
+    analysis: Optional[str] = None,
+    api_key: str = Depends(get_api_key),
+    deadline_ms: Optional[str] = Header(None, alias=DEADLINE_HEADER)
+):
+    """
+    Same as /detect-voice without the base64 JSON envelope. Accepts either
+    a raw body (Content-Type: audio/* or application/octet-stream) or a
+    multipart/form-data upload (first file field, optional "language" field).
+    ?analysis=full scores the whole clip in sliding windows.
+    """
+    endpoint = "upload"
+    content_type = request.headers.get("content-type", "").lower()
+    with track_request(endpoint):
+        try:
+            deadline = parse_deadline(endpoint, deadline_ms)
+            mode = parse_analysis_mode(endpoint, analysis)
+            if content_type.startswith("multipart/form-data"):
+                form = await request.form()
+                try:
+                    upload = next((v for v in form.values() if isinstance(v, UploadFile)), None)
+                    if upload is None:
+                        raise bad_request(endpoint, "Missing audio content. Please attach an audio file to the form")
+                    audio_bytes = await upload.read()
+                    language = language or form.get("language") or form.get("Language")
+                finally:
+                    await form.close()
+            elif content_type.startswith("audio/") or content_type.startswith("application/octet-stream"):
+                audio_bytes = await request.body()
+            else:
+                raise bad_request(endpoint, "Unsupported Content-Type. Use audio/*, application/octet-stream or multipart/form-data", 415)
+
+            if not audio_bytes:
+                raise bad_request(endpoint, "Empty audio content")
+
+            raw_result = await classify_audio(audio_bytes, endpoint, deadline=deadline, admit=True, mode=mode)
+            return format_response(raw_result, language)
+
+        except HTTPException:
+            raise
+        except (Overloaded, DeadlineExceeded) as e:
+            raise shed(endpoint, e)
+        except ValueError as ve:
+            raise bad_request(endpoint, str(ve))
+        except Exception as e:
+            raise internal_error(endpoint, e)
+
+async def classify_batch_item(index: int, clip_id: Optional[str], read_audio, language: Optional[str],
+                              limit: asyncio.Semaphore) -> dict:
+    """
+    Runs one clip of a batch and reports the outcome inline instead of raising.
+    read_audio is a coroutine function returning the clip's raw bytes. Each clip
+    goes through admission control like a single-clip request; limit (one per
+    batch call) caps how many of the batch's clips hold or wait for a slot.
+    """
+    endpoint = "batch"
+    try:
+        async with limit:
+            with track_request(endpoint):
+                audio_bytes = await read_audio()
+                try:
+                    raw_result = await classify_audio(audio_bytes, endpoint, admit=True)
+                except (Overloaded, DeadlineExceeded) as e:
+                    raise shed(endpoint, e)
+        return {"index": index, "id": clip_id, **format_response(raw_result, language)}
+    except HTTPException as e:
+        return {"index": index, "id": clip_id, "status": "error", "detail": e.detail}
     except ValueError as ve:
-        raise HTTPException(status_code=400, detail=str(ve))
+        metrics.ERRORS_TOTAL.inc(endpoint=endpoint, kind="bad_request")
+        return {"index": index, "id": clip_id, "status": "error", "detail": str(ve)}
     except Exception as e:
-        # Log error internally
-        import traceback
-        traceback.print_exc()
-        print(f"Internal Error: {e}")
-        # Return actual error to user for debugging
-        raise HTTPException(status_code=500, detail=f"Internal Error: {str(e)}")
+        metrics.ERRORS_TOTAL.inc(endpoint=endpoint, kind="internal")
+        logger.exception("Batch clip failed", extra={"fields": {"endpoint": endpoint, "index": index}})
+        return {"index": index, "id": clip_id, "status": "error", "detail": f"Internal Error: {str(e)}"}
+
+def stream_batch(jobs: list) -> StreamingResponse:
+    """
+    Starts every clip at once (the pool and batcher bound the actual parallelism)
+    and streams one NDJSON line per clip in completion order.
+    """
+    async def lines():
+        tasks = [asyncio.ensure_future(job) for job in jobs]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield json.dumps(await finished) + "\n"
+        finally:
+            # Client went away: don't keep burning CPU on its clips
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.post("/detect-voice/batch")
+async def detect_voice_batch(request: Request, api_key: str = Depends(get_api_key)):
+    """
+    Bulk screening. Accepts either JSON {"clips": [{"id": ..., "audio_base64": ..., "language": ...}, ...]}
+    (same field aliases as /detect-voice) or a multipart/form-data bundle with one file per clip.
+    Responds with NDJSON, one line per clip as soon as it finishes; per-clip failures
+    are reported on their line with "status": "error".
+    """
+    content_type = request.headers.get("content-type", "").lower()
+    jobs = []
+    limit = asyncio.Semaphore(BATCH_CLIP_CONCURRENCY)
+
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        uploads = [v for _, v in form.multi_items() if isinstance(v, UploadFile)]
+        language = form.get("language") or form.get("Language")
+        if not uploads:
+            await form.close()
+            raise HTTPException(status_code=400, detail="Missing audio content. Please attach audio files to the form")
+        if len(uploads) > BATCH_MAX_CLIPS:
+            await form.close()
+            raise HTTPException(status_code=413, detail=f"Too many clips (max {BATCH_MAX_CLIPS})")
+        for index, upload in enumerate(uploads):
+            jobs.append(classify_batch_item(index, upload.filename, upload.read, language, limit))
+
+        response = stream_batch(jobs)
+        response.background = BackgroundTask(form.close)
+        return response
+
+    try:
+        body = BatchRequest.model_validate_json(await request.body())
+    except ValidationError as e:
+        # Same 422 shape as FastAPI's own body validation, without echoing the (base64) input back
+        raise RequestValidationError(e.errors(include_input=False, include_url=False))
+    if not body.clips:
+        raise HTTPException(status_code=400, detail="Missing audio content. Please provide at least one clip")
+    if len(body.clips) > BATCH_MAX_CLIPS:
+        raise HTTPException(status_code=413, detail=f"Too many clips (max {BATCH_MAX_CLIPS})")
+
+    for index, clip in enumerate(body.clips):
+        b64_data = get_base64_field(clip)
+
+        async def read_audio(b64_data=b64_data):
+            if not b64_data:
+                raise ValueError("Missing audio content")
+            return decode_base64_audio(clean_base64(b64_data))
+
+        jobs.append(classify_batch_item(index, clip.id, read_audio, clip.language or body.language, limit))
+    return stream_batch(jobs)
+
+@app.websocket("/detect-voice/stream")
+async def detect_voice_stream(websocket: WebSocket):
+    """
+    Live classification. Protocol:
+      1. Optional JSON text message with the stream config, e.g.
+         {"format": "pcm16", "sample_rate": 16000, "channels": 1, "hop_seconds": 1.0,
+          "rolling_windows": 5, "language": "English"}
+      2. Binary messages with audio chunks (raw little-endian PCM, or self-contained
+         encoded segments when format is "encoded").
+      3. Optional {"type": "end"} text message to get a final summary.
+    Every completed DURATION-second window produces a {"type": "window", ...} message
+    with that window's verdict and the rolling verdict over recent windows.
+    Browsers can't set headers on WebSockets, so the key may also be passed as ?api_key=.
+    """
+    key = websocket.headers.get(API_KEY_NAME) or websocket.query_params.get("api_key")
+    if check_api_key(key, websocket.headers.get("authorization")) is None:
+        await websocket.close(code=1008)  # Policy violation
+        return
+    await websocket.accept()
+    metrics.INFLIGHT.inc(endpoint="stream")
+
+    session = None
+    language = None
+
+    async def send_windows(windows):
+        for start, features, peak in windows:
+            metrics.REQUESTS_TOTAL.inc(endpoint="stream", status="window")
+            current = inference.served
+            with pool.pinned(current):
+                prob = await batcher.submit(features, model=current)
+            result = build_result(prob, {"spectral_smoothness": round(float(np.std(features)), 4)})
+            await websocket.send_json({
+                "type": "window",
+                "start": round(start, 3),
+                "end": round(start + DURATION, 3),
+                "classification": result["classification"],
+                "confidenceScore": result["confidence"],
+                "silent": peak == 0,
+                "rolling": session.update(prob),
+                "modelVersion": current.version
+            })
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+
+            if message.get("text") is not None:
+                try:
+                    data = json.loads(message["text"])
+                except ValueError:
+                    await websocket.send_json({"type": "error", "detail": "Text messages must be JSON"})
+                    continue
+                if not isinstance(data, dict):
+                    await websocket.close(code=1003, reason="Text messages must be JSON objects")  # Unsupported data
+                    break
+                if data.get("type") == "end":
+                    if session is not None:
+                        # The resampler holds back its last few samples until told the stream is over
+                        await send_windows(await asyncio.to_thread(session.flush))
+                    summary = session.summary() if session else {"windows": 0}
+                    await websocket.send_json({"type": "summary", "language": language or "Unknown", **summary})
+                    await websocket.close()
+                    break
+                if session is not None:
+                    await websocket.send_json({"type": "error", "detail": "Config must be sent before any audio"})
+                    continue
+                try:
+                    session = StreamSession(
+                        fmt=data.get("format", "pcm16"),
+                        sample_rate=data.get("sample_rate", SAMPLE_RATE),
+                        channels=data.get("channels", 1),
+                        hop_seconds=data.get("hop_seconds", 1.0),
+                        rolling_windows=data.get("rolling_windows", 5)
+                    )
+                except (TypeError, ValueError) as e:
+                    await websocket.send_json({"type": "error", "detail": str(e)})
+                    continue
+                language = data.get("language") or data.get("Language")
+                await websocket.send_json({"type": "config", **session.config()})
+                continue
+
+            chunk = message.get("bytes")
+            if not chunk:
+                continue
+            if session is None:
+                session = StreamSession()
+            try:
+                # Decoding + incremental STFT are CPU work; keep them off the event loop
+                windows = await asyncio.to_thread(session.feed, chunk)
+            except ValueError as e:
+                await websocket.send_json({"type": "error", "detail": str(e)})
+                continue
+            await send_windows(windows)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        metrics.INFLIGHT.dec(endpoint="stream")
 
 @app.get("/")
 def home():
@@ -133,7 +632,104 @@ def home():
 
 @app.get("/health")
 def health_check():
-    return {"status": "ok"}
+    return {"status": "ok", **inference.served.info()}
+
+class ReloadRequest(BaseModel):
+    # Checkpoint to switch to (absolute, or relative to MODEL_PATH's directory); defaults to MODEL_PATH
+    model_path: Optional[str] = None
+
+def resolve_model_path(model_path: Optional[str]) -> str:
+    """
+    Resolves a requested checkpoint and keeps it inside MODEL_DIR: loading a
+    checkpoint unpickles it, so the admin API must not point at arbitrary files.
+    """
+    if not model_path:
+        return inference.MODEL_PATH
+    path = os.path.realpath(os.path.join(MODEL_DIR, model_path))
+    if os.path.commonpath([path, MODEL_DIR]) != MODEL_DIR:
+        raise HTTPException(status_code=400, detail=f"model_path must be inside {MODEL_DIR}")
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail=f"Model file not found: {model_path}")
+    return path
+
+async def swap_model(model_path: str = None, trigger: str = "admin") -> dict:
+    """
+    Zero-downtime model reload. The new checkpoint is loaded and warmed up
+    next to the one being served (for the process backend: in a fresh set of
+    workers), then swapped in. Requests already running are pinned to the
+    model they started on and finish on it; if anything fails, the current
+    model keeps serving.
+    """
+    async with reload_lock:
+        start = time.perf_counter()
+        previous = inference.served.version
+        try:
+            # The API process only runs the model itself with the thread backend
+            warmup_sizes = WARMUP_BATCH_SIZES if pool.backend == "thread" else ()
+            candidate = await asyncio.to_thread(prepare_model, model_path, warmup_sizes)
+            await pool.reload(candidate)
+        except Exception:
+            metrics.MODEL_RELOADS.inc(result="failure")
+            raise
+        # No await since the pool switched, so no request can see the pool and `served` disagree
+        publish_model(candidate)
+        if candidate.version != previous:
+            # Old-version results can't be served any more; free their cache space
+            result_cache.evict_version(previous, background=True)
+        metrics.MODEL_RELOADS.inc(result="success")
+        seconds = round(time.perf_counter() - start, 3)
+        log_event(logger, logging.INFO, "Model reloaded", trigger=trigger, previous_version=previous,
+                  model_version=candidate.version, seconds=seconds)
+        return {"previous_version": previous, **candidate.info(), "reload_seconds": seconds}
+
+@app.post("/admin/reload-model")
+async def admin_reload_model(request: Optional[ReloadRequest] = None, admin_key: str = Depends(get_admin_key)):
+    """
+    Loads a new checkpoint (default: MODEL_PATH, re-read from disk), warms it
+    up and swaps it in without dropping requests.
+    """
+    path = resolve_model_path(request.model_path if request else None)
+    if reload_lock.locked():
+        raise HTTPException(status_code=409, detail="A model reload is already in progress")
+    try:
+        return {"status": "success", **await swap_model(path)}
+    except Exception as e:
+        logger.exception("Model reload failed", extra={"fields": {"model_path": path}})
+        raise HTTPException(status_code=500,
+                            detail=f"Reload failed, still serving {inference.served.version}: {str(e)}")
+
+@metrics.REGISTRY.on_scrape
+def _refresh_cache_metrics():
+    cache = result_cache.stats()
+    metrics.CACHE_LOOKUPS.set_total(cache["hits"], result="hit")
+    metrics.CACHE_LOOKUPS.set_total(cache["disk_hits"], result="disk_hit")
+    metrics.CACHE_LOOKUPS.set_total(cache["misses"], result="miss")
+    metrics.CACHE_ENTRIES.set(cache["entries"])
+    metrics.ADMISSION_ACTIVE.set(admission.active)
+    metrics.ADMISSION_QUEUED.set(admission.queued)
+    current = inference.served
+    metrics.MODEL_INFO.clear()
+    metrics.MODEL_INFO.set(1, version=current.version, arch=current.arch, backend=current.backend)
+
+@app.get("/metrics")
+def prometheus_metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/stats")
+def stats():
+    stage1 = inference.served.stage1
+    return {
+        "batching": batcher.stats.snapshot(),
+        "workers": {**pool.info(), "cpu": cpu_info()},
+        "cache": result_cache.stats(),
+        "admission": admission.stats(),
+        "cascade": {
+            "enabled": stage1 is not None,
+            "band": [stage1.low, stage1.high] if stage1 is not None else None,
+            **inference.cascade_stats.snapshot()
+        }
+    }
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,215 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Default buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (16e3, 64e3, 256e3, 1e6, 4e6, 16e6, 64e6)
+
+def _escape(value: str) -> str:
+    # Label values may come from checkpoint metadata or file names; the text format needs \\, \" and \n escaped
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def header(self) -> list:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        _record(self, "inc", labels, amount)
+
+    def set_total(self, value: float, **labels):
+        """
+        Mirrors a total maintained elsewhere (e.g. cache counters) at scrape time.
+        """
+        _record(self, "set", labels, value)
+
+    def _apply(self, key: tuple, op: str, amount: float):
+        with self._lock:
+            if op == "set":
+                self._values[key] = amount
+            else:
+                self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> list:
+        lines = self.header()
+        for key, v in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(v)}")
+        return lines
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels):
+        _record(self, "inc", labels, -amount)
+
+    def set(self, value: float, **labels):
+        _record(self, "set", labels, value)
+
+    def clear(self):
+        """
+        Drops every label set, e.g. before re-publishing an info-style gauge.
+        """
+        with self._lock:
+            self._values.clear()
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        _record(self, "observe", labels, value)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _apply(self, key: tuple, op: str, value: float):
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> list:
+        lines = self.header()
+        for key, (counts, total, count) in sorted(self._values.items()):
+            for bound, c in zip(self.buckets, counts):
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {c}")
+            inf = _format_labels(self.label_names, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {count}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.callbacks = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def on_scrape(self, fn):
+        """
+        Registers fn() to run right before rendering (e.g. to refresh gauges from stats objects).
+        """
+        self.callbacks.append(fn)
+        return fn
+
+    def render(self) -> str:
+        for fn in self.callbacks:
+            fn()
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+# Process-pool workers can't update the API process' registry directly. They
+# buffer their observations instead; the pool ships them back with each result
+# and the parent replays them.
+_buffer = None
+
+def enable_buffering():
+    global _buffer
+    _buffer = []
+
+def drain_buffer() -> list:
+    global _buffer
+    if _buffer is None:
+        return []
+    drained, _buffer = _buffer, []
+    return drained
+
+def replay(observations: list):
+    for name, op, key, value in observations:
+        metric = REGISTRY.metrics.get(name)
+        if metric is not None:
+            metric._apply(tuple(key), op, value)
+
+def _record(metric: _Metric, op: str, labels: dict, value: float):
+    key = metric._key(labels)
+    if _buffer is not None:
+        _buffer.append((metric.name, op, key, value))
+    else:
+        metric._apply(key, op, value)
+
+# Pipeline metrics
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "voice_stage_seconds", "Time spent in each pipeline stage", ("stage",)))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "voice_request_seconds", "End-to-end request latency", ("endpoint",)))
+REQUEST_BYTES = REGISTRY.register(Histogram(
+    "voice_request_audio_bytes", "Size of the decoded audio payload", ("endpoint",), buckets=SIZE_BUCKETS))
+REQUESTS_TOTAL = REGISTRY.register(Counter(
+    "voice_requests_total", "Requests by endpoint and outcome", ("endpoint", "status")))
+INFLIGHT = REGISTRY.register(Gauge(
+    "voice_inflight_requests", "Requests currently being processed", ("endpoint",)))
+ERRORS_TOTAL = REGISTRY.register(Counter(
+    "voice_errors_total", "Errors by endpoint and kind", ("endpoint", "kind")))
+BATCH_SIZE = REGISTRY.register(Histogram(
+    "voice_batch_size", "Clips per model forward pass", buckets=(1, 2, 4, 8, 16, 32, 64)))
+BATCH_QUEUE_WAIT = REGISTRY.register(Histogram(
+    "voice_batch_queue_wait_seconds", "Time a clip waited in the batching queue"))
+SHED_TOTAL = REGISTRY.register(Counter(
+    "voice_shed_total", "Requests dropped by load shedding", ("reason", "stage")))
+ADMISSION_ACTIVE = REGISTRY.register(Gauge(
+    "voice_admission_active", "Requests admitted into the pipeline"))
+ADMISSION_QUEUED = REGISTRY.register(Gauge(
+    "voice_admission_queued", "Requests waiting for admission"))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "voice_cache_lookups_total", "Result cache lookups by outcome", ("result",)))
+CACHE_ENTRIES = REGISTRY.register(Gauge(
+    "voice_cache_entries", "Entries in the in-process result cache"))
+CASCADE_DECISIONS = REGISTRY.register(Counter(
+    "voice_cascade_decisions_total", "Clips decided by the stage-1 classifier vs escalated to the CNN", ("stage",)))
+MODEL_INFO = REGISTRY.register(Gauge(
+    "voice_model_info", "Model currently serving requests (always 1)", ("version", "arch", "backend")))
+MODEL_RELOADS = REGISTRY.register(Counter(
+    "voice_model_reloads_total", "Model hot reloads by outcome", ("result",)))
+
+def stage_timer(stage: str):
+    """
+    Context manager timing one pipeline stage into voice_stage_seconds.
+    """
+    return STAGE_SECONDS.time(stage=stage)
@@ -1,6 +1,74 @@
 import torch
 import torch.nn as nn
-from torchvision import models
+
+class BasicBlock(nn.Module):
+    """
+    ResNet basic block (two 3x3 convs + identity/projection shortcut), laid out
+    like torchvision's so parameter names match existing checkpoints.
+    """
+    expansion = 1
+
+    def __init__(self, inplanes, planes, stride=1, downsample=None):
+        super(BasicBlock, self).__init__()
+        self.conv1 = nn.Conv2d(inplanes, planes, kernel_size=3, stride=stride, padding=1, bias=False)
+        self.bn1 = nn.BatchNorm2d(planes)
+        self.relu = nn.ReLU(inplace=True)
+        self.conv2 = nn.Conv2d(planes, planes, kernel_size=3, stride=1, padding=1, bias=False)
+        self.bn2 = nn.BatchNorm2d(planes)
+        self.downsample = downsample
+
+    def forward(self, x):
+        identity = x if self.downsample is None else self.downsample(x)
+        out = self.relu(self.bn1(self.conv1(x)))
+        out = self.bn2(self.conv2(out))
+        return self.relu(out + identity)
+
+class ResNet(nn.Module):
+    """
+    Minimal ResNet (same structure, names and init as torchvision.models.ResNet),
+    so serving doesn't need to import torchvision.
+    """
+    def __init__(self, layers=(2, 2, 2, 2), num_classes=1000):
+        super(ResNet, self).__init__()
+        self.inplanes = 64
+        self.conv1 = nn.Conv2d(3, 64, kernel_size=7, stride=2, padding=3, bias=False)
+        self.bn1 = nn.BatchNorm2d(64)
+        self.relu = nn.ReLU(inplace=True)
+        self.maxpool = nn.MaxPool2d(kernel_size=3, stride=2, padding=1)
+        self.layer1 = self._make_layer(64, layers[0])
+        self.layer2 = self._make_layer(128, layers[1], stride=2)
+        self.layer3 = self._make_layer(256, layers[2], stride=2)
+        self.layer4 = self._make_layer(512, layers[3], stride=2)
+        self.avgpool = nn.AdaptiveAvgPool2d((1, 1))
+        self.fc = nn.Linear(512 * BasicBlock.expansion, num_classes)
+
+        for m in self.modules():
+            if isinstance(m, nn.Conv2d):
+                nn.init.kaiming_normal_(m.weight, mode="fan_out", nonlinearity="relu")
+            elif isinstance(m, nn.BatchNorm2d):
+                nn.init.constant_(m.weight, 1)
+                nn.init.constant_(m.bias, 0)
+
+    def _make_layer(self, planes, blocks, stride=1):
+        downsample = None
+        if stride != 1 or self.inplanes != planes * BasicBlock.expansion:
+            downsample = nn.Sequential(
+                nn.Conv2d(self.inplanes, planes * BasicBlock.expansion, kernel_size=1, stride=stride, bias=False),
+                nn.BatchNorm2d(planes * BasicBlock.expansion)
+            )
+        layers = [BasicBlock(self.inplanes, planes, stride, downsample)]
+        self.inplanes = planes * BasicBlock.expansion
+        layers.extend(BasicBlock(self.inplanes, planes) for _ in range(1, blocks))
+        return nn.Sequential(*layers)
+
+    def forward(self, x):
+        x = self.maxpool(self.relu(self.bn1(self.conv1(x))))
+        x = self.layer4(self.layer3(self.layer2(self.layer1(x))))
+        x = torch.flatten(self.avgpool(x), 1)
+        return self.fc(x)
+
+def resnet18(num_classes=1000) -> ResNet:
+    return ResNet((2, 2, 2, 2), num_classes)
 
 class VoiceDetectorCNN(nn.Module):
     def __init__(self):
@@ -8,7 +76,7 @@ class VoiceDetectorCNN(nn.Module):
         # Use ResNet18 as the backbone
         # pretrained=False because spectrograms are quite different from ImageNet images
         # and we have a specific domain.
-        self.resnet = models.resnet18(weights=None)
+        self.resnet = resnet18()
         
         # Modify first layer to accept 1 channel (Mel Spectrogram) instead of 3 (RGB)
         # Original: nn.Conv2d(3, 64, kernel_size=7, stride=2, padding=3, bias=False)
@@ -20,3 +88,93 @@ class VoiceDetectorCNN(nn.Module):
 
     def forward(self, x):
         return self.resnet(x)
+
+class DepthwiseSeparableConv(nn.Module):
+    """
+    3x3 depthwise conv followed by a 1x1 pointwise conv (MobileNet-style),
+    each with BatchNorm + ReLU.
+    """
+    def __init__(self, in_channels, out_channels, stride=1):
+        super(DepthwiseSeparableConv, self).__init__()
+        self.depthwise = nn.Sequential(
+            nn.Conv2d(in_channels, in_channels, kernel_size=3, stride=stride, padding=1, groups=in_channels, bias=False),
+            nn.BatchNorm2d(in_channels),
+            nn.ReLU(inplace=True)
+        )
+        self.pointwise = nn.Sequential(
+            nn.Conv2d(in_channels, out_channels, kernel_size=1, bias=False),
+            nn.BatchNorm2d(out_channels),
+            nn.ReLU(inplace=True)
+        )
+
+    def forward(self, x):
+        return self.pointwise(self.depthwise(x))
+
+class CompactVoiceDetector(nn.Module):
+    """
+    Small depthwise-separable CNN for the (1, 128, 126) mel spectrogram.
+    Meant to be trained by distillation from VoiceDetectorCNN (see training/train.py --distill).
+    """
+    def __init__(self, width=32, dropout=0.2):
+        super(CompactVoiceDetector, self).__init__()
+        channels = [width, width * 2, width * 4, width * 4, width * 8]
+        self.stem = nn.Sequential(
+            nn.Conv2d(1, width, kernel_size=3, stride=2, padding=1, bias=False),
+            nn.BatchNorm2d(width),
+            nn.ReLU(inplace=True)
+        )
+        blocks = []
+        for i in range(1, len(channels)):
+            # Halve the resolution at every channel increase, refine once at the same width
+            blocks.append(DepthwiseSeparableConv(channels[i - 1], channels[i], stride=2))
+            blocks.append(DepthwiseSeparableConv(channels[i], channels[i]))
+        self.features = nn.Sequential(*blocks)
+        self.pool = nn.AdaptiveAvgPool2d(1)
+        self.dropout = nn.Dropout(dropout)
+        self.fc = nn.Linear(channels[-1], 1)
+
+    def forward(self, x):
+        x = self.features(self.stem(x))
+        x = torch.flatten(self.pool(x), 1)
+        return self.fc(self.dropout(x))
+
+# Architectures selectable for training and recorded in checkpoints
+ARCHITECTURES = {
+    "resnet18": VoiceDetectorCNN,
+    "compact": CompactVoiceDetector
+}
+
+def build_model(arch: str = "resnet18") -> nn.Module:
+    if arch not in ARCHITECTURES:
+        raise ValueError(f"Unknown architecture '{arch}'. Expected one of {tuple(ARCHITECTURES)}")
+    return ARCHITECTURES[arch]()
+
+def save_checkpoint(model: nn.Module, path: str, arch: str, **extra):
+    """
+    Saves the weights together with the architecture name (plus any extra metadata).
+    """
+    torch.save({"arch": arch, "state_dict": model.state_dict(), **extra}, path)
+
+def load_checkpoint(path: str, map_location="cpu", mmap: bool = False):
+    """
+    Loads a checkpoint written by save_checkpoint, or a plain state_dict from
+    before architectures were recorded (always a VoiceDetectorCNN).
+    Returns (model, arch) with the model in eval mode.
+
+    With mmap=True the tensors stay backed by the file's page cache and the model
+    is built on the meta device and then pointed at them (no random init, no copy),
+    so several processes serving the same file share one physical copy.
+    """
+    checkpoint = torch.load(path, map_location=map_location, mmap=mmap)
+    if isinstance(checkpoint, dict) and "state_dict" in checkpoint and "arch" in checkpoint:
+        arch, state_dict = checkpoint["arch"], checkpoint["state_dict"]
+    else:
+        arch, state_dict = "resnet18", checkpoint
+    if mmap:
+        with torch.device("meta"):
+            model = build_model(arch)
+        model.load_state_dict(state_dict, assign=True)
+    else:
+        model = build_model(arch)
+        model.load_state_dict(state_dict)
+    return model.eval(), arch
@@ -0,0 +1,96 @@
+import numpy as np
+import torch
+from .audio_utils import SAMPLE_RATE
+
+# Speech pitch range and YIN settings
+FMIN = 60.0
+FMAX = 500.0
+FRAME_LENGTH = 1024  # 64 ms at 16 kHz: integration window + max lag
+HOP_LENGTH = 256
+YIN_THRESHOLD = 0.25
+SILENCE_DB = -40.0   # Frames this far below the loudest frame are not considered
+
+def _frames(y: np.ndarray, frame_length: int, hop_length: int) -> np.ndarray:
+    if len(y) < frame_length:
+        y = np.pad(y, (0, frame_length - len(y)))
+    return np.lib.stride_tricks.sliding_window_view(y, frame_length)[::hop_length]
+
+def yin(y: np.ndarray, sr: int = SAMPLE_RATE, fmin: float = FMIN, fmax: float = FMAX,
+        frame_length: int = FRAME_LENGTH, hop_length: int = HOP_LENGTH,
+        threshold: float = YIN_THRESHOLD):
+    """
+    Frame-batched YIN pitch tracker. All frames are processed at once: the
+    difference function comes from one batched FFT cross-correlation plus
+    cumulative energies, so there is no per-frame Python loop.
+
+    Returns (f0, voiced, audible): f0 in Hz per frame (NaN where unvoiced),
+    the voiced mask, and the mask of frames loud enough to be considered.
+    """
+    min_lag = max(1, int(sr / fmax))
+    max_lag = int(np.ceil(sr / fmin))
+    win = frame_length - max_lag
+    if win <= 0:
+        raise ValueError("frame_length must exceed the longest pitch period")
+
+    frames = _frames(np.ascontiguousarray(y, dtype=np.float32), frame_length, hop_length)
+    n_frames = frames.shape[0]
+
+    # d(tau) = sum_j (x[j] - x[j+tau])^2 for j < win
+    #        = E(0) + E(tau) - 2 * sum_j x[j] x[j+tau]
+    # The cross-correlation term for every frame and lag is one batched FFT
+    n_fft = 1 << int(np.ceil(np.log2(frame_length + win)))
+    with torch.no_grad():
+        t = torch.from_numpy(np.ascontiguousarray(frames))
+        spec = torch.fft.rfft(t, n_fft)
+        head = torch.fft.rfft(t[:, :win], n_fft)
+        xcorr = torch.fft.irfft(head.conj() * spec, n_fft)[:, :max_lag + 1].double().numpy()
+
+    # Windowed energies E(tau) from a float64 running sum (differences of float32 sums lose too much)
+    sq = np.zeros((n_frames, frame_length + 1))
+    np.cumsum(np.square(frames, dtype=np.float64), axis=1, out=sq[:, 1:])
+    lags = np.arange(max_lag + 1)
+    energy = sq[:, lags + win] - sq[:, lags]
+    diff = np.maximum(energy[:, :1] + energy - 2.0 * xcorr, 0.0)
+
+    # Cumulative mean normalized difference, d'(0) = 1
+    cmnd = np.ones_like(diff)
+    cumulative = np.cumsum(diff[:, 1:], axis=1)
+    cmnd[:, 1:] = diff[:, 1:] * lags[1:] / np.maximum(cumulative, 1e-12)
+
+    # First dip below the threshold that is also a local minimum
+    band = cmnd[:, min_lag:max_lag]
+    local_min = band < np.minimum(cmnd[:, min_lag - 1:max_lag - 1], cmnd[:, min_lag + 1:max_lag + 1])
+    candidates = (band < threshold) & local_min
+    has_pitch = candidates.any(axis=1)
+    tau = np.argmax(candidates, axis=1) + min_lag
+
+    # Parabolic interpolation around the chosen lag
+    rows = np.arange(n_frames)
+    left, mid, right = cmnd[rows, tau - 1], cmnd[rows, tau], cmnd[rows, tau + 1]
+    denom = left - 2.0 * mid + right
+    shift = np.where(np.abs(denom) > 1e-12, 0.5 * (left - right) / np.where(denom == 0, 1.0, denom), 0.0)
+    period = tau + np.clip(shift, -1.0, 1.0)
+
+    rms = np.sqrt(energy[:, 0] / win)
+    peak = rms.max() if n_frames else 0.0
+    audible = (rms > peak * 10 ** (SILENCE_DB / 20.0)) if peak > 0 else np.zeros(n_frames, dtype=bool)
+    voiced = has_pitch & audible
+    f0 = np.where(voiced, sr / period, np.nan)
+    return f0, voiced, audible
+
+def prosody_metrics(y: np.ndarray, sr: int = SAMPLE_RATE) -> dict:
+    """
+    Pitch statistics for the explainability block:
+    - pitch_variance: variance of the voiced f0 contour in semitones² (scale free,
+      so a low and a high voice with the same intonation score alike)
+    - voiced_ratio: share of audible frames that carry a pitch
+    - mean_pitch_hz: mean voiced f0
+    """
+    f0, voiced, audible = yin(y, sr)
+    pitched = f0[voiced]
+    semitones = 12.0 * np.log2(pitched / 440.0)
+    return {
+        "pitch_variance": round(float(np.var(semitones)), 4) if len(pitched) > 1 else 0.0,
+        "voiced_ratio": round(float(len(pitched) / max(1, int(audible.sum()))), 4),
+        "mean_pitch_hz": round(float(np.mean(pitched)), 2) if len(pitched) else 0.0
+    }
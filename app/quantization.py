@@ -0,0 +1,104 @@
+import os
+import random
+import logging
+import warnings
+import numpy as np
+import torch
+import torch.nn as nn
+
+logger = logging.getLogger(__name__)
+
+QUANTIZE_MODES = ("none", "dynamic", "static")
+SUPPORTED_EXTS = ('.wav', '.mp3', '.flac', '.ogg')
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+def select_engine() -> str:
+    """
+    Picks the quantized kernel backend for this CPU (x86/fbgemm on Intel/AMD, qnnpack on ARM).
+    """
+    engines = torch.backends.quantized.supported_engines
+    for engine in ("x86", "fbgemm", "qnnpack"):
+        if engine in engines:
+            torch.backends.quantized.engine = engine
+            return engine
+    raise RuntimeError("No quantized engine available in this torch build")
+
+def calibration_files(data_dir: str = DEFAULT_DATA_DIR, samples: int = 32, seed: int = 0) -> list:
+    """
+    Picks up to `samples` audio files under data_dir/human and data_dir/ai, balanced between the two.
+    """
+    rng = random.Random(seed)
+    picked = []
+    per_class = max(1, samples // 2)
+    for label in ("human", "ai"):
+        found = []
+        for root, _, files in os.walk(os.path.join(data_dir, label)):
+            found.extend(os.path.join(root, f) for f in files if f.lower().endswith(SUPPORTED_EXTS))
+        found.sort()
+        rng.shuffle(found)
+        picked.extend(found[:per_class])
+    return picked
+
+def calibration_batches(files: list, batch_size: int = 8) -> list:
+    """
+    Featurizes calibration clips exactly like the serving path: (N, 1, F, T) float32 tensors.
+    Unreadable files are skipped.
+    """
+    from .audio_utils import preprocess_audio, extract_features_batch
+    clips = []
+    for path in files:
+        try:
+            with open(path, "rb") as f:
+                clips.append(preprocess_audio(f.read()))
+        except Exception as e:
+            logger.warning(f"Skipping calibration file {path}: {e}")
+    batches = []
+    for i in range(0, len(clips), batch_size):
+        features = extract_features_batch(np.stack(clips[i:i + batch_size]))
+        batches.append(torch.from_numpy(features.astype(np.float32, copy=False)).unsqueeze(1))
+    return batches
+
+def quantize_dynamic(model: nn.Module) -> nn.Module:
+    """
+    Dynamic INT8: weights of Linear layers are quantized ahead of time, activations on the fly.
+    Needs no calibration but only covers the classifier head of a CNN.
+    """
+    select_engine()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return torch.ao.quantization.quantize_dynamic(model.eval(), {nn.Linear}, dtype=torch.qint8)
+
+def quantize_static(model: nn.Module, batches: list) -> nn.Module:
+    """
+    Static INT8 (FX graph mode): conv/linear weights and activations are quantized,
+    with activation ranges observed on the calibration batches. Conv+BN+ReLU are fused.
+    """
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+    if not batches:
+        raise ValueError("Static quantization needs at least one calibration batch")
+    engine = select_engine()
+    with warnings.catch_warnings():
+        # FX graph mode is deprecated in favour of torchao's pt2e flow, but needs no extra dependency
+        warnings.simplefilter("ignore")
+        prepared = prepare_fx(model.eval(), get_default_qconfig_mapping(engine), (batches[0],))
+        with torch.no_grad():
+            for batch in batches:
+                prepared(batch)
+        return convert_fx(prepared)
+
+def quantize_model(model: nn.Module, mode: str, data_dir: str = DEFAULT_DATA_DIR, samples: int = 32,
+                   files: list = None) -> nn.Module:
+    """
+    Returns the model quantized according to `mode` ("none", "dynamic" or "static").
+    Static mode calibrates on `files` or, by default, on samples picked from data_dir.
+    """
+    if mode not in QUANTIZE_MODES:
+        raise ValueError(f"Unknown quantization mode '{mode}'. Expected one of {QUANTIZE_MODES}")
+    if mode == "none":
+        return model
+    if mode == "dynamic":
+        return quantize_dynamic(model)
+    if files is None:
+        files = calibration_files(data_dir, samples)
+    return quantize_static(model, calibration_batches(files))
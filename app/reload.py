@@ -0,0 +1,60 @@
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+def file_signature(path: str):
+    """
+    (inode, mtime, size) of path, or None if it doesn't exist. An atomic
+    replace (os.replace / mv) changes the inode even when mtime and size match.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+class ModelWatcher:
+    """
+    Polls a checkpoint file every `interval` seconds and awaits on_change(path)
+    when it changes. A change is only acted on once the file has looked the
+    same for two consecutive polls, so a checkpoint that is still being
+    written isn't loaded half-way. Errors raised by on_change are logged and
+    the same file isn't retried until it changes again.
+    """
+    def __init__(self, path: str, interval: float, on_change):
+        self.path = path
+        self.interval = max(0.1, float(interval))
+        self.on_change = on_change
+        self._task = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._loop(file_signature(self.path)))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self, current):
+        pending = None
+        while True:
+            await asyncio.sleep(self.interval)
+            signature = file_signature(self.path)
+            if signature is None or signature == current:
+                pending = None
+                continue
+            if signature != pending:
+                # Changed since the last poll: wait for it to settle
+                pending = signature
+                continue
+            current, pending = signature, None
+            try:
+                await self.on_change(self.path)
+            except Exception as e:
+                logger.error(f"Reload of changed model file failed, keeping the current model: {e}")
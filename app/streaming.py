@@ -0,0 +1,247 @@
+import io
+import logging
+from collections import deque
+import numpy as np
+import torch
+from .audio_utils import SAMPLE_RATE, DURATION, N_MELS, N_FFT, HOP_LENGTH, get_front_end
+
+logger = logging.getLogger(__name__)
+
+WINDOW_SAMPLES = SAMPLE_RATE * DURATION
+FRAMES_PER_WINDOW = 1 + WINDOW_SAMPLES // HOP_LENGTH
+
+STREAM_FORMATS = ("pcm16", "float32", "encoded")
+
+class RingBuffer:
+    """
+    Fixed-capacity float32 ring buffer addressed by absolute sample index.
+    """
+    def __init__(self, capacity: int):
+        self.capacity = int(capacity)
+        self._data = np.zeros(self.capacity, dtype=np.float32)
+        self.total = 0  # samples written since the stream started
+
+    def write(self, samples: np.ndarray):
+        n = len(samples)
+        if n > self.capacity:
+            raise ValueError("Chunk larger than ring buffer capacity")
+        pos = self.total % self.capacity
+        first = min(n, self.capacity - pos)
+        self._data[pos:pos + first] = samples[:first]
+        self._data[:n - first] = samples[first:]
+        self.total += n
+
+    def read(self, start: int, end: int) -> np.ndarray:
+        """
+        Returns a contiguous copy of samples [start, end) in absolute indices.
+        """
+        if start < self.total - self.capacity or end > self.total:
+            raise ValueError("Requested samples are no longer (or not yet) buffered")
+        pos = start % self.capacity
+        n = end - start
+        if pos + n <= self.capacity:
+            return self._data[pos:pos + n].copy()
+        first = self.capacity - pos
+        return np.concatenate([self._data[pos:], self._data[:n - first]])
+
+class StreamingMelExtractor:
+    """
+    Incremental version of extract_features for live audio at SAMPLE_RATE.
+
+    Samples are pushed as they arrive; every time a DURATION-second window
+    completes (windows start every `hop_seconds`) its (N_MELS, T) log-mel
+    features are produced, matching extract_features on the same normalized
+    window.
+
+    Consecutive windows overlap, so the mel power of every STFT frame that
+    lies fully inside the stream is computed once and cached by its absolute
+    frame index. Only the two edge frames of each window, which depend on the
+    window's zero padding, are recomputed per window. Peak normalization is
+    applied to the cached mel power (scaling by 1 / peak^2), which is
+    equivalent to normalizing the waveform first.
+    """
+    def __init__(self, hop_seconds: float = 1.0):
+        # Window starts must land on the STFT frame grid so frames can be shared
+        hop = int(round(hop_seconds * SAMPLE_RATE / HOP_LENGTH)) * HOP_LENGTH
+        self.hop_samples = min(max(HOP_LENGTH, hop), WINDOW_SAMPLES)
+        self.buffer = RingBuffer(WINDOW_SAMPLES + self.hop_samples + N_FFT)
+        self.next_start = 0
+        self._frame_cache = {}
+        # Same cached window/filterbank as the batch front end
+        self._front_end = get_front_end()
+        self._window = self._front_end.window.numpy()
+        self._mel_basis = self._front_end.mel_basis.numpy()
+
+    @property
+    def hop_seconds(self) -> float:
+        return self.hop_samples / SAMPLE_RATE
+
+    def push(self, samples: np.ndarray) -> list:
+        """
+        Appends mono float samples at SAMPLE_RATE.
+        Returns a list of (start_seconds, features, peak) for each window completed by this chunk.
+        """
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        windows = []
+        # Write in hop-sized pieces so a large chunk never overruns unprocessed samples
+        for i in range(0, len(samples), self.hop_samples):
+            self.buffer.write(samples[i:i + self.hop_samples])
+            while self.next_start + WINDOW_SAMPLES <= self.buffer.total:
+                windows.append(self._emit_window(self.next_start))
+                self.next_start += self.hop_samples
+        return windows
+
+    def _mel_power(self, frames: np.ndarray) -> np.ndarray:
+        spectrum = np.fft.rfft(frames * self._window, axis=-1)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        return self._mel_basis @ power.T  # (N_MELS, n_frames)
+
+    def _emit_window(self, start: int):
+        segment = self.buffer.read(start, start + WINDOW_SAMPLES)
+        first_frame = start // HOP_LENGTH
+
+        # Interior frames k = 1 .. FRAMES_PER_WINDOW - 2 only touch samples inside the window
+        interior = range(1, FRAMES_PER_WINDOW - 1)
+        missing = [k for k in interior if first_frame + k not in self._frame_cache]
+        if missing:
+            frames = np.lib.stride_tricks.sliding_window_view(segment, N_FFT)[::HOP_LENGTH]
+            mel = self._mel_power(frames[[k - 1 for k in missing]])
+            for col, k in enumerate(missing):
+                self._frame_cache[first_frame + k] = mel[:, col]
+
+        # Edge frames see the zero padding of center=True, so they are window specific
+        half = N_FFT // 2
+        zeros = np.zeros(half, dtype=np.float32)
+        edges = np.stack([
+            np.concatenate([zeros, segment[:half]]),
+            np.concatenate([segment[-half:], zeros])
+        ])
+        edge_mel = self._mel_power(edges)
+
+        mel_spec = np.empty((N_MELS, FRAMES_PER_WINDOW), dtype=np.float32)
+        mel_spec[:, 0] = edge_mel[:, 0]
+        for k in interior:
+            mel_spec[:, k] = self._frame_cache[first_frame + k]
+        mel_spec[:, -1] = edge_mel[:, 1]
+
+        # Frames before the next window's first interior frame will never be reused
+        next_first = (start + self.hop_samples) // HOP_LENGTH + 1
+        for j in [j for j in self._frame_cache if j < next_first]:
+            del self._frame_cache[j]
+
+        peak = float(np.max(np.abs(segment)))
+        if peak > 0:
+            mel_spec /= peak ** 2
+        features = self._front_end.power_to_db(torch.from_numpy(mel_spec)).numpy()
+        return start / SAMPLE_RATE, features, peak
+
+def decode_chunk(chunk: bytes, fmt: str, channels: int = 1) -> np.ndarray:
+    """
+    Decodes one WebSocket audio message into mono float32 samples.
+    pcm16/float32 are raw little-endian interleaved samples; encoded chunks must
+    be self-contained files (e.g. a short WAV/MP3 segment) and are resampled here.
+    """
+    if fmt == "pcm16":
+        y = np.frombuffer(chunk[:len(chunk) - len(chunk) % 2], dtype="<i2").astype(np.float32) / 32768.0
+    elif fmt == "float32":
+        y = np.frombuffer(chunk[:len(chunk) - len(chunk) % 4], dtype="<f4").astype(np.float32)
+    elif fmt == "encoded":
+        import librosa  # Only encoded chunks need it, and it is slow to import
+        try:
+            with io.BytesIO(chunk) as f:
+                y, _ = librosa.load(f, sr=SAMPLE_RATE, mono=True)
+        except Exception as e:
+            logger.warning(f"Could not decode audio chunk: {e!r}")
+            raise ValueError("Unsupported or corrupt audio") from e
+        return y.astype(np.float32)
+    else:
+        raise ValueError(f"Unknown stream format '{fmt}'. Expected one of {STREAM_FORMATS}")
+
+    if channels > 1:
+        y = y[:len(y) - len(y) % channels].reshape(-1, channels).mean(axis=1)
+    return y
+
+class StreamSession:
+    """
+    Per-connection state of a streaming classification: decoding, optional
+    resampling to SAMPLE_RATE, the incremental mel extractor and the rolling
+    verdict over the most recent windows.
+    """
+    def __init__(self, fmt: str = "pcm16", sample_rate: int = SAMPLE_RATE, channels: int = 1,
+                 hop_seconds: float = 1.0, rolling_windows: int = 5):
+        if fmt not in STREAM_FORMATS:
+            raise ValueError(f"Unknown stream format '{fmt}'. Expected one of {STREAM_FORMATS}")
+        if int(sample_rate) <= 0 or int(channels) <= 0 or int(rolling_windows) <= 0:
+            raise ValueError("sample_rate, channels and rolling_windows must be positive")
+        self.format = fmt
+        self.sample_rate = int(sample_rate)
+        self.channels = int(channels)
+        self.extractor = StreamingMelExtractor(hop_seconds=float(hop_seconds))
+        self.rolling_windows = int(rolling_windows)
+        self.recent = deque(maxlen=self.rolling_windows)
+        # Running totals so long calls don't keep every window's probability
+        self.windows = 0
+        self.prob_sum = 0.0
+        self.prob_max = 0.0
+        self._resampler = None
+        if fmt != "encoded" and self.sample_rate != SAMPLE_RATE:
+            import soxr
+            self._resampler = soxr.ResampleStream(self.sample_rate, SAMPLE_RATE, 1, dtype="float32")
+
+    def config(self) -> dict:
+        return {
+            "format": self.format,
+            "sample_rate": self.sample_rate,
+            "channels": self.channels,
+            "hop_seconds": self.extractor.hop_seconds,
+            "window_seconds": DURATION,
+            "rolling_windows": self.rolling_windows
+        }
+
+    def feed(self, chunk: bytes) -> list:
+        """
+        Decodes one audio message and returns the windows it completed.
+        """
+        y = decode_chunk(chunk, self.format, self.channels)
+        if self._resampler is not None:
+            y = self._resampler.resample_chunk(y)
+        return self.extractor.push(y)
+
+    def flush(self) -> list:
+        """
+        Called at the end of the stream: drains the samples the resampler is
+        still holding back and returns the windows they completed.
+        """
+        if self._resampler is None:
+            return []
+        y = self._resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+        return self.extractor.push(y)
+
+    def update(self, prob: float) -> dict:
+        """
+        Records a window probability and returns the rolling verdict.
+        """
+        self.recent.append(prob)
+        self.windows += 1
+        self.prob_sum += prob
+        self.prob_max = max(self.prob_max, prob)
+        rolling = float(np.mean(self.recent))
+        label = "AI_GENERATED" if rolling > 0.5 else "HUMAN"
+        confidence = rolling if label == "AI_GENERATED" else 1.0 - rolling
+        return {
+            "classification": label,
+            "confidenceScore": round(confidence, 4),
+            "windows": len(self.recent)
+        }
+
+    def summary(self) -> dict:
+        if not self.windows:
+            return {"windows": 0}
+        mean = self.prob_sum / self.windows
+        label = "AI_GENERATED" if mean > 0.5 else "HUMAN"
+        return {
+            "windows": self.windows,
+            "classification": label,
+            "confidenceScore": round(mean if label == "AI_GENERATED" else 1.0 - mean, 4),
+            "maxAiProbability": round(self.prob_max, 4)
+        }
@@ -0,0 +1,207 @@
+import asyncio
+import os
+import functools
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from . import metrics
+from .admission import check_deadline
+
+BACKENDS = ("thread", "process")
+
+def _init_process_worker(num_threads: int, warmup_batch_sizes: tuple, model_path: str = None):
+    """
+    Runs once in every process-pool worker: each worker owns its own model copy
+    (of model_path, defaulting to MODEL_PATH).
+    """
+    import torch
+    from app.inference import load_model, warmup_model, warmup_pipeline
+    from app.logs import configure_logging
+    configure_logging()
+    # Stage timings are shipped back to the API process with every result
+    metrics.enable_buffering()
+    torch.set_num_threads(num_threads)
+    load_model(model_path)
+    warmup_model(warmup_batch_sizes)
+    warmup_pipeline()
+
+def _ping():
+    return os.getpid()
+
+def _call_with_metrics(fn, *args):
+    """
+    Process-pool trampoline: runs fn and returns its result (or exception) with
+    the metric observations it produced, so failed calls are still accounted for.
+    """
+    try:
+        return fn(*args), None, metrics.drain_buffer()
+    except Exception as e:
+        return None, e, metrics.drain_buffer()
+
+def _run_before_deadline(deadline, fn, *args):
+    """
+    Skips the job if it sat in the executor queue past its deadline
+    (time.monotonic is system-wide, so this also holds in pool processes).
+    """
+    check_deadline(deadline, "processing")
+    return fn(*args)
+
+class InferencePool:
+    """
+    Execution backend for the CPU-bound parts of the pipeline (decode, mel
+    extraction, forward pass) so they never run on the asyncio event loop.
+
+    - "thread": a thread pool sharing the process' model (torch and the audio
+      libraries release the GIL for the heavy lifting).
+    - "process": a process pool with one model copy per worker.
+
+    At most `workers + queue_size` jobs are admitted at once; further callers
+    wait for a slot instead of growing the executor's internal queue forever.
+
+    Jobs run on a specific ServedModel (`model=`, default: the current one).
+    The thread backend passes it to fn. The process backend routes the job to
+    the workers that loaded that model. After a reload, the old workers stay
+    up until the last request pinned to the old model (see pinned) is done.
+    """
+    def __init__(self, backend: str = "thread", workers: int = None, queue_size: int = 64):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown inference backend '{backend}'. Expected one of {BACKENDS}")
+        self.backend = backend
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self.queue_size = max(0, int(queue_size))
+        self._executor = None
+        self._model = None      # ServedModel the current executor's workers loaded
+        self._retired = {}      # Replaced ServedModel -> executor kept for requests pinned to it
+        self._pins = {}         # ServedModel -> requests using it
+        self._slots = None
+        self._warmup_batch_sizes = (1,)
+
+    def _create_executor(self, model_path: str = None):
+        if self.backend == "process":
+            import torch
+            # spawn: forking a process that already initialized torch/OpenMP is unsafe.
+            # Workers split this API process' thread budget (and inherit its core pinning).
+            threads = max(1, torch.get_num_threads() // self.workers)
+            return ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_process_worker,
+                initargs=(threads, self._warmup_batch_sizes, model_path)
+            )
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+
+    def start(self, warmup_batch_sizes: tuple = (1,), model=None):
+        """
+        model is the ServedModel the workers serve (the process backend's workers load it from MODEL_PATH).
+        """
+        self._warmup_batch_sizes = tuple(warmup_batch_sizes)
+        self._executor = self._create_executor()
+        self._model = model
+        self._slots = asyncio.Semaphore(self.workers + self.queue_size)
+
+    async def reload(self, model):
+        """
+        Switches the pool to model (a ServedModel); call publish_model right
+        after it returns, without awaiting anything in between.
+        Process backend: starts a fresh set of workers on model.path and waits
+        until all of them have loaded and warmed it up. Requests pinned to the
+        previous model keep running on the old workers, which shut down once
+        the last of them is done. If the new workers fail to start, the old
+        ones keep serving and the error is raised.
+        The thread backend runs whatever model it is given, so only the default changes.
+        """
+        if self.backend != "process" or self._executor is None:
+            self._model = model
+            return
+        executor = self._create_executor(model.path)
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.gather(*(loop.run_in_executor(executor, _ping) for _ in range(self.workers)))
+        except Exception:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        previous, self._executor = self._executor, executor
+        previous_model, self._model = self._model, model
+        if self._pins.get(previous_model):
+            self._retired[previous_model] = previous
+        else:
+            self._shutdown_in_background(previous)
+
+    def _shutdown_in_background(self, executor):
+        asyncio.get_running_loop().run_in_executor(None, lambda: executor.shutdown(wait=True))
+
+    @contextmanager
+    def pinned(self, model):
+        """
+        Marks a request as using model for its whole duration, so a reload
+        doesn't take model's workers away before the request is done.
+        """
+        self._pins[model] = self._pins.get(model, 0) + 1
+        try:
+            yield model
+        finally:
+            self._pins[model] -= 1
+            if not self._pins[model]:
+                del self._pins[model]
+                executor = self._retired.pop(model, None)
+                if executor is not None:
+                    self._shutdown_in_background(executor)
+
+    def _executor_for(self, model):
+        if model is None or model is self._model:
+            return self._executor
+        executor = self._retired.get(model)
+        if executor is None:
+            raise RuntimeError(f"Model {model.version} is no longer served; pin it for the duration of the request")
+        return executor
+
+    async def run(self, fn, *args, deadline: float = None, model=None):
+        """
+        Runs fn(*args) on the pool and awaits the result; fn must accept a
+        `model` keyword (a ServedModel, or None for the current one).
+        For the process backend fn and args must be picklable (module-level
+        functions); the job goes to the workers serving model and fn is called
+        without it (each worker process has its own copy).
+        With a deadline (time.monotonic), the job is dropped with DeadlineExceeded
+        instead of starting once the deadline has passed.
+        """
+        if self._executor is None:
+            raise RuntimeError("Inference pool not started")
+        async with self._slots:
+            check_deadline(deadline, "processing")
+            loop = asyncio.get_running_loop()
+            if self.backend == "process":
+                result, error, observations = await loop.run_in_executor(
+                    self._executor_for(model), _call_with_metrics, _run_before_deadline, deadline, fn, *args)
+                metrics.replay(observations)
+                if error is not None:
+                    raise error
+                return result
+            return await loop.run_in_executor(self._executor, _run_before_deadline, deadline,
+                                              functools.partial(fn, model=model or self._model), *args)
+
+    async def warmup(self):
+        """
+        Process backend: workers are spawned lazily, so submit one job per worker
+        at once to start (and warm up) all of them before serving traffic.
+        """
+        if self.backend != "process" or self._executor is None:
+            return
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._executor, _ping) for _ in range(self.workers)))
+
+    async def shutdown(self):
+        """
+        Graceful shutdown: lets queued and running jobs finish, then releases the workers.
+        """
+        if self._executor is None:
+            return
+        executors = [self._executor, *self._retired.values()]
+        self._executor = None
+        self._retired.clear()
+        loop = asyncio.get_running_loop()
+        for executor in executors:
+            await loop.run_in_executor(None, lambda: executor.shutdown(wait=True))
+
+    def info(self) -> dict:
+        return {"backend": self.backend, "workers": self.workers, "queue_size": self.queue_size}
@@ -0,0 +1,102 @@
+import os
+import sys
+import time
+import socket
+import argparse
+import statistics
+import subprocess
+import requests
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_AUDIO = os.path.join(ROOT, "Sample_audio.mp3")
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def measure_once(audio: bytes, api_key: str, timeout: float, env: dict) -> dict:
+    """
+    Boots a fresh server process and measures:
+    - health: process start -> first 200 from /health (imports, model load, warmup)
+    - first_prediction: process start -> first /detect-voice/upload response
+    - steady_prediction: latency of a second, uncached prediction (different bytes)
+    """
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    try:
+        health = None
+        while health is None:
+            if proc.poll() is not None:
+                raise RuntimeError(f"Server exited during startup:\n{proc.stderr.read().decode(errors='replace')[-2000:]}")
+            if time.perf_counter() - start > timeout:
+                raise RuntimeError(f"/health did not respond within {timeout}s")
+            try:
+                if requests.get(f"{base}/health", timeout=1).status_code == 200:
+                    health = time.perf_counter() - start
+            except requests.RequestException:
+                time.sleep(0.02)
+
+        headers = {"x-api-key": api_key, "Content-Type": "audio/mpeg"}
+        r = requests.post(f"{base}/detect-voice/upload", data=audio, headers=headers, timeout=timeout)
+        r.raise_for_status()
+        first = time.perf_counter() - start
+
+        # Extra trailing bytes change the cache key but not the decoded audio
+        t = time.perf_counter()
+        r = requests.post(f"{base}/detect-voice/upload", data=audio + b"\0" * 16, headers=headers, timeout=timeout)
+        r.raise_for_status()
+        steady = time.perf_counter() - t
+        return {"health": health, "first_prediction": first, "first_request": first - health, "steady_prediction": steady}
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure time-to-first-/health and time-to-first-prediction of a fresh server")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--audio", default=DEFAULT_AUDIO)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--max-health", type=float, default=None, help="Exit non-zero if median time-to-/health (s) exceeds this")
+    parser.add_argument("--max-first-prediction", type=float, default=None,
+                        help="Exit non-zero if median time-to-first-prediction (s) exceeds this")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    api_key = env.setdefault("API_KEY", "benchmark-key")
+    env.setdefault("LOG_LEVEL", "WARNING")
+    # Every run must be cold: no shared on-disk result cache
+    env.pop("RESULT_CACHE_PATH", None)
+    with open(args.audio, "rb") as f:
+        audio = f.read()
+
+    runs = []
+    for i in range(args.runs):
+        r = measure_once(audio, api_key, args.timeout, env)
+        runs.append(r)
+        print(f"Run {i+1}: health {r['health']:.2f}s | first prediction {r['first_prediction']:.2f}s "
+              f"(request {r['first_request']*1000:.0f} ms) | steady prediction {r['steady_prediction']*1000:.0f} ms")
+
+    median = {k: statistics.median(r[k] for r in runs) for k in runs[0]}
+    print("\n" + "="*30)
+    print("STARTUP (median)")
+    print(f"Time to /health:          {median['health']:.2f}s")
+    print(f"Time to first prediction: {median['first_prediction']:.2f}s")
+    print(f"First request latency:    {median['first_request']*1000:.0f} ms")
+    print(f"Steady request latency:   {median['steady_prediction']*1000:.0f} ms")
+    print("="*30)
+
+    failed = (args.max_health is not None and median["health"] > args.max_health) or \
+             (args.max_first_prediction is not None and median["first_prediction"] > args.max_first_prediction)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,70 +1,122 @@
 import torch
-from torch.utils.data import DataLoader
 import os
 import sys
-import glob
 import random
+import time
+import io
+import copy
+import argparse
 
 # Add parent dir to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from app.model import VoiceDetectorCNN
-from training.dataset import VoiceDataset
+from app.model import load_checkpoint
+from training.dataset import VoiceDataset, VoiceLoader
+from training.manifest import load_splits
+from app.quantization import quantize_model
 
 # Config (Must match train.py logic for reproduction)
 BATCH_SIZE = 8
 DATA_DIR = r"c:\Users\Alex\Desktop\Antigravity\AIVoiceDetection\data"
 MODEL_PATH = r"c:\Users\Alex\Desktop\Antigravity\AIVoiceDetection\model.pth"
 
-def evaluate():
+def run_model(model, batches):
+    """
+    Runs model over pre-featurized batches. Returns (probabilities, forward seconds per batch).
+    """
+    probs, timings = [], []
+    with torch.no_grad():
+        model(batches[0][0])  # warm-up
+        for data, _ in batches:
+            start = time.perf_counter()
+            output = model(data)
+            timings.append(time.perf_counter() - start)
+            probs.append(torch.sigmoid(output).view(-1))
+    return torch.cat(probs), timings
+
+def model_size_mb(model) -> float:
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.getbuffer().nbytes / 1e6
+
+def compare_models(variants, val_loader):
+    """
+    Side-by-side accuracy, size and CPU latency of several models (e.g. the
+    float32 teacher, a distilled student, INT8 variants), all evaluated on the
+    same features. The first variant is the reference for agreement and speedup.
+    """
+    print("Featurizing test set...")
+    batches = [(data, target) for data, target in val_loader]
+    targets = torch.cat([target for _, target in batches])
+
+    rows = []
+    ref_probs, ref_ms = None, None
+    for name, model in variants:
+        probs, timings = run_model(model, batches)
+        ms_batch = 1000 * sum(timings) / len(timings)
+        if ref_probs is None:
+            ref_probs, ref_ms = probs, ms_batch
+        rows.append({
+            "model": name,
+            "accuracy": ((probs > 0.5).float() == targets).float().mean().item(),
+            "agreement": ((probs > 0.5) == (ref_probs > 0.5)).float().mean().item(),
+            "max_dprob": (probs - ref_probs).abs().max().item(),
+            "size_mb": model_size_mb(model),
+            "ms_batch": ms_batch,
+            "ms_clip": 1000 * sum(timings) / len(targets),
+            "speedup": ref_ms / ms_batch
+        })
+
+    print("\n" + "="*104)
+    print(f"{'Model':<24}{'Accuracy':>10}{'Agree w/ ref':>14}{'Max |dProb|':>13}{'Size MB':>10}"
+          f"{'ms/batch':>11}{'ms/clip':>10}{'Speedup':>10}")
+    for r in rows:
+        print(f"{r['model']:<24}{r['accuracy']*100:>9.2f}%{r['agreement']*100:>13.2f}%{r['max_dprob']:>13.4f}"
+              f"{r['size_mb']:>10.2f}{r['ms_batch']:>11.2f}{r['ms_clip']:>10.2f}{r['speedup']:>9.2f}x")
+    print("="*104 + "\n")
+    return rows
+
+def evaluate(quantize=None, calibration_samples=32, compare=None):
     print("Initializing evaluation...")
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    # Latency comparisons (and quantized kernels) are CPU only, like serving
+    device = torch.device("cuda" if torch.cuda.is_available() and not (quantize or compare) else "cpu")
     
     # 1. Reproduce Data Split
     random.seed(42)
     torch.manual_seed(42)
     
-    human_dir = os.path.join(DATA_DIR, "human")
-    ai_dir = os.path.join(DATA_DIR, "ai")
-    
-    # Matches the updated train.py logic
-    supported_exts = ('.wav', '.mp3', '.flac', '.ogg')
-    
-    human_files = []
-    for root, dirs, files in os.walk(human_dir):
-        for file in files:
-            if file.lower().endswith(supported_exts):
-                human_files.append(os.path.join(root, file))
-                
-    ai_files = []
-    for root, dirs, files in os.walk(ai_dir):
-        for file in files:
-            if file.lower().endswith(supported_exts):
-                ai_files.append(os.path.join(root, file))
-                
-    if not human_files or not ai_files:
+    # The held-out split recorded in the dataset manifest, the same one train.py validates on
+    train_files, val_files = load_splits(DATA_DIR)
+    if not any(label == 0 for _, label in val_files) or not any(label == 1 for _, label in val_files):
         print("Error: Could not find data files.")
         return
-
-    all_files = [(f, 0) for f in human_files] + [(f, 1) for f in ai_files]
-    random.shuffle(all_files)
-    
-    val_count = int(0.2 * len(all_files))
-    val_files = all_files[:val_count]  # This is the test set
     
     print(f"Evaluating on {len(val_files)} held-out test samples.")
     
     # 2. Setup Loader
     val_dataset = VoiceDataset(file_list=val_files, train=False)
-    val_loader = DataLoader(val_dataset, batch_size=BATCH_SIZE, shuffle=False)
+    val_loader = VoiceLoader(val_dataset, batch_size=BATCH_SIZE, shuffle=False)
     
     # 3. Load Model
     if not os.path.exists(MODEL_PATH):
         print("Error: model.pth not found. Train first.")
         return
         
-    model = VoiceDetectorCNN().to(device)
-    model.load_state_dict(torch.load(MODEL_PATH, map_location=device))
-    model.eval()
+    model, arch = load_checkpoint(MODEL_PATH, map_location=device)
+    model = model.to(device)
+
+    if quantize or compare:
+        variants = [(f"{arch}-fp32", model)]
+        for path in compare or []:
+            other, other_arch = load_checkpoint(path)
+            variants.append((f"{other_arch}-fp32", other))
+        if quantize:
+            # Calibrate on training clips only, never on the test set
+            calibration = random.Random(0).sample([f for f, _ in train_files], min(calibration_samples, len(train_files)))
+            for mode in (["dynamic", "static"] if quantize == "all" else [quantize]):
+                print(f"Quantizing ({mode})...")
+                variants.append((f"{arch}-int8-{mode}", quantize_model(copy.deepcopy(model), mode, files=calibration)))
+        compare_models(variants, val_loader)
+        return
     
     # 4. Evaluation Loop
     correct = 0
@@ -90,4 +142,12 @@ def evaluate():
     print("="*30 + "\n")
 
 if __name__ == "__main__":
-    evaluate()
+    parser = argparse.ArgumentParser(description="Evaluate the voice detector on the held-out split")
+    parser.add_argument("--quantize", choices=["dynamic", "static", "all"], default=None,
+                        help="Also evaluate INT8 variants and report accuracy/latency next to float32")
+    parser.add_argument("--calibration-samples", type=int, default=32,
+                        help="Training clips used to calibrate static quantization")
+    parser.add_argument("--compare", nargs="+", metavar="CHECKPOINT", default=None,
+                        help="Other checkpoints (e.g. a distilled compact model) to report next to model.pth")
+    args = parser.parse_args()
+    evaluate(args.quantize, args.calibration_samples, args.compare)
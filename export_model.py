@@ -0,0 +1,43 @@
+import os
+import sys
+import argparse
+import torch
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from app.model import load_checkpoint
+from app.backends import export_onnx, trace_torchscript, example_input, OnnxRunner
+from app.inference import MODEL_PATH, ONNX_MODEL_PATH
+
+def export(fmt: str, model_path: str, output: str):
+    if not os.path.exists(model_path):
+        print(f"Error: {model_path} not found. Train first.")
+        return
+
+    model, arch = load_checkpoint(model_path)
+
+    if fmt == "onnx":
+        export_onnx(model, output)
+    else:
+        torch.jit.save(trace_torchscript(model, optimize=False), output)
+    print(f"Exported {arch} model as {fmt} to {output}")
+
+    # Parity check against the eager model on a random batch
+    x = torch.randn(4, *example_input().shape[1:])
+    with torch.no_grad():
+        expected = torch.sigmoid(model(x))
+        try:
+            exported = OnnxRunner(output) if fmt == "onnx" else torch.jit.load(output)
+        except ImportError:
+            print("onnxruntime not installed, skipping parity check.")
+            return
+        actual = torch.sigmoid(exported(x))
+    print(f"Max probability difference vs eager: {(expected - actual).abs().max().item():.2e}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the trained model for the onnx backend (or as TorchScript)")
+    parser.add_argument("--format", choices=["onnx", "torchscript"], default="onnx")
+    parser.add_argument("--model", default=MODEL_PATH, help="Trained float32 checkpoint")
+    parser.add_argument("--output", default=None, help="Defaults to ONNX_MODEL_PATH (or model path with .ts for TorchScript)")
+    args = parser.parse_args()
+    output = args.output or (ONNX_MODEL_PATH if args.format == "onnx" else os.path.splitext(args.model)[0] + ".ts")
+    export(args.format, args.model, output)
@@ -1,14 +1,15 @@
-import sys
 import os
 import base64
-from app.inference import load_model, predict_voice
+import argparse
+from app.inference import load_model, predict_voice, analyze_voice
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python predict.py <path_to_audio_file>")
-        return
-
-    file_path = sys.argv[1]
+    parser = argparse.ArgumentParser(description="Classify an audio file as human or AI-generated")
+    parser.add_argument("file_path", help="Path to the audio file")
+    parser.add_argument("--full", action="store_true",
+                        help="Score windows across the whole clip instead of only the first seconds")
+    args = parser.parse_args()
+    file_path = args.file_path
     
     if not os.path.exists(file_path):
         print(f"Error: File not found: {file_path}")
@@ -26,11 +27,13 @@ def main():
         
     # 3. Predict
     try:
-        result = predict_voice(base64_str)
+        result = analyze_voice(base64_str) if args.full else predict_voice(base64_str)
         
         print("\n" + "="*30)
         print(f"RESULT: {result['classification']}")
         print(f"Confidence: {result['confidence'] * 100:.2f}%")
+        for segment in result.get("segments", []):
+            print(f"  {segment['start']:7.2f}s - {segment['end']:7.2f}s  {segment['classification']}")
         print("="*30 + "\n")
         
     except Exception as e:
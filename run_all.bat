@@ -19,6 +19,13 @@ if %errorlevel% neq 0 (
     exit /b %errorlevel%
 )
 
+echo Building Feature Store...
+"%VENV_PYTHON%" training/feature_store.py
+if %errorlevel% neq 0 (
+    echo Failed to build feature store
+    exit /b %errorlevel%
+)
+
 echo Training Model...
 "%VENV_PYTHON%" training/train.py
 if %errorlevel% neq 0 (
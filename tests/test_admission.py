@@ -0,0 +1,66 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.admission import AdmissionController, DeadlineExceeded, Overloaded, check_deadline
+
+def test_requests_beyond_concurrency_wait_in_fifo_order():
+    order = []
+
+    async def request(controller, name, hold):
+        async with controller.admit():
+            order.append(name)
+            await asyncio.sleep(hold)
+
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=3)
+        first = asyncio.ensure_future(request(controller, "a", 0.05))
+        await asyncio.sleep(0)
+        waiting = [asyncio.ensure_future(request(controller, name, 0)) for name in "bcd"]
+        await asyncio.sleep(0.01)
+        queued = controller.queued
+        await asyncio.gather(first, *waiting)
+        return queued, controller.stats()
+
+    queued, stats = asyncio.run(scenario())
+    assert queued == 3
+    assert order == ["a", "b", "c", "d"]
+    assert stats["active"] == 0 and stats["queued"] == 0
+
+def test_full_queue_is_rejected_immediately_with_retry_after():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=0, retry_after=7)
+        async with controller.admit():
+            with pytest.raises(Overloaded) as rejected:
+                async with controller.admit():
+                    pass
+        return rejected.value, controller.stats()
+
+    rejected, stats = asyncio.run(scenario())
+    assert rejected.retry_after == 7
+    assert stats["rejected"] == 1 and stats["active"] == 0
+
+def test_waiting_request_leaves_the_queue_when_its_deadline_passes():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=4)
+        async with controller.admit():
+            with pytest.raises(DeadlineExceeded):
+                async with controller.admit(deadline=time.monotonic() + 0.02):
+                    pass
+            queued = controller.queued
+        return queued, controller.stats()
+
+    queued, stats = asyncio.run(scenario())
+    assert queued == 0
+    assert stats["expired_in_queue"] == 1 and stats["active"] == 0
+
+def test_check_deadline():
+    check_deadline(None, "decode")
+    check_deadline(time.monotonic() + 10, "decode")
+    with pytest.raises(DeadlineExceeded) as late:
+        check_deadline(time.monotonic() - 1, "model")
+    assert late.value.stage == "model"
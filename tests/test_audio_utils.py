@@ -0,0 +1,62 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.audio_utils import preprocess_audio
+from app.inference import prepare_windows
+from app.streaming import decode_chunk
+
+GARBAGE = b"definitely not audio" * 16
+
+@pytest.mark.parametrize("decode", [preprocess_audio, prepare_windows, lambda b: decode_chunk(b, "encoded")])
+def test_undecodable_audio_gets_a_fixed_message(decode):
+    with pytest.raises(ValueError) as raised:
+        decode(GARBAGE)
+    assert str(raised.value) == "Unsupported or corrupt audio"
+
+def test_capped_windows_still_reach_the_end_of_the_clip():
+    import numpy as np
+    from app.audio_utils import window_features, SAMPLE_RATE, DURATION
+    y = np.random.default_rng(0).uniform(-1, 1, 60 * SAMPLE_RATE).astype(np.float32)
+    # A 2 s hop would need 29 windows; 4 are spread over the whole minute instead of covering the first 10 s
+    features, starts = window_features(y, 2 * SAMPLE_RATE, max_windows=4)
+    assert len(starts) == features.shape[0] == 4
+    assert starts[0] == 0.0 and starts[-1] == 60 - DURATION
+    # Below the cap the hop grid is kept, plus an end-aligned window
+    features, starts = window_features(y[:11 * SAMPLE_RATE], 2 * SAMPLE_RATE, max_windows=16)
+    assert starts == [0.0, 2.0, 4.0, 6.0, 7.0]
+
+def wav_bytes(y, sr):
+    import io
+    import soundfile as sf
+    buffer = io.BytesIO()
+    sf.write(buffer, y, sr, format="WAV", subtype="FLOAT")
+    return buffer.getvalue()
+
+def test_partial_decode_reads_only_the_needed_prefix():
+    import numpy as np
+    from app.audio_utils import decode_audio, RESAMPLE_MARGIN_SECONDS
+    sr = 44100
+    y = np.random.default_rng(0).uniform(-0.1, 0.1, 60 * sr).astype(np.float32)
+    decoded, decoded_sr = decode_audio(wav_bytes(y, sr), max_seconds=4)
+    assert decoded_sr == sr
+    assert len(decoded) == int(np.ceil((4 + RESAMPLE_MARGIN_SECONDS) * sr))
+    np.testing.assert_allclose(decoded, y[:len(decoded)])
+
+def test_preprocess_normalizes_the_kept_segment_only():
+    import numpy as np
+    from app.audio_utils import load_waveform, SAMPLE_RATE, DURATION
+    sr = 22050
+    t = np.arange(30 * sr) / sr
+    y = (0.25 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+    y[10 * sr:] *= 4  # A loud tail after the kept segment must not change its normalization
+    audio = wav_bytes(y, sr)
+    processed = preprocess_audio(audio)
+    assert len(processed) == SAMPLE_RATE * DURATION
+    assert abs(np.max(np.abs(processed)) - 1.0) < 1e-6
+    # Same samples as resampling the whole file and cutting afterwards (the resampler margin hides the cut)
+    import librosa
+    full = librosa.resample(y, orig_sr=sr, target_sr=SAMPLE_RATE, res_type="soxr_hq")[:SAMPLE_RATE * DURATION]
+    np.testing.assert_allclose(load_waveform(audio, DURATION), full, atol=1e-4)
@@ -0,0 +1,51 @@
+import os
+import sys
+
+import pytest
+import torch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.backends import build_runner, example_input, warmup, INPUT_SHAPE
+from app.model import build_model
+
+@pytest.fixture(scope="module")
+def model():
+    torch.manual_seed(0)
+    return build_model("compact").eval()
+
+def test_input_shape_matches_the_features():
+    from app.audio_utils import extract_features, SAMPLE_RATE, DURATION
+    import numpy as np
+    features = extract_features(np.zeros(SAMPLE_RATE * DURATION, dtype=np.float32))
+    assert (1, 1) + features.shape == INPUT_SHAPE
+
+def test_torchscript_runner_matches_eager(model):
+    runner = build_runner(model, "torchscript")
+    # Traced on batch 1, but the batch dimension stays dynamic
+    x = torch.randn(3, *INPUT_SHAPE[1:])
+    with torch.no_grad():
+        torch.testing.assert_close(runner(x), model(x), atol=1e-4, rtol=1e-4)
+
+def test_eager_runner_is_the_model_and_warmup_runs_every_size(model):
+    calls = []
+    assert build_runner(model, "eager") is model
+    warmup(lambda x: calls.append(x.shape[0]), batch_sizes=(1, 4), iterations=2)
+    assert calls == [1, 1, 4, 4]
+
+def test_onnx_needs_an_exported_graph_and_unknown_backends_fail(model):
+    with pytest.raises(ValueError):
+        build_runner(model, "onnx")
+    with pytest.raises(ValueError):
+        build_runner(model, "tensorrt")
+
+def test_onnx_runner_matches_eager(model, tmp_path):
+    pytest.importorskip("onnx")
+    pytest.importorskip("onnxruntime")
+    from app.backends import export_onnx
+    path = str(tmp_path / "model.onnx")
+    export_onnx(model, path)
+    runner = build_runner(model, "onnx", path)
+    x = torch.randn(2, *INPUT_SHAPE[1:])
+    with torch.no_grad():
+        torch.testing.assert_close(runner(x), model(x), atol=1e-4, rtol=1e-4)
+    assert example_input(2).shape == x.shape
@@ -0,0 +1,58 @@
+import os
+import sys
+
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.main import app, API_KEY, API_KEY_NAME
+
+# No lifespan: these requests are rejected before anything touches the model
+client = TestClient(app)
+HEADERS = {API_KEY_NAME: API_KEY, "Content-Type": "application/json"}
+
+def test_batch_malformed_json_is_422_without_echoing_input():
+    payload = '{"clips": [{"audio_base64": "UklGRiQAAABXQVZF"'
+    response = client.post("/detect-voice/batch", content=payload, headers=HEADERS)
+    assert response.status_code == 422
+    assert "UklGRiQAAABXQVZF" not in response.text
+    assert all("input" not in error for error in response.json()["detail"])
+
+def test_batch_invalid_clips_is_422_without_echoing_input():
+    response = client.post("/detect-voice/batch", json={"clips": "UklGRiQAAABXQVZF"}, headers=HEADERS)
+    assert response.status_code == 422
+    assert "UklGRiQAAABXQVZF" not in response.text
+
+def test_batch_empty_clips_is_400():
+    response = client.post("/detect-voice/batch", json={"clips": []}, headers=HEADERS)
+    assert response.status_code == 400
+    assert "Missing audio content" in response.json()["detail"]
+
+def test_batch_bad_clip_is_counted_as_400():
+    from app import metrics
+    response = client.post("/detect-voice/batch", json={"clips": [{"id": "a", "audio_base64": "!!not base64!!"}]},
+                           headers=HEADERS)
+    assert response.status_code == 200
+    assert '"status": "error"' in response.text
+    rendered = "\n".join(metrics.REQUESTS_TOTAL.render())
+    assert 'voice_requests_total{endpoint="batch",status="400"}' in rendered
+    assert 'voice_requests_total{endpoint="batch",status="500"}' not in rendered
+
+def test_batch_clips_go_through_admission_control(monkeypatch):
+    import json
+    from app import main, inference
+    from app.admission import AdmissionController
+    from app.inference import ServedModel
+    # Every slot taken and no queue: each clip is shed on its own line, like a single-clip request would be
+    full = AdmissionController(max_concurrency=1, max_queue=0)
+    full.active = 1
+    monkeypatch.setattr(main, "admission", full)
+    monkeypatch.setattr(inference, "served", ServedModel(None, None, "eager", "resnet18", "v"))
+    with open(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample_base64.txt")) as f:
+        audio = f.read().strip()
+    clips = [{"id": str(i), "audio_base64": audio} for i in range(3)]
+    response = client.post("/detect-voice/batch", json={"clips": clips}, headers=HEADERS)
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 3
+    assert all(line["status"] == "error" and "overloaded" in line["detail"] for line in lines)
+    assert full.rejected == 3
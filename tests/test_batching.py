@@ -0,0 +1,63 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.batching import MicroBatcher
+
+def test_batches_never_mix_model_versions():
+    calls = []
+
+    def run_batch(features, model=None):
+        calls.append((model, list(features)))
+        return [model] * len(features)
+
+    async def scenario():
+        batcher = MicroBatcher(run_batch, max_batch_size=8, max_wait_ms=50)
+        await batcher.start()
+        # Requests pinned to the old model, then (after a reload) the new one, queued together
+        jobs = [batcher.submit(i, model=("old" if i < 3 else "new")) for i in range(6)]
+        results = await asyncio.gather(*jobs)
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(scenario())
+    assert results == ["old", "old", "old", "new", "new", "new"]
+    assert calls == [("old", [0, 1, 2]), ("new", [3, 4, 5])]
+
+def test_concurrent_submits_share_forward_passes_up_to_the_max_size():
+    sizes = []
+
+    def run_batch(features, model=None):
+        sizes.append(len(features))
+        return [f * 10 for f in features]
+
+    async def scenario():
+        batcher = MicroBatcher(run_batch, max_batch_size=4, max_wait_ms=50)
+        await batcher.start()
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+        await batcher.stop()
+        return results, batcher.stats.snapshot()
+
+    results, stats = asyncio.run(scenario())
+    # Every caller gets its own item's result back
+    assert results == [i * 10 for i in range(10)]
+    assert sizes == [4, 4, 2]
+    assert stats["batches"] == 3 and stats["items"] == 10 and stats["batch_size_histogram"] == {2: 1, 4: 2}
+
+def test_a_failed_forward_pass_fails_only_its_batch():
+    def run_batch(features, model=None):
+        if 0 in features:
+            raise RuntimeError("model crashed")
+        return [1.0] * len(features)
+
+    async def scenario():
+        batcher = MicroBatcher(run_batch, max_batch_size=2, max_wait_ms=50)
+        await batcher.start()
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(4)), return_exceptions=True)
+        await batcher.stop()
+        return results, batcher.stats.errors
+
+    results, errors = asyncio.run(scenario())
+    assert [type(r).__name__ for r in results] == ["RuntimeError", "RuntimeError", "float", "float"]
+    assert errors == 1
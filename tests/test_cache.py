@@ -0,0 +1,42 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.cache import ResultCache
+
+def test_background_put_reaches_the_disk_tier(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResultCache(max_entries=8, path=path)
+    cache.put("k", {"classification": "HUMAN"}, background=True)
+    cache._writer.submit(lambda: None).result()  # Wait for the write-behind queue
+
+    fresh = ResultCache(max_entries=8, path=path)
+    assert asyncio.run(fresh.aget("k")) == {"classification": "HUMAN"}
+    assert fresh.stats()["disk_hits"] == 1
+    assert asyncio.run(fresh.aget("missing")) is None
+    assert fresh.stats()["misses"] == 1
+
+def test_memory_hits_dont_wait_for_sqlite(tmp_path):
+    cache = ResultCache(max_entries=8, path=str(tmp_path / "cache.sqlite"))
+    cache.put("k", {"classification": "AI_GENERATED"})
+
+    async def lookup_while_disk_is_busy():
+        with cache._db_lock:  # e.g. another worker's write holding the database
+            return await asyncio.wait_for(cache.aget("k"), timeout=1)
+
+    assert asyncio.run(lookup_while_disk_is_busy()) == {"classification": "AI_GENERATED"}
+
+def test_evict_version_drops_only_that_versions_entries(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResultCache(max_entries=8, path=path)
+    cache.put("v1:first:aa", {"classification": "HUMAN"})
+    cache.put("v1:full-2.0-16-600.0:aa", {"classification": "HUMAN"})
+    cache.put("v10:first:aa", {"classification": "AI_GENERATED"})
+    cache.evict_version("v1", background=True)
+    cache._writer.submit(lambda: None).result()
+
+    assert cache.stats()["entries"] == 1
+    fresh = ResultCache(max_entries=8, path=path)
+    assert fresh.get("v1:first:aa") is None and fresh.get("v1:full-2.0-16-600.0:aa") is None
+    assert fresh.get("v10:first:aa") == {"classification": "AI_GENERATED"}
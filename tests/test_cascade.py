@@ -0,0 +1,40 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.cascade import Stage1Classifier
+from app.inference import ServedModel, cascade_split
+
+def served_with_band(low, high):
+    return ServedModel(None, None, "eager", "resnet18", "v", stage1=Stage1Classifier(None, low, high))
+
+def test_cascade_split_uses_the_loaded_stage1_band():
+    prepared = {"features": np.zeros((3, 128, 126), dtype=np.float32), "stage1_probs": [0.02, 0.5, 0.9]}
+    probs, escalate = cascade_split(prepared, served_with_band(0.05, 0.95))
+    assert probs == [0.02, None, None] and escalate == [1, 2]
+    # A reloaded stage 1 with a narrower band decides more clips itself
+    probs, escalate = cascade_split(prepared, served_with_band(0.1, 0.8))
+    assert probs == [0.02, None, 0.9] and escalate == [1]
+
+def test_cascade_split_without_stage1_escalates_everything():
+    prepared = {"features": np.zeros((128, 126), dtype=np.float32)}
+    model = ServedModel(None, None, "eager", "resnet18", "v")
+    assert cascade_split(prepared, model) == ([None], [0])
+
+def test_stage1_load_defaults_to_the_saved_band(tmp_path):
+    from sklearn.linear_model import LogisticRegression
+    from app.cascade import save_stage1
+    estimator = LogisticRegression().fit(np.array([[0.0], [1.0]]), [0, 1])
+    path = str(tmp_path / "stage1.joblib")
+    save_stage1(estimator, path, band=(0.2, 0.7))
+    stage1 = Stage1Classifier.load(path)
+    assert (stage1.low, stage1.high) == (0.2, 0.7)
+    # Explicit values (CASCADE_LOW / CASCADE_HIGH) override one side or both
+    stage1 = Stage1Classifier.load(path, high=0.9)
+    assert (stage1.low, stage1.high) == (0.2, 0.9)
+    # Files saved without a band get the default one
+    save_stage1(estimator, path)
+    stage1 = Stage1Classifier.load(path)
+    assert (stage1.low, stage1.high) == (0.05, 0.95)
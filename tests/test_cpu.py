@@ -0,0 +1,21 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app import cpu
+
+def test_workers_option_is_read_from_the_supervisor_command_line():
+    assert cpu.workers_option(["uvicorn", "app.main:app", "--workers", "4", "--port", "8000"]) == 4
+    assert cpu.workers_option(["uvicorn", "app.main:app", "--workers=3"]) == 3
+    assert cpu.workers_option(["uvicorn", "app.main:app", "--port", "8000"]) == 1
+
+def test_slot_lock_files_are_named_per_deployment(tmp_path, monkeypatch):
+    monkeypatch.setattr(cpu, "SLOT_LOCK_DIR", str(tmp_path))
+    monkeypatch.setattr(cpu, "_slot_file", None)
+    monkeypatch.setattr(cpu, "WORKER_INSTANCE_ID", "service-a")
+    assert cpu.claim_worker_slot(2) == 0
+    # Another service on the same host has its own slots
+    monkeypatch.setattr(cpu, "WORKER_INSTANCE_ID", "service-b")
+    assert cpu.claim_worker_slot(2) == 0
+    assert sorted(os.listdir(tmp_path)) == ["voice-detector-service-a-worker-0.lock",
+                                            "voice-detector-service-b-worker-0.lock"]
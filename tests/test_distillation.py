@@ -0,0 +1,40 @@
+import os
+import sys
+
+import torch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "training"))
+from app.model import build_model, save_checkpoint, load_checkpoint
+from train import distillation_loss
+
+def test_matching_the_teacher_leaves_only_the_hard_loss():
+    logits = torch.tensor([[2.0], [-1.0], [0.3]])
+    target = torch.tensor([[1.0], [0.0], [1.0]])
+    hard = torch.nn.functional.binary_cross_entropy_with_logits(logits, target)
+    loss = distillation_loss(logits, logits, target, alpha=0.5, temperature=4.0)
+    torch.testing.assert_close(loss, 0.5 * hard)
+
+def test_soft_loss_pulls_the_student_towards_the_teacher():
+    teacher = torch.tensor([[3.0], [-3.0]])
+    target = torch.tensor([[1.0], [0.0]])
+    # With alpha=0 only the teacher matters, so a student further from it costs more
+    near = distillation_loss(torch.tensor([[2.5], [-2.5]]), teacher, target, alpha=0.0, temperature=2.0)
+    far = distillation_loss(torch.tensor([[-1.0], [1.0]]), teacher, target, alpha=0.0, temperature=2.0)
+    assert 0 < near < far
+
+def test_compact_model_is_smaller_and_round_trips_its_checkpoint(tmp_path):
+    compact, teacher = build_model("compact").eval(), build_model("resnet18")
+    assert sum(p.numel() for p in compact.parameters()) < sum(p.numel() for p in teacher.parameters()) / 10
+    x = torch.randn(2, 1, 128, 126)
+    with torch.no_grad():
+        expected = compact(x)
+    assert expected.shape == (2, 1)
+
+    path = str(tmp_path / "compact.pth")
+    save_checkpoint(compact, path, "compact")
+    model, arch = load_checkpoint(path)
+    assert arch == "compact"
+    with torch.no_grad():
+        torch.testing.assert_close(model(x), expected)
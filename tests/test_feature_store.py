@@ -0,0 +1,60 @@
+import os
+import sys
+import pickle
+import shutil
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "training"))
+from dataset import VoiceDataset
+from feature_store import FeatureStore, build_feature_store, compute_features
+
+@pytest.fixture
+def files(tmp_path):
+    good = str(tmp_path / "good.wav")
+    shutil.copy(os.path.join(ROOT, "sample_audio.wav"), good)
+    bad = str(tmp_path / "bad.wav")
+    with open(bad, "wb") as f:
+        f.write(b"not audio")
+    return good, bad
+
+def test_stored_rows_match_decoded_features(files, tmp_path):
+    good, bad = files
+    index = build_feature_store([(good, 1), (bad, 0)], str(tmp_path / "store"))
+    assert index["rows"] == 1 and [f["path"] for f in index["failed"]] == [os.path.abspath(bad)]
+
+    store = FeatureStore(str(tmp_path / "store"))
+    assert len(store) == 1 and store.labels.tolist() == [1.0]
+    assert store.row(good) == 0 and store.row(bad) is None
+    np.testing.assert_array_equal(store.features[0], compute_features(good))
+    # Workers get the path and reopen the map rather than a copy of the array
+    clone = pickle.loads(pickle.dumps(store))
+    assert isinstance(clone.features, np.memmap)
+    np.testing.assert_array_equal(clone.features[0], store.features[0])
+
+def test_changed_files_fall_back_to_decoding(files, tmp_path):
+    good, _ = files
+    build_feature_store([(good, 1)], str(tmp_path / "store"))
+    store = FeatureStore(str(tmp_path / "store"))
+    st = os.stat(good)
+    os.utime(good, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert store.row(good) is None
+
+def test_dataset_reads_the_store_and_excludes_its_failures(files, tmp_path):
+    good, bad = files
+    build_feature_store([(good, 1), (bad, 0)], str(tmp_path / "store"))
+    store = FeatureStore(str(tmp_path / "store"))
+    dataset = VoiceDataset(file_list=[(good, 1), (bad, 0)], train=False, store=store)
+    assert dataset.rows == [0, None] and dataset.excluded == {1}
+    x, y = dataset[0]
+    assert np.shares_memory(x.numpy(), store.features) and y.item() == 1.0
+
+def test_stores_built_with_other_settings_are_rejected(files, tmp_path, monkeypatch):
+    import feature_store
+    good, _ = files
+    build_feature_store([(good, 1)], str(tmp_path / "store"))
+    monkeypatch.setattr(feature_store, "feature_config", lambda: {"n_mels": 64})
+    with pytest.raises(ValueError):
+        FeatureStore(str(tmp_path / "store"))
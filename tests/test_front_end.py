@@ -0,0 +1,32 @@
+import os
+import sys
+
+import librosa
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.audio_utils import (extract_features_batch, mel_filterbank, SAMPLE_RATE, DURATION, N_MELS, N_FFT,
+                             HOP_LENGTH)
+
+def reference_features(y: np.ndarray) -> np.ndarray:
+    mel = librosa.feature.melspectrogram(y=y, sr=SAMPLE_RATE, n_fft=N_FFT, hop_length=HOP_LENGTH, n_mels=N_MELS,
+                                         center=True, pad_mode="constant")
+    return librosa.power_to_db(mel, ref=np.max)
+
+def test_mel_filterbank_matches_librosa():
+    expected = librosa.filters.mel(sr=SAMPLE_RATE, n_fft=N_FFT, n_mels=N_MELS)
+    np.testing.assert_allclose(mel_filterbank(SAMPLE_RATE, N_FFT, N_MELS), expected, rtol=1e-5, atol=1e-8)
+
+def test_batched_front_end_matches_librosa_features():
+    rng = np.random.default_rng(0)
+    t = np.arange(SAMPLE_RATE * DURATION) / SAMPLE_RATE
+    ys = np.stack([
+        0.5 * np.sin(2 * np.pi * 220 * t) + 0.05 * rng.standard_normal(len(t)),
+        rng.uniform(-1, 1, len(t)),
+        np.concatenate([np.zeros(len(t) // 2), 0.3 * np.sin(2 * np.pi * 3000 * t[len(t) // 2:])]),
+    ]).astype(np.float32)
+    features = extract_features_batch(ys)
+    for y, feature in zip(ys, features):
+        expected = reference_features(y)
+        assert feature.shape == expected.shape
+        np.testing.assert_allclose(feature, expected, atol=1e-3)
@@ -0,0 +1,46 @@
+import os
+import sys
+import shutil
+
+import pytest
+import torch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "training"))
+from dataset import LoadFailure, SpecAugmentCollate, VoiceDataset, VoiceLoader
+
+def test_collate_drops_failures_and_masks_each_clip_independently():
+    torch.manual_seed(0)
+    samples = [(torch.ones(1, 128, 126), torch.tensor(1.0)) for _ in range(4)]
+    failure = LoadFailure(2, "broken.wav", "corrupt")
+    data, target, failures = SpecAugmentCollate(augment=True)(samples[:2] + [failure] + samples[2:])
+    assert data.shape == (4, 1, 128, 126) and target.tolist() == [1.0] * 4 and failures == [failure]
+    masks = [(clip == 0) for clip in data]
+    assert all(mask.any() for mask in masks)
+    assert any(not torch.equal(masks[0], mask) for mask in masks[1:])
+
+def test_collate_without_augment_or_samples():
+    x = torch.randn(1, 128, 126)
+    data, _, _ = SpecAugmentCollate(augment=False)([(x, torch.tensor(0.0))])
+    assert torch.equal(data[0], x)
+    assert SpecAugmentCollate(augment=True)([LoadFailure(0, "a.wav", "e")])[:2] == (None, None)
+
+@pytest.mark.parametrize("workers", [0, 1])
+def test_unreadable_files_are_reported_once_and_excluded(tmp_path, capsys, workers):
+    good = str(tmp_path / "good.wav")
+    shutil.copy(os.path.join(ROOT, "sample_audio.wav"), good)
+    bad = str(tmp_path / "bad.wav")
+    with open(bad, "wb") as f:
+        f.write(b"not audio")
+    dataset = VoiceDataset(file_list=[(good, 0), (bad, 1), (good, 1)], train=False)
+    loader = VoiceLoader(dataset, batch_size=2, num_workers=workers)
+
+    first = [target.tolist() for _, target in loader]
+    assert first == [[0.0], [1.0]]
+    assert dataset.excluded == {1}
+    assert capsys.readouterr().out.count("Skipping unreadable file") == 1
+
+    # Persistent workers still see the exclusion: the sampler runs in this process
+    second = [target.tolist() for _, target in loader]
+    assert second == [[0.0, 1.0]]
+    assert "Skipping" not in capsys.readouterr().out
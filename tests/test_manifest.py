@@ -0,0 +1,79 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "training"))
+import manifest
+from manifest import language_of, update_manifest, split_files
+
+def write_clip(data_dir, rel_path, seed):
+    path = os.path.join(data_dir, *rel_path.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    sf.write(path, np.random.default_rng(seed).uniform(-0.5, 0.5, 1600).astype(np.float32), 16000)
+    return path
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for i in range(10):
+        write_clip(str(tmp_path), f"human/EnglishHuman/h{i}.wav", i)
+        write_clip(str(tmp_path), f"ai/Tamil/a{i}.wav", 100 + i)
+    return str(tmp_path)
+
+@pytest.fixture
+def hashed(monkeypatch):
+    paths = []
+    content_hash = manifest.content_hash
+    monkeypatch.setattr(manifest, "content_hash", lambda path: paths.append(path) or content_hash(path))
+    return paths
+
+def splits(m):
+    return {e["path"]: e["split"] for e in m["files"]}
+
+def test_languages_come_from_the_first_subfolder():
+    assert language_of("human/EnglishHuman/x.mp3") == "English"
+    assert language_of("ai/mal/x.mp3") == "Malayalam"
+    assert language_of("ai/x.mp3") == "Unknown"
+
+def test_splits_are_stratified(data_dir):
+    m = update_manifest(data_dir)
+    for prefix in ("human/", "ai/"):
+        assert sum(1 for path, split in splits(m).items() if path.startswith(prefix) and split == "val") == 2
+    assert len(split_files(m, "train", data_dir)) == 16 and all(os.path.exists(p) for p, _ in split_files(m, "val", data_dir))
+
+def test_unchanged_files_are_not_rehashed_and_keep_their_split(data_dir, hashed):
+    first = update_manifest(data_dir)
+    assert len(hashed) == 20
+    hashed.clear()
+
+    touched = os.path.join(data_dir, "human", "EnglishHuman", "h0.wav")
+    os.utime(touched, ns=(0, 0))
+    for i in range(10, 15):
+        write_clip(data_dir, f"human/EnglishHuman/h{i}.wav", i)
+    second = update_manifest(data_dir)
+    # Only the touched and the new files are read again
+    assert sorted(hashed) == sorted([touched] + [os.path.join(data_dir, "human", "EnglishHuman", f"h{i}.wav")
+                                                for i in range(10, 15)])
+    assert {path: split for path, split in splits(second).items() if path in splits(first)} == splits(first)
+    assert sum(1 for path, split in splits(second).items() if path.startswith("human/") and split == "val") == 3
+
+def test_duplicates_share_a_split_and_unreadable_files_get_none(data_dir):
+    first = update_manifest(data_dir)
+    val_clip = next(path for path, split in splits(first).items() if path.startswith("ai/") and split == "val")
+    with open(os.path.join(data_dir, *val_clip.split("/")), "rb") as f:
+        content = f.read()
+    with open(os.path.join(data_dir, "ai", "Tamil", "copy.wav"), "wb") as f:
+        f.write(content)
+    with open(os.path.join(data_dir, "ai", "Tamil", "broken.wav"), "wb") as f:
+        f.write(b"not audio")
+
+    second = splits(update_manifest(data_dir))
+    assert second["ai/Tamil/copy.wav"] == "val"
+    assert second["ai/Tamil/broken.wav"] is None
+
+def test_changing_split_settings_reassigns_everything(data_dir):
+    update_manifest(data_dir)
+    m = update_manifest(data_dir, val_fraction=0.5)
+    assert sum(1 for split in splits(m).values() if split == "val") == 10
@@ -0,0 +1,22 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.metrics import Gauge, Histogram
+
+def test_label_values_are_escaped():
+    info = Gauge("test_model_info", "Serving model", ("version",))
+    info.set(1, version='ckpt "final"\\v2\nbak')
+    assert info.render()[-1] == 'test_model_info{version="ckpt \\"final\\"\\\\v2\\nbak"} 1'
+
+def test_histogram_renders_cumulative_buckets():
+    latency = Histogram("test_seconds", "Latency", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value, stage="decode")
+    assert latency.render()[2:] == [
+        'test_seconds_bucket{stage="decode",le="0.1"} 1',
+        'test_seconds_bucket{stage="decode",le="1"} 2',
+        'test_seconds_bucket{stage="decode",le="+Inf"} 3',
+        'test_seconds_sum{stage="decode"} 5.55',
+        'test_seconds_count{stage="decode"} 3',
+    ]
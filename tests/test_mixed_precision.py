@@ -0,0 +1,55 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+import soundfile as sf
+import torch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "training"))
+from app.model import build_model, load_checkpoint
+from train import autocast, train
+
+CPU = torch.device("cpu")
+
+def test_autocast_runs_bf16_only_when_asked():
+    layer = torch.nn.Linear(4, 2)
+    x = torch.randn(3, 4)
+    with autocast(CPU, "bf16"):
+        assert layer(x).dtype == torch.bfloat16
+    with autocast(CPU, "fp32"):
+        assert layer(x).dtype == torch.float32
+
+def test_channels_last_matches_the_default_layout():
+    torch.manual_seed(0)
+    model = build_model("compact").eval()
+    x = torch.randn(2, 1, 128, 126)
+    with torch.no_grad():
+        expected = model(x)
+        model = model.to(memory_format=torch.channels_last)
+        torch.testing.assert_close(model(x.to(memory_format=torch.channels_last)), expected, atol=1e-4, rtol=1e-4)
+
+def test_unknown_precision_is_rejected():
+    with pytest.raises(ValueError):
+        train(precision="fp8")
+
+def test_bf16_channels_last_accumulated_run_trains_and_records_precision(tmp_path):
+    rng = np.random.default_rng(0)
+    for class_name in ("human", "ai"):
+        os.makedirs(tmp_path / "data" / class_name)
+        for i in range(5):
+            sf.write(str(tmp_path / "data" / class_name / f"{i}.wav"), rng.uniform(-0.5, 0.5, 16000), 16000)
+    save_path = str(tmp_path / "model.pth")
+
+    # 8 training clips in batches of 3 with accumulate 2: the trailing partial group is applied too
+    result = train("compact", save_path=save_path, store_path=None, num_workers=0, precision="bf16",
+                   channels_last=True, accumulate=2, batch_size=3, epochs=1, data_dir=str(tmp_path / "data"))
+    assert result["precision"] == "bf16" and result["channels_last"] and result["accumulate"] == 2
+    assert np.isfinite(result["best_val_loss"]) and result["samples_per_sec"] > 0
+
+    model, arch = load_checkpoint(save_path)
+    assert arch == "compact" and torch.load(save_path)["precision"] == "bf16"
+    # Weights stay float32 whatever the forward pass ran in
+    assert all(p.dtype == torch.float32 for p in model.parameters())
@@ -0,0 +1,42 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.audio_utils import SAMPLE_RATE
+from app.pitch import yin, prosody_metrics
+
+def tone(freqs):
+    # Harmonic tone following the given per-sample f0 contour
+    phase = 2 * np.pi * np.cumsum(freqs) / SAMPLE_RATE
+    return (0.5 * np.sin(phase) + 0.25 * np.sin(2 * phase)).astype(np.float32)
+
+@pytest.mark.parametrize("f0", [110.0, 220.0, 330.0])
+def test_yin_tracks_a_steady_tone(f0):
+    pitch, voiced, audible = yin(tone(np.full(SAMPLE_RATE, f0)))
+    assert voiced.mean() > 0.95
+    assert np.nanmedian(np.abs(pitch - f0)) < 0.01 * f0
+
+def test_matches_librosa_yin_on_a_gliding_tone():
+    import librosa
+    y = tone(np.linspace(120.0, 240.0, 2 * SAMPLE_RATE))
+    pitch, voiced, _ = yin(y)
+    reference = librosa.yin(y, fmin=60.0, fmax=500.0, sr=SAMPLE_RATE, frame_length=1024, hop_length=256,
+                            center=False)
+    n = min(len(pitch), len(reference))
+    assert np.nanmedian(np.abs(pitch[:n] - reference[:n]) / reference[:n]) < 0.01
+
+def test_prosody_metrics_separate_flat_from_intonated_speech():
+    flat = prosody_metrics(tone(np.full(2 * SAMPLE_RATE, 150.0)))
+    gliding = prosody_metrics(tone(150.0 * 2 ** (np.sin(np.linspace(0, 4 * np.pi, 2 * SAMPLE_RATE)) / 2)))
+    assert flat["pitch_variance"] < 0.01 < gliding["pitch_variance"]
+    assert abs(flat["mean_pitch_hz"] - 150.0) < 1.5
+    assert flat["voiced_ratio"] > 0.95
+
+def test_silence_and_noise_have_no_pitch():
+    assert prosody_metrics(np.zeros(SAMPLE_RATE, dtype=np.float32)) == {
+        "pitch_variance": 0.0, "voiced_ratio": 0.0, "mean_pitch_hz": 0.0}
+    noise = np.random.default_rng(0).standard_normal(SAMPLE_RATE).astype(np.float32)
+    assert prosody_metrics(noise)["voiced_ratio"] < 0.2
@@ -0,0 +1,49 @@
+import copy
+import os
+import sys
+
+import pytest
+import torch
+from torch.ao.nn.quantized.dynamic import Linear as DynamicQuantizedLinear
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.model import build_model
+from app.quantization import quantize_model, quantize_static, calibration_files
+
+@pytest.fixture(scope="module")
+def float_model():
+    torch.manual_seed(0)
+    return build_model("resnet18").eval()
+
+@pytest.fixture(scope="module")
+def batch():
+    torch.manual_seed(1)
+    return torch.randn(8, 1, 128, 126)
+
+def test_dynamic_int8_logits_stay_close_to_float(float_model, batch):
+    quantized = quantize_model(copy.deepcopy(float_model), "dynamic")
+    assert any(isinstance(m, DynamicQuantizedLinear) for m in quantized.modules())
+    assert not any(isinstance(m, DynamicQuantizedLinear) for m in float_model.modules())
+    with torch.no_grad():
+        assert torch.max(torch.abs(quantized(batch) - float_model(batch))).item() < 0.15
+
+def test_static_int8_logits_stay_close_to_float(float_model, batch):
+    # Calibrated on the batch itself rather than on audio files
+    quantized = quantize_static(copy.deepcopy(float_model), [batch])
+    with torch.no_grad():
+        assert torch.max(torch.abs(quantized(batch) - float_model(batch))).item() < 0.15
+
+def test_none_and_unknown_modes(float_model):
+    assert quantize_model(float_model, "none") is float_model
+    with pytest.raises(ValueError):
+        quantize_model(float_model, "int4")
+
+def test_calibration_files_are_balanced(tmp_path):
+    for label, count in (("human", 5), ("ai", 2)):
+        (tmp_path / label).mkdir()
+        for i in range(count):
+            (tmp_path / label / f"{i}.wav").write_bytes(b"")
+        (tmp_path / label / "notes.txt").write_text("not audio")
+    picked = calibration_files(str(tmp_path), samples=6)
+    assert sum("human" in p for p in picked) == 3 and sum(os.sep + "ai" + os.sep in p for p in picked) == 2
+    assert all(p.endswith(".wav") for p in picked)
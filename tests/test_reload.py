@@ -0,0 +1,45 @@
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.reload import ModelWatcher, file_signature
+
+def test_atomic_replace_changes_the_signature(tmp_path):
+    path = str(tmp_path / "model.pth")
+    assert file_signature(path) is None
+    with open(path, "wb") as f:
+        f.write(b"old")
+    before = file_signature(path)
+    with open(path + ".tmp", "wb") as f:
+        f.write(b"new")
+    os.utime(path + ".tmp", ns=(before[1], before[1]))
+    os.replace(path + ".tmp", path)
+    assert file_signature(path) != before
+
+def test_changes_are_loaded_once_settled_and_failures_are_not_retried(tmp_path):
+    path = str(tmp_path / "model.pth")
+    with open(path, "wb") as f:
+        f.write(b"v1")
+    loaded = []
+
+    async def on_change(p):
+        loaded.append(open(p, "rb").read())
+        if loaded[-1] == b"broken":
+            raise RuntimeError("bad checkpoint")
+
+    async def scenario():
+        watcher = ModelWatcher(path, 0.1, on_change)
+        await watcher.start()
+        await asyncio.sleep(0.35)
+        assert loaded == []  # Unchanged since startup
+        for content in (b"v2", b"broken"):
+            with open(path, "wb") as f:
+                f.write(content)
+            # One poll sees the change, the next confirms it settled
+            await asyncio.sleep(0.45)
+        await asyncio.sleep(0.3)
+        await watcher.stop()
+
+    asyncio.run(scenario())
+    assert loaded == [b"v2", b"broken"]
@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "training"))
+from dataset import ExcludingSampler
+
+class Files:
+    def __init__(self, n, excluded=()):
+        self.n = n
+        self.excluded = set(excluded)
+
+    def __len__(self):
+        return self.n
+
+@pytest.mark.parametrize("n, replicas", [(10, 4), (3, 4), (8, 4), (7, 1)])
+def test_real_samples_leave_out_the_padding(n, replicas):
+    dataset = Files(n, excluded={0})
+    samplers = [ExcludingSampler(dataset, shuffle=True, num_replicas=replicas, rank=rank, pad=True)
+                for rank in range(replicas)]
+    # Every rank runs the same number of steps, but only the leading real samples are counted
+    assert len({len(sampler) for sampler in samplers}) == 1
+    counted = [i for sampler in samplers for i in list(sampler)[:sampler.real_samples()]]
+    assert sorted(counted) == list(range(1, n))
+
+def test_ranks_without_real_samples_are_only_padding():
+    # More ranks than readable files: the last ranks get a padding repeat and nothing to count
+    dataset = Files(4, excluded={0, 1})
+    samplers = [ExcludingSampler(dataset, num_replicas=4, rank=rank, pad=True) for rank in range(4)]
+    assert [len(sampler) for sampler in samplers] == [1, 1, 1, 1]
+    assert [sampler.real_samples() for sampler in samplers] == [1, 1, 0, 0]
+    # Every file excluded: no steps and nothing counted
+    dataset.excluded = {0, 1, 2, 3}
+    assert [(len(sampler), sampler.real_samples()) for sampler in samplers] == [(0, 0)] * 4
+
+def test_epoch_metrics_with_nothing_counted_are_zero():
+    from train import mean_metrics
+    assert mean_metrics(0.0, 0, 0) == (0, 0)
+    assert mean_metrics(3.0, 4, 6) == (0.5, 4 / 6)
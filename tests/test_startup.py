@@ -0,0 +1,11 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_server_import_does_not_load_librosa():
+    # librosa takes over a second to import; only the decode fallbacks should pay for it
+    check = "import sys, app.main; assert 'librosa' not in sys.modules, 'librosa imported at startup'"
+    result = subprocess.run([sys.executable, "-c", check], cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr[-2000:]
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.main import app, API_KEY, API_KEY_NAME
+
+# No lifespan: these messages are rejected before anything touches the model
+client = TestClient(app)
+
+@pytest.mark.parametrize("message", ["[1, 2]", "42", '"end"', "null"])
+def test_non_object_json_message_closes_with_1003(message):
+    with client.websocket_connect("/detect-voice/stream", headers={API_KEY_NAME: API_KEY}) as websocket:
+        websocket.send_text(message)
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+    assert closed.value.code == 1003
+    assert closed.value.reason == "Text messages must be JSON objects"
@@ -0,0 +1,40 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.audio_utils import SAMPLE_RATE, DURATION, extract_features
+from app.streaming import StreamSession, StreamingMelExtractor, decode_chunk
+
+def test_end_of_stream_flushes_the_resampler():
+    # Exactly one window of 8 kHz audio: the resampler keeps its last samples back until flushed
+    session = StreamSession(sample_rate=SAMPLE_RATE // 2)
+    pcm = (np.random.default_rng(0).uniform(-0.5, 0.5, int(DURATION * SAMPLE_RATE // 2)) * 32767).astype("<i2")
+    assert session.feed(pcm.tobytes()) == []
+    windows = session.flush()
+    assert len(windows) == 1
+    assert windows[0][0] == 0.0
+
+def test_flush_without_resampling_is_a_no_op():
+    assert StreamSession().flush() == []
+
+def test_streamed_windows_match_batch_features():
+    y = np.random.default_rng(1).uniform(-0.8, 0.8, 7 * SAMPLE_RATE).astype(np.float32)
+    extractor = StreamingMelExtractor(hop_seconds=1.0)
+    windows = []
+    # Odd-sized chunks, so windows complete in the middle of a push
+    for i in range(0, len(y), 3001):
+        windows += extractor.push(y[i:i + 3001])
+    assert [start for start, _, _ in windows] == [0.0, 0.992, 1.984, 2.976]
+    for start, features, peak in windows:
+        begin = int(round(start * SAMPLE_RATE))
+        segment = y[begin:begin + DURATION * SAMPLE_RATE]
+        assert peak == np.max(np.abs(segment))
+        np.testing.assert_allclose(features, extract_features(segment / peak), atol=1e-2)
+
+def test_pcm16_chunks_are_downmixed():
+    stereo = np.array([[16384, -16384], [8192, 8192]], dtype="<i2")
+    # An odd trailing byte is ignored rather than failing the chunk
+    y = decode_chunk(stereo.tobytes() + b"\0", "pcm16", channels=2)
+    np.testing.assert_allclose(y, [0.0, 0.25])
@@ -0,0 +1,49 @@
+import os
+import sys
+import csv
+
+import numpy as np
+import soundfile as sf
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "training"))
+from sweep import MedianPruner, grid, sweep
+
+def test_grid_covers_every_combination():
+    configs = grid([1e-3, 1e-4], [16], [5, 10], [15], [35])
+    assert len(configs) == 4
+    assert configs[0] == {"lr": 1e-3, "batch_size": 16, "epochs": 5, "freq_mask_param": 15, "time_mask_param": 35}
+    assert {(c["lr"], c["epochs"]) for c in configs} == {(1e-3, 5), (1e-3, 10), (1e-4, 5), (1e-4, 10)}
+
+def test_trials_trailing_the_median_are_pruned_after_warmup():
+    history = {0: [0.5, 0.4, 0.3], 1: [0.6, 0.5, 0.4]}
+    pruner = MedianPruner(history, trial=2, warmup=1, min_trials=2)
+    # Nothing is judged during the warmup
+    assert pruner(1, 0.9)
+    # Best so far 0.45 is no worse than the median (0.45) of the others' best by epoch 2
+    assert pruner(2, 0.45)
+    # Epoch 3: 0.45 trails the median of 0.3 and 0.4
+    assert not pruner(3, 0.5)
+    assert history[2] == [0.9, 0.45, 0.5]
+
+def test_pruner_waits_for_enough_other_trials():
+    pruner = MedianPruner({0: [0.1, 0.1]}, trial=1, warmup=0, min_trials=2)
+    assert pruner(1, 5.0) and pruner(2, 5.0)
+
+def test_sweep_trains_every_trial_on_one_feature_store(tmp_path):
+    rng = np.random.default_rng(0)
+    data_dir = tmp_path / "data"
+    for class_name in ("human", "ai"):
+        os.makedirs(data_dir / class_name)
+        for i in range(5):
+            sf.write(str(data_dir / class_name / f"{i}.wav"), rng.uniform(-0.5, 0.5, 16000), 16000)
+
+    configs = grid([1e-3, 1e-2], [4], [2], [15], [35])
+    rows = sweep(configs, "compact", str(data_dir), str(tmp_path / "store"), str(tmp_path / "sweep"), parallel=1,
+                 patience=0, prune=False)
+    assert sorted(r["trial"] for r in rows) == [0, 1]
+    assert rows[0]["best_val_loss"] <= rows[1]["best_val_loss"]
+    # Ran every epoch, so neither trial is reported as stopped early
+    assert [r["stopped"] for r in rows] == ["completed", "completed"] and [r["epochs_run"] for r in rows] == [2, 2]
+    assert all(os.path.exists(r["checkpoint"]) for r in rows)
+    with open(tmp_path / "sweep" / "results.csv") as f:
+        assert [int(r["trial"]) for r in csv.DictReader(f)] == [r["trial"] for r in rows]
@@ -0,0 +1,52 @@
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app import main
+from app.main import app, API_KEY, API_KEY_NAME
+
+# No lifespan: the pipeline is replaced where a request would reach the model
+client = TestClient(app)
+
+@pytest.fixture
+def classified(monkeypatch):
+    calls = []
+
+    async def classify_audio(audio_bytes, endpoint, deadline=None, admit=False, mode="first"):
+        calls.append({"audio": audio_bytes, "admit": admit, "mode": mode})
+        return {"classification": "AI_GENERATED", "confidence": 0.9, "model_version": "v"}
+
+    monkeypatch.setattr(main, "classify_audio", classify_audio)
+    return calls
+
+def test_raw_body_upload_skips_base64(classified):
+    response = client.post("/detect-voice/upload?language=Tamil&analysis=full", content=b"RIFF raw bytes",
+                           headers={API_KEY_NAME: API_KEY, "Content-Type": "audio/wav"})
+    assert response.status_code == 200
+    assert response.json()["language"] == "Tamil" and response.json()["classification"] == "AI_GENERATED"
+    assert classified == [{"audio": b"RIFF raw bytes", "admit": True, "mode": "full"}]
+
+def test_multipart_upload_reads_the_first_file_and_language(classified):
+    response = client.post("/detect-voice/upload", headers={API_KEY_NAME: API_KEY},
+                           files={"file": ("clip.mp3", b"ID3 mp3 bytes", "audio/mpeg")}, data={"language": "Hindi"})
+    assert response.status_code == 200
+    assert response.json()["language"] == "Hindi"
+    assert classified[0]["audio"] == b"ID3 mp3 bytes"
+
+@pytest.mark.parametrize("kwargs, status", [
+    ({"content": b"", "headers": {"Content-Type": "audio/wav"}}, 400),
+    ({"content": b"{}", "headers": {"Content-Type": "application/json"}}, 415),
+    ({"data": {"language": "English"}, "files": {"note": (None, "no file")}}, 400),
+])
+def test_bad_uploads_are_rejected_before_the_pipeline(classified, kwargs, status):
+    headers = {API_KEY_NAME: API_KEY, **kwargs.pop("headers", {})}
+    response = client.post("/detect-voice/upload", headers=headers, **kwargs)
+    assert response.status_code == status
+    assert classified == []
+
+def test_upload_requires_the_api_key(classified):
+    response = client.post("/detect-voice/upload", content=b"bytes", headers={"Content-Type": "audio/wav"})
+    assert response.status_code == 401
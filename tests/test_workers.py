@@ -0,0 +1,73 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.admission import DeadlineExceeded
+from app.workers import InferencePool
+
+def work(x, model=None):
+    return threading.current_thread().name, model, x * 2
+
+def test_thread_pool_runs_off_the_event_loop_with_the_current_model():
+    async def scenario():
+        pool = InferencePool("thread", workers=2)
+        pool.start(model="m1")
+        results = await asyncio.gather(*(pool.run(work, i) for i in range(4)))
+        pinned = await pool.run(work, 5, model="m0")
+        await pool.shutdown()
+        return results, pinned
+
+    results, pinned = asyncio.run(scenario())
+    assert all(name.startswith("inference") for name, _, _ in results)
+    assert [(model, value) for _, model, value in results] == [("m1", 0), ("m1", 2), ("m1", 4), ("m1", 6)]
+    assert pinned[1:] == ("m0", 10)
+
+def test_jobs_past_their_deadline_are_not_started():
+    async def scenario():
+        pool = InferencePool("thread", workers=1)
+        pool.start()
+        try:
+            await pool.run(work, 1, deadline=time.monotonic() - 1)
+        finally:
+            await pool.shutdown()
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(scenario())
+
+def test_admitted_jobs_are_bounded_by_workers_plus_queue():
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def slow(x, model=None):
+        with lock:
+            running.append(x)
+            peak.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.remove(x)
+        return x
+
+    async def scenario():
+        pool = InferencePool("thread", workers=2, queue_size=1)
+        pool.start()
+        jobs = [asyncio.ensure_future(pool.run(slow, i)) for i in range(6)]
+        await asyncio.sleep(0.01)
+        # Two running, one queued in the executor; the rest wait for a slot
+        admitted = pool.workers + pool.queue_size - pool._slots._value
+        results = await asyncio.gather(*jobs)
+        await pool.shutdown()
+        return admitted, results
+
+    admitted, results = asyncio.run(scenario())
+    assert admitted == 3
+    assert results == list(range(6)) and max(peak) == 2
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        InferencePool("gpu")
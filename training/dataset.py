@@ -1,7 +1,8 @@
 import os
 import glob
+import math
 import torch
-from torch.utils.data import Dataset
+from torch.utils.data import Dataset, DataLoader, Sampler
 import sys
 import torchaudio.transforms as T
 
@@ -9,57 +10,216 @@ import torchaudio.transforms as T
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from app.audio_utils import preprocess_audio, extract_features, feature_to_tensor, SAMPLE_RATE
 
+# Loader defaults: decode/featurize in background processes that stay alive across epochs
+NUM_WORKERS = min(4, os.cpu_count() or 1)
+PREFETCH_FACTOR = 4  # Batches each worker prepares ahead of the training loop
+
+# SpecAugment: widest frequency (mel bins) and time (frames) mask per clip
+FREQ_MASK_PARAM = 15
+TIME_MASK_PARAM = 35
+
+class LoadFailure:
+    """
+    Returned by VoiceDataset instead of a sample when a file can't be decoded.
+    """
+    def __init__(self, index: int, path: str, error: str):
+        self.index = index
+        self.path = path
+        self.error = error
+
 class VoiceDataset(Dataset):
-    def __init__(self, human_dir=None, ai_dir=None, file_list=None, train=True):
+    def __init__(self, human_dir=None, ai_dir=None, file_list=None, train=True, store=None):
         """
         Args:
             human_dir: Path to human audio directory
             ai_dir: Path to AI audio directory
-            file_list: Optional list of tuples (file_path, label) to use directly. 
+            file_list: Optional list of tuples (file_path, label) to use directly.
                        If provided, human_dir and ai_dir are ignored.
-            train: Boolean, whether to apply augmentation
+            train: Boolean, whether to apply augmentation (per batch, see SpecAugmentCollate)
+            store: Optional FeatureStore (training/feature_store.py). Files found in it
+                   are read from the memory-mapped features instead of being decoded.
         """
         self.train = train
-        
+        self.store = store
+
         if file_list is not None:
              self.all_files = file_list
         else:
             self.human_files = glob.glob(os.path.join(human_dir, "*"))
             self.ai_files = glob.glob(os.path.join(ai_dir, "*"))
             self.all_files = [(f, 0) for f in self.human_files] + [(f, 1) for f in self.ai_files]
-        
-        # SpecAugment transforms
-        self.freq_mask = T.FrequencyMasking(freq_mask_param=15)
-        self.time_mask = T.TimeMasking(time_mask_param=35)
-        
+
+        # Resolved once; files missing from the store (or changed since it was built) are decoded on the fly
+        self.rows = [store.row(f) for f, _ in self.all_files] if store is not None else [None] * len(self.all_files)
+
+        # Indices of unreadable files, never sampled again once known. Files the
+        # feature store already failed to decode start out excluded.
+        self.excluded = set()
+        if store is not None and store.failed:
+            failed = {os.path.normcase(f["path"]) for f in store.failed}
+            self.excluded = {i for i, (f, _) in enumerate(self.all_files) if os.path.normcase(os.path.abspath(f)) in failed}
+            if self.excluded:
+                print(f"Excluding {len(self.excluded)} files the feature store could not decode.")
+
     def __len__(self):
         return len(self.all_files)
 
     def __getitem__(self, idx):
         file_path, label = self.all_files[idx]
-        
+
+        row = self.rows[idx]
+        if row is not None:
+            # Zero-copy view of the stored features
+            x = torch.from_numpy(self.store.features[row])
+            return x, torch.tensor(label, dtype=torch.float32)
+
         try:
             # Read file bytes
             with open(file_path, "rb") as f:
                 audio_bytes = f.read()
-            
+
             # Preprocess
             y = preprocess_audio(audio_bytes)
-            
+
             # Feature extract
             features = extract_features(y)
-            
+
             # To Tensor (1, N_MELS, Time)
             x = feature_to_tensor(features)
-            
-            # Apply Augmentation only during training
-            if self.train:
-                x = self.freq_mask(x)
-                x = self.time_mask(x)
-            
+
             return x, torch.tensor(label, dtype=torch.float32)
-            
+
         except Exception as e:
-            print(f"Error loading {file_path}: {e}")
-            # Return a zero tensor in case of error
-            return torch.zeros((1, 128, 126)), torch.tensor(label, dtype=torch.float32)
+            # Reported (once) by VoiceLoader, which drops the file from later epochs
+            return LoadFailure(idx, file_path, str(e))
+
+class SpecAugmentCollate:
+    """
+    Stacks samples into a (N, 1, F, T) batch and, with augment, applies
+    SpecAugment to the whole batch in one call (independent masks per clip).
+    Returns (data, target, failures); failed samples are left out of the
+    batch, which is (None, None, failures) if nothing loaded.
+    """
+    def __init__(self, augment: bool, freq_mask_param: int = FREQ_MASK_PARAM, time_mask_param: int = TIME_MASK_PARAM):
+        self.augment = augment
+        self.freq_mask = T.FrequencyMasking(freq_mask_param=freq_mask_param, iid_masks=True)
+        self.time_mask = T.TimeMasking(time_mask_param=time_mask_param, iid_masks=True)
+
+    def __call__(self, items):
+        failures = [item for item in items if isinstance(item, LoadFailure)]
+        samples = [item for item in items if not isinstance(item, LoadFailure)]
+        if not samples:
+            return None, None, failures
+        data = torch.stack([x for x, _ in samples])
+        target = torch.stack([y for _, y in samples])
+        if self.augment:
+            data = self.time_mask(self.freq_mask(data))
+        return data, target, failures
+
+class ExcludingSampler(Sampler):
+    """
+    Sequential or shuffled indices of a VoiceDataset, skipping its excluded
+    (unreadable) files. Runs in the main process, so exclusions discovered
+    during one epoch apply from the next one on, even with persistent workers.
+
+    With num_replicas > 1 (distributed training) it yields only this rank's
+    shard, like torch's DistributedSampler: every rank shuffles with the same
+    seed + epoch (call set_epoch each epoch) and takes every num_replicas-th
+    index. With pad, the list is first padded by repetition so all shards are
+    the same length.
+    """
+    def __init__(self, dataset: VoiceDataset, shuffle: bool = False, num_replicas: int = 1, rank: int = 0,
+                 seed: int = 0, pad: bool = False):
+        self.dataset = dataset
+        self.shuffle = shuffle
+        self.num_replicas = num_replicas
+        self.rank = rank
+        self.seed = seed
+        self.pad = pad
+        self.epoch = 0
+
+    def set_epoch(self, epoch: int):
+        self.epoch = epoch
+
+    def _indices(self):
+        indices = [i for i in range(len(self.dataset)) if i not in self.dataset.excluded]
+        if self.shuffle:
+            if self.num_replicas > 1:
+                generator = torch.Generator()
+                generator.manual_seed(self.seed + self.epoch)
+                order = torch.randperm(len(indices), generator=generator)
+            else:
+                order = torch.randperm(len(indices))
+            indices = [indices[i] for i in order.tolist()]
+        if self.num_replicas > 1:
+            if self.pad and indices:
+                total = math.ceil(len(indices) / self.num_replicas) * self.num_replicas
+                indices = (indices * math.ceil(total / len(indices)))[:total]
+            indices = indices[self.rank::self.num_replicas]
+        return indices
+
+    def __iter__(self):
+        return iter(self._indices())
+
+    def real_samples(self) -> int:
+        """
+        This rank's share of the readable files, not counting the padding
+        repeats (which always come last in the shard).
+        """
+        available = len(self.dataset) - len(self.dataset.excluded)
+        return len(range(self.rank, available, self.num_replicas))
+
+    def __len__(self):
+        if self.num_replicas > 1 and self.pad:
+            available = len(self.dataset) - len(self.dataset.excluded)
+            return math.ceil(available / self.num_replicas)
+        return self.real_samples()
+
+class VoiceLoader:
+    """
+    DataLoader over a VoiceDataset yielding (data, target) batches.
+
+    Decoding and featurization run in `num_workers` persistent worker
+    processes, each keeping `prefetch_factor` batches ready; batches are
+    pinned when training on CUDA. SpecAugment is applied per batch in the
+    workers when dataset.train is set. Files that fail to load are reported
+    once and excluded from later epochs instead of becoming zero tensors.
+    num_replicas/rank/pad shard the data for distributed training (see
+    ExcludingSampler); call set_epoch before each epoch so shards reshuffle.
+    """
+    def __init__(self, dataset: VoiceDataset, batch_size: int, shuffle: bool = False,
+                 num_workers: int = NUM_WORKERS, prefetch_factor: int = PREFETCH_FACTOR,
+                 num_replicas: int = 1, rank: int = 0, pad: bool = False,
+                 freq_mask_param: int = FREQ_MASK_PARAM, time_mask_param: int = TIME_MASK_PARAM):
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.sampler = ExcludingSampler(dataset, shuffle, num_replicas, rank, pad=pad)
+        workers = max(0, int(num_workers))
+        self.loader = DataLoader(
+            dataset,
+            batch_size=batch_size,
+            sampler=self.sampler,
+            collate_fn=SpecAugmentCollate(dataset.train, freq_mask_param, time_mask_param),
+            num_workers=workers,
+            persistent_workers=workers > 0,
+            prefetch_factor=prefetch_factor if workers > 0 else None,
+            pin_memory=torch.cuda.is_available()
+        )
+
+    def set_epoch(self, epoch: int):
+        self.sampler.set_epoch(epoch)
+
+    def real_samples(self) -> int:
+        return self.sampler.real_samples()
+
+    def __len__(self):
+        return math.ceil(len(self.sampler) / self.batch_size)
+
+    def __iter__(self):
+        for data, target, failures in self.loader:
+            for failure in failures:
+                if failure.index not in self.dataset.excluded:
+                    self.dataset.excluded.add(failure.index)
+                    print(f"Skipping unreadable file {failure.path}: {failure.error}")
+            if data is not None:
+                yield data, target
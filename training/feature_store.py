@@ -0,0 +1,179 @@
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+# Add parent dir to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.audio_utils import preprocess_audio, extract_features, SAMPLE_RATE, DURATION, N_MELS, N_FFT, HOP_LENGTH
+from manifest import update_manifest, split_files
+
+# Config
+DATA_DIR = r"c:\Users\Alex\Desktop\Antigravity\AIVoiceDetection\data"
+STORE_PATH = r"c:\Users\Alex\Desktop\Antigravity\AIVoiceDetection\features"
+
+STORE_FORMAT = 1
+FEATURES_FILE = "features.npy"
+LABELS_FILE = "labels.npy"
+INDEX_FILE = "index.json"
+FEATURE_SHAPE = (1, N_MELS, 1 + SAMPLE_RATE * DURATION // HOP_LENGTH)
+
+def feature_config() -> dict:
+    """
+    Front-end settings the stored features depend on; a store built with other settings is stale.
+    """
+    return {"sample_rate": SAMPLE_RATE, "duration": DURATION, "n_mels": N_MELS, "n_fft": N_FFT, "hop_length": HOP_LENGTH}
+
+def file_stamp(path: str) -> tuple:
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+def compute_features(path: str) -> np.ndarray:
+    """
+    The (1, N_MELS, T) features VoiceDataset computes for a file, without augmentation.
+    """
+    with open(path, "rb") as f:
+        audio_bytes = f.read()
+    return extract_features(preprocess_audio(audio_bytes))[None].astype(np.float32)
+
+def _featurize(path: str):
+    try:
+        return compute_features(path), None
+    except Exception as e:
+        return None, str(e)
+
+def build_feature_store(file_list, store_path: str = STORE_PATH, workers: int = 1) -> dict:
+    """
+    Decodes every (path, label) in file_list once and writes the features to
+    store_path/features.npy (float32 (N, 1, N_MELS, T), memory-mappable), the
+    labels to labels.npy and a path -> row index to index.json. Files that
+    fail to decode are left out and listed in the index. The index is written
+    last, so an interrupted build never looks complete.
+    Returns the index.
+    """
+    os.makedirs(store_path, exist_ok=True)
+    file_list = [(os.path.abspath(f), int(label)) for f, label in file_list]
+    features_path = os.path.join(store_path, FEATURES_FILE)
+    index_path = os.path.join(store_path, INDEX_FILE)
+    if os.path.exists(index_path):
+        os.remove(index_path)
+
+    # Rows are written straight into the memory-mapped file, so the dataset never has to fit in RAM
+    features = np.lib.format.open_memmap(features_path, mode="w+", dtype=np.float32,
+                                         shape=(len(file_list),) + FEATURE_SHAPE)
+    entries, labels, failed = [], [], []
+    paths = [f for f, _ in file_list]
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(_featurize, paths, chunksize=8)
+    else:
+        executor = None
+        results = map(_featurize, paths)
+    try:
+        for (path, label), (x, error) in zip(file_list, results):
+            if error is not None:
+                failed.append({"path": path, "error": error})
+                print(f"Skipping {path}: {error}")
+                continue
+            features[len(entries)] = x
+            size, mtime_ns = file_stamp(path)
+            entries.append({"path": path, "label": label, "size": size, "mtime_ns": mtime_ns})
+            labels.append(label)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    features.flush()
+    del features
+
+    np.save(os.path.join(store_path, LABELS_FILE), np.asarray(labels, dtype=np.float32))
+    index = {
+        "format": STORE_FORMAT,
+        "config": feature_config(),
+        "rows": len(entries),
+        "shape": list(FEATURE_SHAPE),
+        "files": entries,
+        "failed": failed
+    }
+    with open(index_path + ".tmp", "w") as f:
+        json.dump(index, f)
+    os.replace(index_path + ".tmp", index_path)
+    return index
+
+class FeatureStore:
+    """
+    Read side of a store written by build_feature_store.
+
+    `features` is a copy-on-write memory map of the whole array: rows are read
+    straight from the page cache and torch.from_numpy wraps them without a
+    copy (writes, if any, stay private to the process). Pickling (e.g. into
+    spawned DataLoader workers) sends only the path; the map is reopened on
+    the other side instead of being copied.
+    """
+    def __init__(self, path: str = STORE_PATH):
+        self.path = path
+        with open(os.path.join(path, INDEX_FILE)) as f:
+            index = json.load(f)
+        if index.get("format") != STORE_FORMAT or index.get("config") != feature_config():
+            raise ValueError(f"Feature store at {path} was built with different feature settings; rebuild it")
+        self.failed = index["failed"]
+        self.labels = np.load(os.path.join(path, LABELS_FILE))
+        self._rows = {os.path.normcase(e["path"]): (row, e["size"], e["mtime_ns"]) for row, e in enumerate(index["files"])}
+        self._open()
+
+    def _open(self):
+        self.features = np.load(os.path.join(self.path, FEATURES_FILE), mmap_mode="c")[:len(self._rows)]
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state["features"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def row(self, path: str):
+        """
+        Row holding path's features, or None if the file isn't in the store or
+        changed (size or mtime) since the store was built.
+        """
+        entry = self._rows.get(os.path.normcase(os.path.abspath(path)))
+        if entry is None:
+            return None
+        row, size, mtime_ns = entry
+        try:
+            if file_stamp(path) != (size, mtime_ns):
+                return None
+        except OSError:
+            return None
+        return row
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.exists(os.path.join(path, INDEX_FILE))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute training features into a memory-mapped store")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Directory with human/ and ai/ subfolders")
+    parser.add_argument("--output", default=STORE_PATH)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Decoding processes")
+    args = parser.parse_args()
+
+    # Every readable file in the dataset manifest (unreadable ones have no split)
+    manifest = update_manifest(args.data_dir)
+    file_list = split_files(manifest, "train", args.data_dir) + split_files(manifest, "val", args.data_dir)
+    human_count = sum(1 for _, label in file_list if label == 0)
+    print(f"Found {human_count} Human samples and {len(file_list) - human_count} AI samples.")
+
+    start = time.perf_counter()
+    index = build_feature_store(file_list, args.output, args.workers)
+    elapsed = time.perf_counter() - start
+    size_mb = os.path.getsize(os.path.join(args.output, FEATURES_FILE)) / 1e6
+    print(f"Stored {index['rows']} clips ({size_mb:.1f} MB) in {elapsed:.1f}s; {len(index['failed'])} failed to decode.")
+    print(f"Train with: python training/train.py --feature-store {args.output}")
@@ -0,0 +1,184 @@
+import os
+import json
+import hashlib
+import argparse
+import soundfile as sf
+
+# Config
+DATA_DIR = r"c:\Users\Alex\Desktop\Antigravity\AIVoiceDetection\data"
+MANIFEST_NAME = "manifest.json"  # Written inside the data directory
+SUPPORTED_EXTS = ('.wav', '.mp3', '.flac', '.ogg')
+CLASSES = {"human": 0, "ai": 1}
+VAL_FRACTION = 0.2
+SPLIT_SEED = 42
+
+MANIFEST_FORMAT = 1
+# Language subfolders, e.g. human/EnglishHuman or ai/Tamil; the rest are spelling variants
+LANGUAGE_ALIASES = {"mal": "Malayalam", "mc": "Malayalam", "telegu": "Telugu"}
+
+def list_audio_files(directory):
+    """
+    Audio files anywhere under directory (the data is grouped in per-language subfolders), sorted.
+    """
+    found = []
+    for root, dirs, files in os.walk(directory):
+        for file in files:
+            if file.lower().endswith(SUPPORTED_EXTS):
+                found.append(os.path.join(root, file))
+    return sorted(found)
+
+def language_of(rel_path: str) -> str:
+    """
+    Language from the first folder below the class folder ("human/EnglishHuman/x.mp3" -> "English").
+    """
+    parts = rel_path.split("/")
+    if len(parts) < 3:
+        return "Unknown"
+    name = parts[1]
+    if name.lower().endswith("human"):
+        name = name[:-len("human")]
+    return LANGUAGE_ALIASES.get(name.lower(), name.capitalize() if name.islower() else name) or "Unknown"
+
+def content_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def scan_file(path: str, rel_path: str, label: int) -> dict:
+    """
+    Manifest entry for one file: content hash plus the audio header's duration,
+    sample rate and channels. Files whose header can't be read get an "error"
+    and are left out of the splits.
+    """
+    st = os.stat(path)
+    entry = {
+        "path": rel_path, "label": label, "language": language_of(rel_path),
+        "size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": content_hash(path)
+    }
+    try:
+        info = sf.info(path)
+        entry.update(duration=round(info.duration, 3), sample_rate=info.samplerate, channels=info.channels)
+    except Exception as e:
+        entry["error"] = str(e)
+    return entry
+
+def _split_rank(sha256: str, seed: int) -> str:
+    # Deterministic pseudo-random order within a stratum, independent of file names and scan order
+    return hashlib.sha256(f"{seed}:{sha256}".encode()).hexdigest()
+
+def assign_splits(entries: list, val_fraction: float, seed: int):
+    """
+    Gives every readable entry a "train" or "val" split, stratified by
+    (label, language). Entries that already have a split keep it, so adding
+    data never moves existing clips between splits; new clips go to val
+    until their stratum reaches val_fraction. Identical content always lands
+    in the same split, so duplicates can't leak from train into val.
+    """
+    by_hash = {e["sha256"]: e["split"] for e in entries if e.get("split")}
+    strata = {}
+    for e in entries:
+        if "error" in e:
+            e["split"] = None
+            continue
+        strata.setdefault((e["label"], e["language"]), []).append(e)
+    for stratum in strata.values():
+        val_target = round(val_fraction * len(stratum))
+        val_count = sum(1 for e in stratum if e.get("split") == "val")
+        for e in sorted((e for e in stratum if not e.get("split")), key=lambda e: _split_rank(e["sha256"], seed)):
+            split = by_hash.get(e["sha256"])
+            if split is None:
+                split = "val" if val_count < val_target else "train"
+                by_hash[e["sha256"]] = split
+            e["split"] = split
+            val_count += split == "val"
+
+def load_manifest(path: str):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        manifest = json.load(f)
+    return manifest if manifest.get("format") == MANIFEST_FORMAT else None
+
+def update_manifest(data_dir: str = DATA_DIR, path: str = None, val_fraction: float = VAL_FRACTION,
+                    seed: int = SPLIT_SEED, rebuild: bool = False) -> dict:
+    """
+    Indexes data_dir/human and data_dir/ai into the manifest at path (default
+    data_dir/manifest.json). Files whose size and mtime match the previous
+    manifest are not reread; changed files are rehashed, and a file whose
+    content didn't change keeps its entry. Splits are kept unless rebuild is
+    set or val_fraction/seed changed. The manifest is rewritten only if
+    something changed.
+    """
+    path = path or os.path.join(data_dir, MANIFEST_NAME)
+    previous = None if rebuild else load_manifest(path)
+    # Entries are reused (and may be updated in place), so compare against a snapshot
+    before = json.dumps(previous, sort_keys=True)
+    if previous is not None and (previous["val_fraction"] != val_fraction or previous["seed"] != seed):
+        print("Split settings changed; reassigning splits.")
+        previous = {**previous, "files": [{**e, "split": None} for e in previous["files"]]}
+    old = {e["path"]: e for e in previous["files"]} if previous else {}
+
+    entries, rescanned = [], 0
+    for class_name, label in CLASSES.items():
+        class_dir = os.path.join(data_dir, class_name)
+        for file_path in list_audio_files(class_dir):
+            rel_path = os.path.relpath(file_path, data_dir).replace(os.sep, "/")
+            entry = old.get(rel_path)
+            st = os.stat(file_path)
+            if entry is not None and (entry["size"], entry["mtime_ns"]) == (st.st_size, st.st_mtime_ns):
+                entries.append(entry)
+                continue
+            rescanned += 1
+            fresh = scan_file(file_path, rel_path, label)
+            if entry is not None and entry["sha256"] == fresh["sha256"]:
+                # Touched or copied, not changed: keep its split
+                fresh["split"] = entry.get("split")
+            entries.append(fresh)
+
+    assign_splits(entries, val_fraction, seed)
+    manifest = {"format": MANIFEST_FORMAT, "val_fraction": val_fraction, "seed": seed, "files": entries}
+    removed = len(old) - sum(1 for e in entries if e["path"] in old)
+    if json.dumps(manifest, sort_keys=True) != before:
+        with open(path + ".tmp", "w") as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(path + ".tmp", path)
+    print(f"Manifest {path}: {len(entries)} files ({rescanned} scanned, {removed} removed, "
+          f"{sum(1 for e in entries if 'error' in e)} unreadable).")
+    return manifest
+
+def split_files(manifest: dict, split: str, data_dir: str = DATA_DIR) -> list:
+    """
+    (path under data_dir, label) pairs of one split, in manifest order.
+    """
+    return [(os.path.join(data_dir, *e["path"].split("/")), e["label"])
+            for e in manifest["files"] if e.get("split") == split]
+
+def load_splits(data_dir: str = DATA_DIR, path: str = None) -> tuple:
+    """
+    Refreshes the manifest and returns (train_files, val_files) as (path, label) lists.
+    """
+    manifest = update_manifest(data_dir, path)
+    return split_files(manifest, "train", data_dir), split_files(manifest, "val", data_dir)
+
+def summarize(manifest: dict):
+    counts = {}
+    for e in manifest["files"]:
+        key = ("human" if e["label"] == 0 else "ai", e["language"])
+        row = counts.setdefault(key, {"train": 0, "val": 0, None: 0, "seconds": 0.0})
+        row[e.get("split")] += 1
+        row["seconds"] += e.get("duration", 0.0)
+    print(f"{'Class':<8}{'Language':<12}{'Train':>7}{'Val':>6}{'Bad':>6}{'Hours':>8}")
+    for (cls, language), row in sorted(counts.items()):
+        print(f"{cls:<8}{language:<12}{row['train']:>7}{row['val']:>6}{row[None]:>6}{row['seconds'] / 3600:>8.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index the data directory and assign stable train/val splits")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Directory with human/ and ai/ subfolders")
+    parser.add_argument("--output", default=None, help="Manifest path (default: <data-dir>/manifest.json)")
+    parser.add_argument("--val-fraction", type=float, default=VAL_FRACTION)
+    parser.add_argument("--seed", type=int, default=SPLIT_SEED)
+    parser.add_argument("--rebuild", action="store_true", help="Rescan every file and reassign all splits")
+    args = parser.parse_args()
+    summarize(update_manifest(args.data_dir, args.output, args.val_fraction, args.seed, args.rebuild))
@@ -0,0 +1,184 @@
+import os
+import sys
+import csv
+import time
+import argparse
+import itertools
+import statistics
+import traceback
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Add parent dir to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.model import ARCHITECTURES
+from train import train, DATA_DIR, LR, BATCH_SIZE, EPOCHS
+from dataset import FREQ_MASK_PARAM, TIME_MASK_PARAM
+from feature_store import FeatureStore, build_feature_store, STORE_PATH
+from manifest import update_manifest, split_files
+
+# Config
+SWEEP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sweeps")
+PATIENCE = 3        # Epochs without a better validation loss before a trial stops on its own
+PRUNE_WARMUP = 3    # Epochs every trial runs before it can be pruned
+PRUNE_MIN_TRIALS = 2
+
+RESULT_FIELDS = ["trial", "lr", "batch_size", "epochs", "freq_mask_param", "time_mask_param", "stopped", "epochs_run",
+                 "best_epoch", "best_val_loss", "best_val_acc", "final_val_loss", "samples_per_sec", "wall_time_s",
+                 "checkpoint", "log"]
+
+class MedianPruner:
+    """
+    on_epoch callback for train(). Records each trial's validation loss per
+    epoch in a dict shared by all the sweep's processes, and stops a trial
+    whose best loss so far is worse than the median of the best losses the
+    other trials had reached by the same epoch. Trials are not judged before
+    `warmup` epochs, or until `min_trials` others have got that far.
+    """
+    def __init__(self, history, trial: int, warmup: int = PRUNE_WARMUP, min_trials: int = PRUNE_MIN_TRIALS):
+        self.history = history
+        self.trial = trial
+        self.warmup = warmup
+        self.min_trials = min_trials
+
+    def __call__(self, epoch: int, val_loss: float) -> bool:
+        # Manager dict values are copies, so the list has to be stored back
+        losses = self.history.get(self.trial, []) + [val_loss]
+        self.history[self.trial] = losses
+        if epoch <= self.warmup:
+            return True
+        others = [min(other[:epoch]) for trial, other in self.history.items()
+                  if trial != self.trial and len(other) >= epoch]
+        if len(others) < self.min_trials:
+            return True
+        return min(losses) <= statistics.median(others)
+
+def grid(lrs, batch_sizes, epochs, freq_masks, time_masks) -> list:
+    """
+    Every combination of the given values, as train() keyword arguments.
+    """
+    return [{"lr": lr, "batch_size": batch_size, "epochs": n, "freq_mask_param": freq, "time_mask_param": time_}
+            for lr, batch_size, n, freq, time_ in itertools.product(lrs, batch_sizes, epochs, freq_masks, time_masks)]
+
+def ensure_feature_store(data_dir: str, store_path: str, workers: int):
+    """
+    Makes sure store_path holds features for every readable clip in
+    data_dir's manifest, (re)building it once here so no trial has to decode audio.
+    """
+    manifest = update_manifest(data_dir)
+    file_list = split_files(manifest, "train", data_dir) + split_files(manifest, "val", data_dir)
+    if FeatureStore.exists(store_path):
+        try:
+            store = FeatureStore(store_path)
+            missing = sum(1 for f, _ in file_list if store.row(f) is None)
+            if not missing:
+                print(f"Sharing feature store {store_path} ({len(store)} clips).")
+                return
+            print(f"{missing} clips are missing from the feature store; rebuilding it.")
+        except ValueError as e:
+            print(f"{e}.")
+    start = time.perf_counter()
+    index = build_feature_store(file_list, store_path, workers)
+    print(f"Built feature store {store_path}: {index['rows']} clips in {time.perf_counter() - start:.1f}s.")
+
+def run_trial(trial: int, config: dict, arch: str, data_dir: str, store_path: str, sweep_dir: str, threads: int,
+              patience: int, history) -> dict:
+    """
+    Trains one configuration with its output redirected to trial_NN.log.
+    Returns the result row for the table.
+    """
+    save_path = os.path.join(sweep_dir, f"trial_{trial:02d}.pth")
+    log_path = os.path.join(sweep_dir, f"trial_{trial:02d}.log")
+    on_epoch = MedianPruner(history, trial) if history is not None else None
+    start = time.perf_counter()
+    with open(log_path, "w") as log, contextlib.redirect_stdout(log):
+        print(f"Trial {trial}: {config}")
+        try:
+            # Loading is a memory-mapped read, so trials don't need DataLoader worker processes
+            result = train(arch, save_path=save_path, store_path=store_path, num_workers=0, threads=threads,
+                           patience=patience, on_epoch=on_epoch, data_dir=data_dir, **config)
+            result = result or {"stopped": "failed"}
+        except Exception:
+            traceback.print_exc()
+            result = {"stopped": "failed"}
+    return {"trial": trial, **config, **result, "wall_time_s": time.perf_counter() - start,
+            "checkpoint": save_path if result["stopped"] != "failed" else "", "log": log_path}
+
+def write_results(rows: list, path: str):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+def print_results(rows: list):
+    print(f"{'Trial':>5}{'LR':>9}{'Batch':>6}{'Epochs':>7}{'Freq':>5}{'Time':>5}  {'Status':<14}{'Best val':>9}"
+          f"{'Acc':>7}{'@Epoch':>7}{'Samples/s':>10}{'Wall':>8}")
+    for r in rows:
+        if r["stopped"] == "failed":
+            print(f"{r['trial']:>5}{r['lr']:>9g}{r['batch_size']:>6}{r['epochs']:>7}{r['freq_mask_param']:>5}"
+                  f"{r['time_mask_param']:>5}  {'failed':<14}{'':>40}{r['wall_time_s']:>7.0f}s")
+            continue
+        print(f"{r['trial']:>5}{r['lr']:>9g}{r['batch_size']:>6}{r['epochs']:>7}{r['freq_mask_param']:>5}"
+              f"{r['time_mask_param']:>5}  {r['stopped']:<14}{r['best_val_loss']:>9.4f}{r['best_val_acc']:>7.3f}"
+              f"{r['best_epoch']:>7}{r['samples_per_sec']:>10.1f}{r['wall_time_s']:>7.0f}s")
+
+def sweep(configs: list, arch: str = "resnet18", data_dir: str = DATA_DIR, store_path: str = STORE_PATH,
+          sweep_dir: str = SWEEP_DIR, parallel: int = None, patience: int = PATIENCE, prune: bool = True) -> list:
+    """
+    Runs the configurations as concurrent trials (`parallel` at a time, the
+    cores split evenly between them), all reading one shared feature store.
+    Writes sweep_dir/results.csv and returns the result rows, best first.
+    """
+    os.makedirs(sweep_dir, exist_ok=True)
+    cores = os.cpu_count() or 1
+    parallel = max(1, min(parallel or cores, len(configs)))
+    threads = max(1, cores // parallel)
+    ensure_feature_store(data_dir, store_path, workers=cores)
+    print(f"Running {len(configs)} trials, {parallel} at a time with {threads} threads each; logs in {sweep_dir}")
+
+    # Spawned like the inference pool's workers: forking a process that has already started torch's thread pools is unsafe
+    context = multiprocessing.get_context("spawn")
+    manager = context.Manager() if prune else None
+    history = manager.dict() if prune else None
+    rows = []
+    try:
+        with ProcessPoolExecutor(max_workers=parallel, mp_context=context) as executor:
+            futures = [executor.submit(run_trial, trial, config, arch, data_dir, store_path, sweep_dir, threads, patience,
+                                       history)
+                       for trial, config in enumerate(configs)]
+            for future in as_completed(futures):
+                row = future.result()
+                rows.append(row)
+                summary = "failed" if row["stopped"] == "failed" else \
+                    f"best val {row['best_val_loss']:.4f} at epoch {row['best_epoch']}, {row['stopped']} after {row['epochs_run']}"
+                print(f"[{len(rows)}/{len(configs)}] trial {row['trial']:02d}: {summary} ({row['wall_time_s']:.0f}s)")
+    finally:
+        if manager is not None:
+            manager.shutdown()
+
+    rows.sort(key=lambda r: (r["stopped"] == "failed", r.get("best_val_loss", float("inf"))))
+    results_path = os.path.join(sweep_dir, "results.csv")
+    write_results(rows, results_path)
+    print_results(rows)
+    print(f"Results written to {results_path}")
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train a grid of hyperparameters concurrently on one shared feature store")
+    parser.add_argument("--arch", choices=sorted(ARCHITECTURES), default="resnet18")
+    parser.add_argument("--lr", type=float, nargs="+", default=[LR])
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[BATCH_SIZE])
+    parser.add_argument("--epochs", type=int, nargs="+", default=[EPOCHS])
+    parser.add_argument("--freq-mask", type=int, nargs="+", default=[FREQ_MASK_PARAM], help="SpecAugment frequency mask width")
+    parser.add_argument("--time-mask", type=int, nargs="+", default=[TIME_MASK_PARAM], help="SpecAugment time mask width")
+    parser.add_argument("--parallel", type=int, default=None, help="Concurrent trials (default: one per core, up to the grid size)")
+    parser.add_argument("--patience", type=int, default=PATIENCE, help="Stop a trial after this many epochs without improvement (0: never)")
+    parser.add_argument("--no-prune", action="store_true", help="Don't stop trials that trail the median of the others")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Directory with human/ and ai/ subfolders")
+    parser.add_argument("--feature-store", default=STORE_PATH, help="Shared feature store (built or refreshed before the trials start)")
+    parser.add_argument("--output-dir", default=SWEEP_DIR, help="Checkpoints, per-trial logs and results.csv")
+    args = parser.parse_args()
+    configs = grid(args.lr, args.batch_size, args.epochs, args.freq_mask, args.time_mask)
+    sweep(configs, args.arch, args.data_dir, args.feature_store, args.output_dir, args.parallel, args.patience,
+          not args.no_prune)
@@ -1,16 +1,21 @@
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from torch.utils.data import DataLoader
 import os
 import sys
-import glob
+import time
 import random
+import argparse
+import contextlib
+import torch.distributed as dist
+from torch.nn.parallel import DistributedDataParallel
 
 # Add parent dir to path to import app modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from app.model import VoiceDetectorCNN
-from dataset import VoiceDataset
+from app.model import build_model, load_checkpoint, save_checkpoint, ARCHITECTURES
+from dataset import VoiceDataset, VoiceLoader, NUM_WORKERS, FREQ_MASK_PARAM, TIME_MASK_PARAM
+from feature_store import FeatureStore, STORE_PATH
+from manifest import load_splits
 
 # Config
 BATCH_SIZE = 16
@@ -19,80 +24,276 @@ LR = 0.001
 MODEL_SAVE_PATH = r"c:\Users\Alex\Desktop\Antigravity\AIVoiceDetection\model.pth"
 DATA_DIR = r"c:\Users\Alex\Desktop\Antigravity\AIVoiceDetection\data"
 
-def train():
+# Distillation defaults
+DISTILL_ALPHA = 0.5        # Weight of the hard-label loss; 1 - alpha goes to matching the teacher
+DISTILL_TEMPERATURE = 4.0
+
+# Mixed precision: "bf16" runs forward passes under bfloat16 autocast (weights and optimizer state stay float32)
+PRECISIONS = ("fp32", "bf16")
+
+def distillation_loss(student_logits, teacher_logits, target, alpha, temperature):
+    """
+    Hard-label BCE blended with the KL divergence from the teacher's
+    temperature-softened probabilities (scaled by T^2 so its gradients stay
+    comparable as T changes).
+    """
+    bce = nn.functional.binary_cross_entropy_with_logits
+    hard = bce(student_logits, target)
+    soft_targets = torch.sigmoid(teacher_logits / temperature)
+    # KL = cross-entropy minus the teacher's own entropy, so a perfect match scores 0
+    soft = bce(student_logits / temperature, soft_targets) - bce(teacher_logits / temperature, soft_targets)
+    return alpha * hard + (1 - alpha) * soft * temperature ** 2
+
+def open_feature_store(path):
+    """
+    The precomputed feature store at path, or None (features are then decoded from audio every epoch).
+    """
+    if not path or not FeatureStore.exists(path):
+        print("No feature store found; decoding audio every epoch (build one with training/feature_store.py).")
+        return None
+    try:
+        store = FeatureStore(path)
+    except ValueError as e:
+        print(f"{e}. Decoding audio every epoch.")
+        return None
+    print(f"Using feature store {path} ({len(store)} clips).")
+    return store
+
+def default_save_path(arch):
+    return MODEL_SAVE_PATH if arch == "resnet18" else os.path.join(os.path.dirname(MODEL_SAVE_PATH), f"model_{arch}.pth")
+
+def autocast(device, precision):
+    """
+    bfloat16 autocast on device when precision is "bf16", otherwise a no-op context.
+    """
+    return torch.autocast(device.type, dtype=torch.bfloat16, enabled=precision == "bf16")
+
+def init_distributed():
+    """
+    Joins the gloo process group when launched by torchrun (WORLD_SIZE > 1).
+    Returns (rank, local_rank, world_size); (0, 0, 1) for a plain single-process run.
+    """
+    world_size = int(os.getenv("WORLD_SIZE", "1"))
+    if world_size == 1:
+        return 0, 0, 1
+    if not dist.is_initialized():
+        dist.init_process_group("gloo")
+    return dist.get_rank(), int(os.getenv("LOCAL_RANK", "0")), world_size
+
+def all_reduce_sums(*values):
+    """
+    Sums each value over all ranks (identity without a process group).
+    """
+    if not dist.is_initialized():
+        return values
+    totals = torch.tensor(values, dtype=torch.float64)
+    dist.all_reduce(totals)
+    return totals.tolist()
+
+def mean_metrics(loss_sum, correct, total):
+    """
+    Mean loss and accuracy from summed counts; (0, 0) when nothing was
+    counted (every file excluded, or more ranks than samples).
+    """
+    if total <= 0:
+        return 0, 0
+    return loss_sum / total, correct / total
+
+def sync_exclusions(dataset):
+    """
+    Merges the unreadable files each rank found into every rank's dataset, so all ranks shard the same index list.
+    """
+    if not dist.is_initialized():
+        return
+    gathered = [None] * dist.get_world_size()
+    dist.all_gather_object(gathered, sorted(dataset.excluded))
+    for excluded in gathered:
+        dataset.excluded.update(excluded)
+
+def train(arch="resnet18", teacher_path=None, alpha=DISTILL_ALPHA, temperature=DISTILL_TEMPERATURE, save_path=None,
+          store_path=STORE_PATH, num_workers=NUM_WORKERS, precision="fp32", channels_last=False, accumulate=1,
+          threads=None, lr=LR, batch_size=BATCH_SIZE, epochs=EPOCHS, freq_mask_param=FREQ_MASK_PARAM,
+          time_mask_param=TIME_MASK_PARAM, patience=None, on_epoch=None, data_dir=DATA_DIR):
+    """
+    Trains and checkpoints the best epoch. Returns a summary dict (best and
+    final validation loss, mean training samples/sec, epochs run and why
+    training stopped), or None without data.
+
+    lr, batch_size, epochs, the SpecAugment mask widths and data_dir (with
+    human/ and ai/ subfolders) default to the module constants. With
+    patience, training stops once the validation loss hasn't improved for
+    that many epochs. on_epoch(epoch, val_loss) is called
+    after each validation and returning False stops training ("pruned"; used
+    by sweep.py to kill trials that trail the others).
+
+    precision="bf16" autocasts forward passes to bfloat16, channels_last
+    stores activations NHWC (the layout oneDNN convolutions prefer on CPU),
+    and accumulate sums gradients over that many batches per optimizer step,
+    for an effective batch of BATCH_SIZE * accumulate. Validation always runs
+    in float32, so losses are comparable across precisions.
+
+    Under torchrun the model is wrapped in DistributedDataParallel (gloo):
+    each rank trains and validates on its own shard, gradients are averaged
+    every optimizer step, losses and accuracies are summed over all ranks,
+    and only rank 0 prints progress and writes the checkpoint. threads sets
+    the intra-op threads per process (default: this host's cores split
+    evenly between its ranks).
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}'. Expected one of {PRECISIONS}")
+    accumulate = max(1, int(accumulate))
+    rank, local_rank, world_size = init_distributed()
+    distributed = world_size > 1
+    log = print if rank == 0 else (lambda *args, **kwargs: None)
+    if threads is None and distributed:
+        threads = max(1, (os.cpu_count() or 1) // int(os.getenv("LOCAL_WORLD_SIZE", "1")))
+    if threads:
+        torch.set_num_threads(threads)
+
     # Set seed for reproducibility
     random.seed(42)
     torch.manual_seed(42)
     
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    print(f"Training on {device}")
+    if torch.cuda.is_available():
+        device = torch.device("cuda", local_rank) if distributed else torch.device("cuda")
+    else:
+        device = torch.device("cpu")
+    log(f"Training on {device}" + (f" x {world_size} processes ({torch.get_num_threads()} threads each)" if distributed else ""))
     
-    human_dir = os.path.join(DATA_DIR, "human")
-    ai_dir = os.path.join(DATA_DIR, "ai")
+    human_dir = os.path.join(data_dir, "human")
+    ai_dir = os.path.join(data_dir, "ai")
     
     if not os.path.exists(human_dir) or not os.path.exists(ai_dir):
-        print("Data directories not found. Please run generate_data.py first.")
+        log("Data directories not found. Please run generate_data.py first.")
         return
 
-    # Prepare file lists
-    human_files = glob.glob(os.path.join(human_dir, "*"))
-    ai_files = glob.glob(os.path.join(ai_dir, "*"))
-    
-    print(f"Found {len(human_files)} Human samples and {len(ai_files)} AI samples.")
-    
-    if len(human_files) == 0 or len(ai_files) == 0:
-        print("Insufficient data.")
-        return
+    # Stable, language-stratified 80/20 split from the dataset manifest (only changed files are rescanned).
+    # One process per host refreshes the manifest; the others read it once it's written.
+    if distributed and local_rank != 0:
+        dist.barrier()
+    train_files, val_files = load_splits(data_dir)
+    if distributed and local_rank == 0:
+        dist.barrier()
+    all_files = train_files + val_files
+    human_count = sum(1 for _, label in all_files if label == 0)
+    ai_count = len(all_files) - human_count
 
-    all_files = [(f, 0) for f in human_files] + [(f, 1) for f in ai_files]
-    random.shuffle(all_files)
-    
-    # Split 80/20
-    val_count = int(0.2 * len(all_files))
-    val_files = all_files[:val_count]
-    train_files = all_files[val_count:]
+    log(f"Found {human_count} Human samples and {ai_count} AI samples.")
+
+    if human_count == 0 or ai_count == 0:
+        log("Insufficient data.")
+        return
     
-    print(f"Training samples: {len(train_files)}, Validation samples: {len(val_files)}")
+    log(f"Training samples: {len(train_files)}, Validation samples: {len(val_files)}")
     
     # Datasets
-    train_dataset = VoiceDataset(file_list=train_files, train=True)
-    val_dataset = VoiceDataset(file_list=val_files, train=False)
+    store = open_feature_store(store_path)
+    train_dataset = VoiceDataset(file_list=train_files, train=True, store=store)
+    val_dataset = VoiceDataset(file_list=val_files, train=False, store=store)
     
-    train_loader = DataLoader(train_dataset, batch_size=BATCH_SIZE, shuffle=True)
-    val_loader = DataLoader(val_dataset, batch_size=BATCH_SIZE, shuffle=False)
+    # Training shards are padded to equal length so every rank runs the same number of steps
+    train_loader = VoiceLoader(train_dataset, batch_size=batch_size, shuffle=True, num_workers=num_workers,
+                               num_replicas=world_size, rank=rank, pad=True,
+                               freq_mask_param=freq_mask_param, time_mask_param=time_mask_param)
+    val_loader = VoiceLoader(val_dataset, batch_size=batch_size, shuffle=False, num_workers=num_workers,
+                             num_replicas=world_size, rank=rank)
     
     # Model Setup
-    model = VoiceDetectorCNN().to(device)
+    memory_format = torch.channels_last if channels_last else torch.preserve_format
+    model = build_model(arch).to(device, memory_format=memory_format)
+    if save_path is None:
+        save_path = default_save_path(arch)
+    log(f"Architecture: {arch} ({sum(p.numel() for p in model.parameters()):,} parameters)")
+    log(f"Precision: {precision}, channels_last: {channels_last}, "
+        f"effective batch: {batch_size} x {accumulate}{f' x {world_size}' if distributed else ''} = "
+        f"{batch_size * accumulate * world_size}")
+    # Forward/backward go through the DDP wrapper; validation and checkpoints use the plain module
+    ddp_model = DistributedDataParallel(model) if distributed else model
+
+    teacher = None
+    if teacher_path:
+        teacher, teacher_arch = load_checkpoint(teacher_path, map_location=device)
+        teacher = teacher.to(device, memory_format=memory_format)
+        for p in teacher.parameters():
+            p.requires_grad_(False)
+        log(f"Distilling from {teacher_arch} teacher {teacher_path} (alpha={alpha}, T={temperature})")
+
     criterion = nn.BCEWithLogitsLoss()
-    optimizer = optim.Adam(model.parameters(), lr=LR)
+    optimizer = optim.Adam(model.parameters(), lr=lr)
     scheduler = optim.lr_scheduler.ReduceLROnPlateau(optimizer, mode='min', factor=0.5, patience=3)
     
     best_loss = float('inf')
+    best_acc = 0
+    best_epoch = 0
+    throughputs = []
+    stopped = "completed"
     
-    for epoch in range(EPOCHS):
+    for epoch in range(epochs):
         # --- Training ---
-        model.train()
+        sync_exclusions(train_dataset)
+        train_loader.set_epoch(epoch)
+        ddp_model.train()
         train_loss = 0
         train_correct = 0
         train_total = 0
+        # Padding repeats at the end of this rank's shard are trained on but not counted in the metrics
+        real_left = train_loader.real_samples()
         
-        for data, target in train_loader:
-            data, target = data.to(device), target.to(device)
-            target = target.unsqueeze(1)
-            
-            optimizer.zero_grad()
-            output = model(data)
-            loss = criterion(output, target)
-            loss.backward()
-            optimizer.step()
-            
-            train_loss += loss.item()
-            preds = torch.sigmoid(output) > 0.5
-            train_correct += (preds == target).sum().item()
-            train_total += target.size(0)
+        optimizer.zero_grad()
+        pending = 0  # Batches whose gradients haven't been applied yet
+        num_batches = len(train_loader)
+        start = time.perf_counter()
+        # Join lets ranks finish with different batch counts (e.g. a batch that failed to load entirely)
+        with ddp_model.join() if distributed else contextlib.nullcontext():
+            for step, (data, target) in enumerate(train_loader, 1):
+                data = data.to(device, non_blocking=True, memory_format=memory_format)
+                target = target.to(device, non_blocking=True).unsqueeze(1)
+                
+                # DDP all-reduces gradients only on the batch that completes an accumulation group
+                sync = pending + 1 == accumulate or step == num_batches
+                with contextlib.nullcontext() if sync or not distributed else ddp_model.no_sync():
+                    with autocast(device, precision):
+                        output = ddp_model(data)
+                        if teacher is not None:
+                            with torch.no_grad():
+                                teacher_output = teacher(data)
+                    # Losses in float32 whatever the forward pass ran in
+                    output = output.float()
+                    if teacher is not None:
+                        loss = distillation_loss(output, teacher_output.float(), target, alpha, temperature)
+                    else:
+                        loss = criterion(output, target)
+                    (loss / accumulate).backward()
+                pending += 1
+                if sync:
+                    optimizer.step()
+                    optimizer.zero_grad()
+                    pending = 0
+                
+                real = min(target.size(0), real_left)
+                real_left -= real
+                if real < target.size(0):
+                    output, target = output[:real].detach(), target[:real]
+                    if real:
+                        with torch.no_grad():
+                            if teacher is not None:
+                                loss = distillation_loss(output, teacher_output[:real].float(), target, alpha,
+                                                         temperature)
+                            else:
+                                loss = criterion(output, target)
+                if real:
+                    train_loss += loss.item() * real
+                    preds = torch.sigmoid(output) > 0.5
+                    train_correct += (preds == target).sum().item()
+                    train_total += real
+            # Only left over if batches were dropped; under DDP those gradients were never synced, so discard them
+            if pending and not distributed:
+                optimizer.step()
+        elapsed = time.perf_counter() - start
+        train_loss, train_correct, train_total = all_reduce_sums(train_loss, train_correct, train_total)
+        throughputs.append(train_total / elapsed)
             
-        avg_train_loss = train_loss / len(train_loader)
-        train_acc = train_correct / train_total
+        avg_train_loss, train_acc = mean_metrics(train_loss, train_correct, train_total)
         
         # --- Validation ---
         model.eval()
@@ -102,34 +303,106 @@ def train():
         
         with torch.no_grad():
             for data, target in val_loader:
-                data, target = data.to(device), target.to(device)
-                target = target.unsqueeze(1)
+                data = data.to(device, non_blocking=True, memory_format=memory_format)
+                target = target.to(device, non_blocking=True).unsqueeze(1)
                 
                 output = model(data)
                 loss = criterion(output, target)
                 
-                val_loss += loss.item()
+                val_loss += loss.item() * target.size(0)
                 preds = torch.sigmoid(output) > 0.5
                 val_correct += (preds == target).sum().item()
                 val_total += target.size(0)
+        val_loss, val_correct, val_total = all_reduce_sums(val_loss, val_correct, val_total)
         
-        avg_val_loss = val_loss / len(val_loader) if len(val_loader) > 0 else 0
-        val_acc = val_correct / val_total if val_total > 0 else 0
+        avg_val_loss, val_acc = mean_metrics(val_loss, val_correct, val_total)
         
-        print(f"Epoch {epoch+1}/{EPOCHS}")
-        print(f"  Train Loss: {avg_train_loss:.4f} | Acc: {train_acc:.4f}")
-        print(f"  Val Loss:   {avg_val_loss:.4f} | Acc: {val_acc:.4f}")
+        log(f"Epoch {epoch+1}/{epochs}")
+        log(f"  Train Loss: {avg_train_loss:.4f} | Acc: {train_acc:.4f}")
+        log(f"  Val Loss:   {avg_val_loss:.4f} | Acc: {val_acc:.4f}")
+        log(f"  Throughput: {throughputs[-1]:.1f} samples/s ({elapsed:.1f}s)")
         
-        # Scheduler step
+        # Scheduler step (the loss is already averaged over all ranks, so every rank makes the same decision)
         scheduler.step(avg_val_loss)
         
         # Save Best Model
         if avg_val_loss < best_loss:
-            best_loss = avg_val_loss
-            torch.save(model.state_dict(), MODEL_SAVE_PATH)
-            print(f"  > New Best Model Saved (Loss: {best_loss:.4f})")
+            best_loss, best_acc, best_epoch = avg_val_loss, val_acc, epoch + 1
+            if rank == 0:
+                save_checkpoint(model, save_path, arch, epoch=epoch + 1, val_loss=best_loss, val_acc=val_acc, precision=precision)
+            log(f"  > New Best Model Saved (Loss: {best_loss:.4f})")
+
+        # on_epoch always sees the loss; stopping after the last epoch is just completing
+        keep_going = on_epoch is None or on_epoch(epoch + 1, avg_val_loss) is not False
+        if epoch + 1 == epochs:
+            break
+        if not keep_going:
+            stopped = "pruned"
+            log("Stopping: validation loss trails the other trials.")
+            break
+        if patience and epoch + 1 - best_epoch >= patience:
+            stopped = "early_stopped"
+            log(f"Stopping early: no improvement for {patience} epochs.")
+            break
             
-    print(f"Training Complete. Best Validation Loss: {best_loss:.4f}")
+    log(f"Training Complete. Best Validation Loss: {best_loss:.4f}")
+    return {
+        "precision": precision,
+        "channels_last": channels_last,
+        "accumulate": accumulate,
+        "best_val_loss": best_loss,
+        "best_val_acc": best_acc,
+        "best_epoch": best_epoch,
+        "final_val_loss": avg_val_loss,
+        "final_val_acc": val_acc,
+        "epochs_run": epoch + 1,
+        "stopped": stopped,
+        "samples_per_sec": sum(throughputs) / len(throughputs)
+    }
+
+def print_comparison(results):
+    """
+    Side-by-side table of train() summaries, relative to the first (the float32 baseline).
+    """
+    baseline = results[0]
+    print(f"{'Run':<24}{'Samples/s':>10}{'Speedup':>9}{'Final val':>11}{'Best val':>10}{'Delta':>9}")
+    for r in results:
+        name = f"{r['precision']}{' channels_last' if r['channels_last'] else ''} x{r['accumulate']}"
+        print(f"{name:<24}{r['samples_per_sec']:>10.1f}{r['samples_per_sec'] / baseline['samples_per_sec']:>8.2f}x"
+              f"{r['final_val_loss']:>11.4f}{r['best_val_loss']:>10.4f}{r['best_val_loss'] - baseline['best_val_loss']:>+9.4f}")
 
 if __name__ == "__main__":
-    train()
+    parser = argparse.ArgumentParser(description="Train the voice detector")
+    parser.add_argument("--arch", choices=sorted(ARCHITECTURES), default="resnet18")
+    parser.add_argument("--distill", metavar="TEACHER", default=None,
+                        help="Train against this teacher checkpoint's logits (e.g. the ResNet18 model.pth)")
+    parser.add_argument("--alpha", type=float, default=DISTILL_ALPHA, help="Weight of the hard-label loss when distilling")
+    parser.add_argument("--temperature", type=float, default=DISTILL_TEMPERATURE)
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Directory with human/ and ai/ subfolders")
+    parser.add_argument("--output", default=None, help="Checkpoint path (default: model.pth, or model_<arch>.pth)")
+    parser.add_argument("--feature-store", default=STORE_PATH, help="Precomputed features from training/feature_store.py")
+    parser.add_argument("--workers", type=int, default=NUM_WORKERS, help="DataLoader worker processes (0 loads in the training process)")
+    parser.add_argument("--precision", choices=PRECISIONS, default="fp32", help="bf16: bfloat16 autocast for forward passes")
+    parser.add_argument("--channels-last", action="store_true", help="NHWC memory layout for the model and batches")
+    parser.add_argument("--accumulate", type=int, default=1, help=f"Batches per optimizer step (effective batch = {BATCH_SIZE} x N)")
+    parser.add_argument("--patience", type=int, default=None, help="Stop after this many epochs without a better validation loss")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="Intra-op threads per process (default: all cores, split between ranks under torchrun)")
+    parser.add_argument("--compare-fp32", action="store_true",
+                        help="Afterwards, repeat the run in plain float32 (writes <output>_fp32.pth) and compare")
+    args = parser.parse_args()
+    result = train(args.arch, args.distill, args.alpha, args.temperature, args.output, args.feature_store, args.workers,
+                   args.precision, args.channels_last, args.accumulate, args.threads, patience=args.patience,
+                   data_dir=args.data_dir)
+    rank = dist.get_rank() if dist.is_initialized() else 0
+    if result and args.compare_fp32:
+        output = args.output or default_save_path(args.arch)
+        if rank == 0:
+            print("\nFloat32 baseline run:")
+        baseline = train(args.arch, args.distill, args.alpha, args.temperature, os.path.splitext(output)[0] + "_fp32.pth",
+                         args.feature_store, args.workers, "fp32", False, args.accumulate, args.threads,
+                         patience=args.patience, data_dir=args.data_dir)
+        if rank == 0:
+            print_comparison([baseline, result])
+    if dist.is_initialized():
+        dist.destroy_process_group()
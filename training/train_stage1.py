@@ -0,0 +1,92 @@
+import os
+import sys
+import random
+import argparse
+import numpy as np
+import torch
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.linear_model import LogisticRegression
+from sklearn.ensemble import HistGradientBoostingClassifier
+
+# Add parent dir to path to import app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.cascade import summary_features, save_stage1
+from app.model import load_checkpoint
+from dataset import VoiceDataset, VoiceLoader
+from manifest import load_splits
+
+# Config (same data and split as train.py / evaluate.py)
+BATCH_SIZE = 16
+DATA_DIR = r"c:\Users\Alex\Desktop\Antigravity\AIVoiceDetection\data"
+MODEL_SAVE_PATH = r"c:\Users\Alex\Desktop\Antigravity\AIVoiceDetection\stage1.joblib"
+
+def featurize(file_list):
+    """
+    Mel features through the same VoiceDataset the CNN trains on (no augmentation).
+    Returns (mel features (N, F, T), labels (N,)).
+    """
+    loader = VoiceLoader(VoiceDataset(file_list=file_list, train=False), batch_size=BATCH_SIZE, shuffle=False)
+    features, labels = [], []
+    for data, target in loader:
+        features.append(data.squeeze(1).numpy())
+        labels.append(target.numpy())
+    return np.concatenate(features), np.concatenate(labels).astype(int)
+
+def build_estimator(kind):
+    if kind == "gbdt":
+        return HistGradientBoostingClassifier(max_iter=200, learning_rate=0.1, random_state=42)
+    return make_pipeline(StandardScaler(), LogisticRegression(C=0.5, max_iter=2000))
+
+def train_stage1(kind="logistic", low=0.05, high=0.95, teacher_path=None, save_path=MODEL_SAVE_PATH):
+    random.seed(42)
+    torch.manual_seed(42)
+
+    train_files, val_files = load_splits(DATA_DIR)
+    if not train_files or not val_files:
+        print("Insufficient data.")
+        return
+    print(f"Training samples: {len(train_files)}, Validation samples: {len(val_files)}")
+
+    print("Extracting features...")
+    train_mel, train_y = featurize(train_files)
+    val_mel, val_y = featurize(val_files)
+
+    estimator = build_estimator(kind)
+    estimator.fit(summary_features(train_mel), train_y)
+
+    probs = estimator.predict_proba(summary_features(val_mel))[:, 1]
+    accuracy = ((probs > 0.5) == val_y).mean()
+    decided = (probs <= low) | (probs >= high)
+    decided_acc = ((probs[decided] > 0.5) == val_y[decided]).mean() if decided.any() else 0.0
+
+    print("\n" + "="*40)
+    print(f"STAGE 1 ({kind})")
+    print(f"Accuracy (all clips):      {accuracy*100:.2f}%")
+    print(f"Band:                      ({low}, {high})")
+    print(f"Decided by stage 1:        {decided.mean()*100:.2f}%")
+    print(f"Accuracy on decided clips: {decided_acc*100:.2f}%")
+    print(f"Escalation rate:           {(1 - decided.mean())*100:.2f}%")
+
+    if teacher_path:
+        # End-to-end: stage 1 where confident, the CNN everywhere else
+        cnn, arch = load_checkpoint(teacher_path)
+        with torch.no_grad():
+            cnn_probs = torch.sigmoid(cnn(torch.from_numpy(val_mel).unsqueeze(1))).view(-1).numpy()
+        cascade_probs = np.where(decided, probs, cnn_probs)
+        print(f"CNN ({arch}) accuracy:      {((cnn_probs > 0.5) == val_y).mean()*100:.2f}%")
+        print(f"Cascade accuracy:          {((cascade_probs > 0.5) == val_y).mean()*100:.2f}%")
+    print("="*40 + "\n")
+
+    save_stage1(estimator, save_path, kind=kind, val_accuracy=float(accuracy), band=(low, high))
+    print(f"Stage 1 saved to {save_path} (serve it with CASCADE_MODEL_PATH)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the cascade's stage-1 classifier on mel summary statistics")
+    parser.add_argument("--model", choices=["logistic", "gbdt"], default="logistic")
+    parser.add_argument("--low", type=float, default=0.05, help="Stage-1 probability at or below which a clip is HUMAN")
+    parser.add_argument("--high", type=float, default=0.95, help="Stage-1 probability at or above which a clip is AI")
+    parser.add_argument("--teacher", default=None, help="CNN checkpoint, to report end-to-end cascade accuracy")
+    parser.add_argument("--output", default=MODEL_SAVE_PATH)
+    args = parser.parse_args()
+    train_stage1(args.model, args.low, args.high, args.teacher, args.output)